@@ -16,10 +16,15 @@ default_args = {
 
 
 def validate_data():
-    """Check data quality."""
+    """Check data quality on the local dataset snapshot (created on first run)."""
+    from src.evaluation.snapshot import create_snapshot, snapshot_exists, validate_snapshot
+    
     print(" Validating data...")
-    # Add validation logic here
-    return True
+    if not snapshot_exists():
+        create_snapshot()
+    summary = validate_snapshot()
+    print(f" {summary['rows']} rows across {summary['intents']} intents")
+    return summary
 
 
 def train_model():
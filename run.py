@@ -5,7 +5,15 @@ Customer Support Chatbot
 Usage:
     python run.py demo    # Interactive demo
     python run.py eval    # Run evaluation
+    python run.py snapshot  # Store the dataset locally for offline, stratified evaluation
     python run.py api     # Launch API server
+    python run.py export  # Merge the LoRA adapter into a single safetensors checkpoint
+    python run.py cpu-bench  # Compare latency, tokens/sec and RSS of CPU backends
+    python run.py batch --questions in.jsonl --output out.jsonl  # Resumable offline batch answering
+    python run.py bench   # Load-test the API (local stub/tiny model or --url)
+    python run.py micro-bench  # Time inference stages and fail on regressions vs the stored baseline
+    python run.py budgets  # Fit per-intent max_new_tokens budgets from the dataset snapshot
+    python run.py speculative  # Compare greedy and prompt-lookup speculative decoding
 """
 
 import argparse
@@ -32,19 +40,34 @@ def demo():
     print("\nBye!")
 
 
-def evaluate():
+def print_progress(done, total, elapsed):
+    rate = done / elapsed if elapsed > 0 else 0.0
+    end = "\n" if done == total else ""
+    print(f"\r  {done}/{total} samples ({rate:.2f} samples/s)", end=end, flush=True)
+
+
+def evaluate(n_samples=50, batch_size=1, shard_size=None, workers=1, output_dir=None):
     from src.model.inference import load_model
+    from src.evaluation.generation_cache import CachedGenerator, with_generation_cache
     from src.evaluation.metrics import load_test_data, run_evaluation
+    from src.evaluation.runner import EvaluationRunner
     
     print("=" * 60)
     print("EVALUATION")
     print("=" * 60)
     
-    bot = load_model()
-    test_data = load_test_data(n_samples=50)
+    test_data = load_test_data(n_samples=n_samples)
     
-    print(f"\nEvaluating on {len(test_data)} samples...")
-    results = run_evaluation(bot, test_data)
+    print(f"\nEvaluating on {len(test_data)} samples (batch size {batch_size})...")
+    if shard_size or workers > 1 or output_dir:
+        runner = EvaluationRunner(output_dir, shard_size, workers=workers, batch_size=batch_size)
+        print(f"Shards: {runner.output_dir} ({workers} worker(s), resumable)")
+        results = runner.run(test_data, progress=print_progress)
+        cache_stats = runner.cache_stats()
+    else:
+        bot = with_generation_cache(load_model())
+        results = run_evaluation(bot, test_data, batch_size=batch_size, progress=print_progress)
+        cache_stats = bot.cache.stats() if isinstance(bot, CachedGenerator) else None
     
     print("\n" + "=" * 60)
     print("RESULTS")
@@ -52,6 +75,11 @@ def evaluate():
     print(f"Coherence Rate: {results['coherence_rate']:.1%}")
     print(f"Avg Length Score: {results['avg_length_score']:.2f}")
     print(f"Avg Keyword Score: {results['avg_keyword_score']:.2f}")
+    if cache_stats:
+        print(
+            f"Generation Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%} hit rate)"
+        )
     
     print("\nBy Intent:")
     for intent, data in sorted(results["by_intent"].items())[:10]:
@@ -59,6 +87,184 @@ def evaluate():
         print(f"  {intent}: {rate:.0%} ({data['count']} samples)")
 
 
+def snapshot():
+    from src.evaluation.snapshot import create_snapshot, validate_snapshot
+    
+    print("=" * 60)
+    print("DATASET SNAPSHOT")
+    print("=" * 60)
+    
+    path = create_snapshot()
+    summary = validate_snapshot(path)
+    print(f"\nSaved {summary['rows']} rows ({summary['intents']} intents) to {path}")
+    print("`load_test_data` will now sample from it offline.")
+
+
+def export():
+    from src.model.export import export_merged_model
+    
+    print("=" * 60)
+    print("EXPORT MERGED MODEL")
+    print("=" * 60)
+    
+    output_dir = export_merged_model()
+    print(f"\nMerged model saved to {output_dir}")
+    print("`load()` will now use it automatically.")
+
+
+def cpu_bench():
+    import json
+    from src.model.backends import benchmark_backends
+    
+    print("=" * 60)
+    print("CPU BACKEND BENCHMARK")
+    print("=" * 60)
+    
+    questions = [
+        "I want to cancel my order",
+        "Where is my package?",
+        "How do I get a refund?",
+        "I need to change my shipping address",
+        "Can I talk to a human agent?",
+    ]
+    results = benchmark_backends(questions)
+    print(json.dumps(results, indent=2))
+
+
+def batch(input_path, output_path, batch_size=16):
+    from src.model.inference import load_model
+    from src.model.batch_job import run_batch_job
+    
+    print("=" * 60)
+    print("BATCH INFERENCE")
+    print("=" * 60)
+    
+    def report(stats):
+        done = stats["skipped"] + stats["answered"]
+        print(
+            f"\r  {done} answered ({stats['questions_per_s']:.2f} questions/s, "
+            f"{stats['tokens_per_s']:.1f} tokens/s)",
+            end="",
+            flush=True,
+        )
+    
+    bot = load_model()
+    stats = run_batch_job(bot, input_path, output_path, batch_size=batch_size, progress=report)
+    print(f"\n\nWrote {stats['answered']} answers to {output_path} ({stats['skipped']} resumed) in {stats['elapsed_s']}s")
+
+
+def bench(url=None, model="tiny", mode="closed", requests=100, concurrency=4, rate=2.0,
+          stream=False, questions=None, output=None):
+    import json
+    from contextlib import nullcontext
+    from src.benchmark.loadgen import run_load
+    from src.benchmark.local_server import local_server
+    from src.benchmark.workload import load_questions
+    
+    questions = load_questions(questions, limit=requests)
+    server = nullcontext(url) if url else local_server(model)
+    with server as base_url:
+        report = run_load(
+            base_url,
+            questions,
+            mode=mode,
+            n_requests=requests,
+            concurrency=concurrency,
+            rate=rate,
+            stream=stream,
+        )
+    report["config"]["model"] = None if url else model
+    
+    print(json.dumps(report, indent=2))
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def micro_bench(update_baseline=False, threshold=0.3, report_only=False):
+    import sys
+    from src.benchmark.micro import BASELINE_PATH, compare, environment_mismatch, load_baseline, run_suite, save_baseline
+    
+    print("=" * 60)
+    print("MICRO-BENCHMARKS")
+    print("=" * 60)
+    
+    results = run_suite()
+    if update_baseline or not BASELINE_PATH.exists():
+        save_baseline(results)
+        for name, stage in results["stages"].items():
+            print(f"  {name:<22} {stage['best_us']:>12.1f} us")
+        print(f"\nBaseline written to {BASELINE_PATH}")
+        return
+    
+    baseline = load_baseline()
+    rows = compare(results, baseline, threshold)
+    for row in rows:
+        flag = "  REGRESSED" if row["regressed"] else ""
+        print(f"  {row['stage']:<22} {row['baseline_us']:>12.1f} -> {row['current_us']:>12.1f} us  {row['change']:+.0%}{flag}")
+    differences = environment_mismatch(results, baseline)
+    if differences:
+        print(f"\nBaseline was recorded in another environment ({'; '.join(differences)}); "
+              "comparing calibration-normalised times.")
+    regressed = [row["stage"] for row in rows if row["regressed"]]
+    if regressed:
+        print(f"\nRegressed beyond {threshold:.0%}: {', '.join(regressed)}")
+        if not report_only:
+            sys.exit(1)
+        return
+    print(f"\nAll stages within {threshold:.0%} of baseline")
+
+
+def budgets(measure=False, n_samples=20, questions=None):
+    import json
+    from transformers import AutoTokenizer
+    from src.config.settings import CONFIG
+    from src.model.budget import compare_budgets, fit_from_snapshot
+    
+    print("=" * 60)
+    print("TOKEN BUDGETS")
+    print("=" * 60)
+    
+    tokenizer = AutoTokenizer.from_pretrained(CONFIG.adapter_path)
+    predictor, report = fit_from_snapshot(tokenizer)
+    predictor.save(CONFIG.token_budget_path)
+    for intent, budget in predictor.summary().items():
+        print(f"  {intent:<28} {budget:>5} tokens")
+    print(f"\nHeld-out intent accuracy: {report['intent_accuracy']:.1%}")
+    print(f"Mean budget: {report['mean_budget']:.0f} tokens vs fixed {report['fixed_budget']}")
+    print(f"Mean decode steps: {report['mean_decode_steps']:.1f} vs {report['fixed_mean_decode_steps']:.1f} fixed")
+    print(f"Answers longer than their budget: {report['truncated_rate']:.1%} vs {report['fixed_truncated_rate']:.1%} fixed")
+    print(f"\nSaved to {CONFIG.token_budget_path}; set CONFIG.token_budgets = True to serve with them.")
+    
+    if measure:
+        from src.benchmark.workload import load_questions
+        from src.model.inference import load_model
+        
+        report = compare_budgets(load_model(), load_questions(questions, limit=n_samples), predictor)
+        print(json.dumps(report, indent=2))
+        print(f"\nGenerated: {report['mean_decode_steps']:.1f} decode steps per answer vs "
+              f"{report['fixed_mean_decode_steps']:.1f} fixed, {report['speedup']:.2f}x faster")
+
+
+def speculative(n_samples=20, questions=None):
+    import json
+    from src.benchmark.workload import load_questions
+    from src.config.settings import CONFIG
+    from src.model.inference import load_model
+    from src.model.speculative import compare_speculative
+    
+    print("=" * 60)
+    print("SPECULATIVE DECODING")
+    print("=" * 60)
+    
+    CONFIG.speculative = True
+    bot = load_model()
+    report = compare_speculative(bot, load_questions(questions, limit=n_samples))
+    print(json.dumps(report, indent=2))
+    print(f"\nSpeedup {report['speedup']:.2f}x, {report['acceptance_rate']:.0%} of drafted tokens accepted, "
+          f"{report['identical']}/{report['questions']} answers identical to greedy")
+
+
 def api():
     import uvicorn
     print("=" * 60)
@@ -72,12 +278,64 @@ def api():
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Customer Support Chatbot")
-    parser.add_argument("command", choices=["demo", "eval", "api"])
+    parser.add_argument("command", choices=["demo", "eval", "api", "export", "cpu-bench", "snapshot", "bench", "micro-bench", "batch", "budgets", "speculative"])
+    parser.add_argument("--samples", type=int, default=50, help="eval/speculative/budgets --measure: number of test samples")
+    parser.add_argument("--batch-size", type=int, default=None, help="eval/batch: generate this many questions per batch")
+    parser.add_argument("--shard-size", type=int, default=None, help="eval: checkpoint results every N samples")
+    parser.add_argument("--workers", type=int, default=1, help="eval: processes, each loading the model once")
+    parser.add_argument("--output-dir", default=None, help="eval: directory for shard checkpoints")
+    parser.add_argument("--url", default=None, help="bench: target API (default: start a local server)")
+    parser.add_argument("--model", choices=["tiny", "stub"], default="tiny", help="bench: model for the local server")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed", help="bench: load model")
+    parser.add_argument("--requests", type=int, default=100, help="bench: total requests")
+    parser.add_argument("--concurrency", type=int, default=4, help="bench: closed-loop users")
+    parser.add_argument("--rate", type=float, default=2.0, help="bench: open-loop arrivals per second")
+    parser.add_argument("--stream", action="store_true", help="bench: use /chat/stream and report time-to-first-token")
+    parser.add_argument("--questions", default=None, help="bench/speculative/budgets: JSONL request log or 'snapshot'; batch: input JSONL")
+    parser.add_argument("--output", default=None, help="bench: also write the JSON report here; batch: output JSONL")
+    parser.add_argument("--update-baseline", action="store_true", help="micro-bench: store results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.3, help="micro-bench: allowed slowdown per stage (0.3 = 30%%)")
+    parser.add_argument("--report-only", action="store_true", help="micro-bench: print regressions without failing")
+    parser.add_argument("--measure", action="store_true", help="budgets: also generate --samples questions with fixed vs fitted budgets")
     args = parser.parse_args()
     
     if args.command == "demo":
         demo()
     elif args.command == "eval":
-        evaluate()
+        evaluate(
+            n_samples=args.samples,
+            batch_size=args.batch_size or 1,
+            shard_size=args.shard_size,
+            workers=args.workers,
+            output_dir=args.output_dir,
+        )
     elif args.command == "api":
         api()
+    elif args.command == "export":
+        export()
+    elif args.command == "cpu-bench":
+        cpu_bench()
+    elif args.command == "snapshot":
+        snapshot()
+    elif args.command == "bench":
+        bench(
+            url=args.url,
+            model=args.model,
+            mode=args.mode,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            stream=args.stream,
+            questions=args.questions,
+            output=args.output,
+        )
+    elif args.command == "batch":
+        if not args.questions or not args.output:
+            parser.error("batch needs --questions <input.jsonl> and --output <output.jsonl>")
+        batch(args.questions, args.output, batch_size=args.batch_size or 16)
+    elif args.command == "micro-bench":
+        micro_bench(update_baseline=args.update_baseline, threshold=args.threshold, report_only=args.report_only)
+    elif args.command == "budgets":
+        budgets(measure=args.measure, n_samples=args.samples, questions=args.questions)
+    elif args.command == "speculative":
+        speculative(n_samples=args.samples, questions=args.questions)
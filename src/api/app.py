@@ -1,19 +1,85 @@
+import asyncio
+import json
+import math
+import threading
+import time
+from typing import List, Optional
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
 from src.model.inference import load_model
-from src.evaluation.tracking import tracker
+from src.model.batching import BatchScheduler
+from src.model.coalescing import SingleFlight
+from src.api.inference_queue import InferenceQueue, Overloaded
+from src.model.semantic_cache import SemanticCache, load_encoder
+from src.model.fingerprint import model_fingerprint
+from src.config.settings import CONFIG
+from src.evaluation.tracking import METRICS_DIR, tracker
+from src.evaluation.sink import MetricsSink
+from src.evaluation.prometheus import render_prometheus
 from src.config.logging_config import logger
 
 bot = None
+bot_factory = load_model
+scheduler = None
+semantic_cache = None
+in_flight = SingleFlight()
+inference_queue = InferenceQueue(
+    max_concurrency=CONFIG.queue_max_concurrency,
+    max_depth=CONFIG.queue_max_depth,
+    deadline_s=CONFIG.request_deadline_s,
+)
+
+
+def load_semantic_cache() -> SemanticCache:
+    if CONFIG.do_sample:
+        logger.warning("Semantic cache only stores answers when do_sample=False; sampled answers are not reused")
+    encoder = load_encoder(CONFIG.semantic_cache_encoder)
+    adapter_path = getattr(bot, "adapter_path", None) or str(CONFIG.adapter_path)
+    cache = SemanticCache(
+        threshold=CONFIG.semantic_cache_threshold,
+        max_entries=CONFIG.semantic_cache_size,
+        encoder=encoder,
+        namespace=f"{model_fingerprint(adapter_path)}:{encoder.name}",
+    )
+    if CONFIG.semantic_cache_path.exists():
+        try:
+            restored = cache.restore(CONFIG.semantic_cache_path)
+            logger.info(f"Restored {restored} semantic cache entries")
+        except Exception as e:
+            logger.warning(f"Could not restore semantic cache: {e}")
+    return cache
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global bot
+    global bot, scheduler, semantic_cache
     logger.info("Starting API server...")
-    bot = load_model()
+    sink = None
+    if CONFIG.metrics_sink:
+        sink = MetricsSink(
+            METRICS_DIR,
+            max_bytes=CONFIG.metrics_sink_max_bytes,
+            buffer_size=CONFIG.metrics_sink_buffer_size,
+        ).start()
+        tracker.attach_sink(sink)
+    bot = bot_factory()
+    if CONFIG.serving_mode == "batched":
+        scheduler = BatchScheduler(bot).start()
+        # Let a full batch reach the scheduler at once.
+        inference_queue.max_concurrency = max(inference_queue.max_concurrency, CONFIG.max_batch_size)
+    if CONFIG.semantic_cache:
+        semantic_cache = load_semantic_cache()
     yield
+    if scheduler is not None:
+        scheduler.stop()
+        scheduler = None
+    if semantic_cache is not None:
+        semantic_cache.save(CONFIG.semantic_cache_path)
+    if sink is not None:
+        tracker.attach_sink(None)
+        sink.stop()
     tracker.save()
     logger.info("API server shutdown")
 
@@ -27,6 +93,7 @@ app = FastAPI(
 
 class ChatRequest(BaseModel):
     question: str
+    deadline_ms: Optional[float] = None
 
 
 class ChatResponse(BaseModel):
@@ -35,6 +102,16 @@ class ChatResponse(BaseModel):
     latency_ms: float = None
 
 
+class BatchChatRequest(BaseModel):
+    questions: List[str]
+    deadline_ms: Optional[float] = None
+
+
+class BatchChatResponse(BaseModel):
+    responses: List[ChatResponse]
+    latency_ms: float = None
+
+
 @app.get("/")
 def root():
     return {"status": "ok", "model": "customer-support-chatbot"}
@@ -47,6 +124,7 @@ def health():
         "model_loaded": bot is not None,
         "total_requests": tracker.model_metrics.total_inferences,
         "avg_latency_ms": round(tracker.model_metrics.avg_latency_ms, 2),
+        "p99_latency_ms": round(tracker.latency_percentiles()["p99"], 2),
         "error_rate": round(tracker.model_metrics.errors / max(1, tracker.model_metrics.total_inferences), 4)
     }
 
@@ -56,14 +134,36 @@ def metrics():
     return tracker.get_summary()
 
 
+@app.get("/metrics/prometheus", response_class=PlainTextResponse)
+def metrics_prometheus():
+    return PlainTextResponse(render_prometheus(tracker), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/chat", response_model=ChatResponse)
-def chat(request: ChatRequest):
+async def chat(request: ChatRequest):
     if bot is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
     
-    import time
     start = time.time()
-    response = bot.chat(request.question)
+    response = None
+    if semantic_cache is not None:
+        response = await asyncio.to_thread(semantic_cache.lookup, request.question)
+    if response is None:
+        responder = scheduler if scheduler is not None else bot
+        deadline_s = request.deadline_ms / 1000 if request.deadline_ms else None
+        try:
+            response = await in_flight.do_async(
+                bot.generation_key(request.question),
+                lambda: inference_queue.run(responder.chat, request.question, deadline_s=deadline_s),
+            )
+        except Overloaded as e:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Server overloaded ({e.reason})",
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            )
+        if semantic_cache is not None and not CONFIG.do_sample:
+            await asyncio.to_thread(semantic_cache.add, request.question, response)
     latency = (time.time() - start) * 1000
     
     return ChatResponse(
@@ -71,3 +171,102 @@ def chat(request: ChatRequest):
         response=response,
         latency_ms=round(latency, 2)
     )
+
+
+@app.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_batch(request: BatchChatRequest):
+    if bot is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    if not request.questions:
+        raise HTTPException(status_code=422, detail="questions must not be empty")
+    if len(request.questions) > CONFIG.max_batch_request_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {CONFIG.max_batch_request_size} questions per batch",
+        )
+    
+    start = time.time()
+    responses = [None] * len(request.questions)
+    if semantic_cache is not None:
+        responses = await asyncio.to_thread(lambda: [semantic_cache.lookup(q) for q in request.questions])
+    pending = [i for i, response in enumerate(responses) if response is None]
+    if pending:
+        deadline_s = request.deadline_ms / 1000 if request.deadline_ms else None
+        try:
+            generated = await inference_queue.run(
+                bot.chat_batch, [request.questions[i] for i in pending], deadline_s=deadline_s, kind="batch"
+            )
+        except Overloaded as e:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Server overloaded ({e.reason})",
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            )
+        for i, response in zip(pending, generated):
+            responses[i] = response
+        if semantic_cache is not None and not CONFIG.do_sample:
+            await asyncio.to_thread(
+                lambda: [semantic_cache.add(request.questions[i], responses[i]) for i in pending]
+            )
+    latency = round((time.time() - start) * 1000, 2)
+    
+    return BatchChatResponse(
+        responses=[
+            ChatResponse(question=q, response=r, latency_ms=latency)
+            for q, r in zip(request.questions, responses)
+        ],
+        latency_ms=latency,
+    )
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    if bot is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    deadline_s = request.deadline_ms / 1000 if request.deadline_ms else None
+    try:
+        release = await inference_queue.acquire(deadline_s, kind="stream")
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server overloaded ({e.reason})",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    
+    loop = asyncio.get_running_loop()
+    events_queue: asyncio.Queue = asyncio.Queue()
+    client_gone = threading.Event()
+    
+    def produce():
+        def put(event: Optional[str]):
+            if not client_gone.is_set():
+                loop.call_soon_threadsafe(events_queue.put_nowait, event)
+        
+        chunks = None
+        try:
+            chunks = bot.stream_chat(request.question)
+            for delta in chunks:
+                put(f"data: {json.dumps({'delta': delta})}\n\n")
+                if client_gone.is_set():
+                    break
+            put("data: [DONE]\n\n")
+        except Exception as e:
+            put(f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n")
+        finally:
+            # Closing the generator here, in its own thread, stops generation early and waits for it.
+            if hasattr(chunks, "close"):
+                chunks.close()
+            put(None)
+    
+    # The slot is freed when generation has finished, not when the client stops reading.
+    inference_queue.submit(release, produce)
+    
+    async def events():
+        try:
+            while (event := await events_queue.get()) is not None:
+                yield event
+        finally:
+            client_gone.set()
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -0,0 +1,140 @@
+import asyncio
+import contextvars
+import functools
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, TypeVar
+from src.evaluation.tracking import tracker
+
+T = TypeVar("T")
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def ewma(average: float, value: float) -> float:
+    return value if average == 0 else 0.8 * average + 0.2 * value
+
+
+class InferenceQueue:
+    """Admission control in front of blocking inference calls.
+
+    At most `max_concurrency` calls run at once in worker threads and at most
+    `max_depth` wait for a slot. A request is shed with `Overloaded` up front when
+    the queue is full or its estimated wait plus service time exceeds its deadline,
+    and later if it is still waiting when it could no longer finish in time.
+
+    Service times are tracked per `kind` of call, so a 64-row batch or a long
+    stream does not make single questions look slow; waits are estimated from
+    how long any call holds a slot.
+    """
+
+    def __init__(self, max_concurrency: int, max_depth: int, deadline_s: float):
+        self.max_concurrency = max_concurrency
+        self.max_depth = max_depth
+        self.deadline_s = deadline_s
+        self.active = 0
+        self.service_times: Dict[str, float] = {}
+        self.slot_time_s = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def depth(self) -> int:
+        return len(self._waiters)
+
+    def estimated_wait(self) -> float:
+        if self.active < self.max_concurrency:
+            return 0.0
+        return (self.depth // self.max_concurrency + 1) * self.slot_time_s
+
+    async def run(self, fn: Callable[..., T], *args, deadline_s: Optional[float] = None, kind: str = "chat") -> T:
+        release = await self.acquire(deadline_s, kind)
+        # Shielded: a cancelled caller stops waiting, but the thread keeps its slot until it returns.
+        return await asyncio.shield(self.submit(release, fn, *args))
+
+    def submit(self, release: Callable[[], None], fn: Callable[..., T], *args) -> "asyncio.Future[T]":
+        """Run `fn` in a worker thread under an acquired slot, freeing the slot when the thread finishes."""
+        try:
+            future = asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(contextvars.copy_context().run, fn, *args)
+            )
+        except BaseException:
+            release()
+            raise
+        
+        def done(f: asyncio.Future):
+            release()
+            if not f.cancelled():
+                f.exception()  # mark retrieved in case every caller has given up
+        
+        future.add_done_callback(done)
+        return future
+
+    async def acquire(self, deadline_s: Optional[float] = None, kind: str = "chat") -> Callable[[], None]:
+        """Wait for a slot, or shed; the returned callable frees it and records how long it was held."""
+        deadline_s = deadline_s or self.deadline_s
+        service_time_s = self.service_times.get(kind, 0.0)
+        start = time.monotonic()
+        
+        if self.depth >= self.max_depth:
+            self._shed("queue_full")
+        if self.estimated_wait() + service_time_s > deadline_s:
+            self._shed("deadline")
+        
+        await self._acquire(max(0.0, deadline_s - service_time_s))
+        acquired = time.monotonic()
+        tracker.log_queue(self.depth, acquired - start)
+        released = False
+        
+        def release():
+            nonlocal released
+            if released:
+                return
+            released = True
+            elapsed = time.monotonic() - acquired
+            self.service_times[kind] = ewma(self.service_times.get(kind, 0.0), elapsed)
+            self.slot_time_s = ewma(self.slot_time_s, elapsed)
+            self._release()
+        
+        return release
+
+    async def _acquire(self, timeout: float):
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            return
+        
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        tracker.log_queue(self.depth)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except BaseException as e:
+            timed_out = isinstance(e, asyncio.TimeoutError)
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up.
+                if timed_out:
+                    return
+                self._release()
+                raise
+            waiter.cancel()
+            self._waiters.remove(waiter)
+            tracker.log_queue(self.depth)
+            if timed_out:
+                self._shed("deadline")
+            raise
+
+    def _release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # hand the slot over without freeing it
+                return
+        self.active -= 1
+
+    def _shed(self, reason: str):
+        tracker.log_shed(reason)
+        raise Overloaded(reason, retry_after=max(1.0, self.estimated_wait()))
@@ -0,0 +1,132 @@
+import asyncio
+import itertools
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import numpy as np
+
+
+@dataclass
+class RequestResult:
+    start: float
+    latency_s: float
+    status: str
+    ttft_s: Optional[float] = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.status == "200"
+
+
+async def send_request(client, question: str, stream: bool) -> RequestResult:
+    start = time.perf_counter()
+    ttft = None
+    try:
+        if not stream:
+            response = await client.post("/chat", json={"question": question})
+            return RequestResult(start, time.perf_counter() - start, str(response.status_code))
+        
+        async with client.stream("POST", "/chat/stream", json={"question": question}) as response:
+            status = str(response.status_code)
+            async for line in response.aiter_lines():
+                if line.startswith("event: error"):
+                    status = "stream_error"
+                elif line.startswith("data: ") and line != "data: [DONE]" and ttft is None:
+                    ttft = time.perf_counter() - start
+        return RequestResult(start, time.perf_counter() - start, status, ttft)
+    except Exception as e:
+        return RequestResult(start, time.perf_counter() - start, type(e).__name__, ttft)
+
+
+async def closed_loop(client, questions: List[str], n_requests: int, concurrency: int, stream: bool) -> List[RequestResult]:
+    """`concurrency` users, each sending its next question as soon as the previous answer arrives."""
+    indices = iter(range(n_requests))
+    results = []
+    
+    async def user():
+        for i in indices:
+            results.append(await send_request(client, questions[i % len(questions)], stream))
+    
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return results
+
+
+async def open_loop(
+    client, questions: List[str], n_requests: int, rate: float, stream: bool, seed: int = 0
+) -> List[RequestResult]:
+    """Poisson arrivals at `rate` req/s, independent of how fast the server answers."""
+    rng = random.Random(seed)
+    arrivals = list(itertools.accumulate(rng.expovariate(rate) for _ in range(n_requests)))
+    start = time.perf_counter()
+    
+    async def arrive(i, at):
+        await asyncio.sleep(max(0.0, start + at - time.perf_counter()))
+        return await send_request(client, questions[i % len(questions)], stream)
+    
+    return list(await asyncio.gather(*(arrive(i, at) for i, at in enumerate(arrivals))))
+
+
+def _percentiles_ms(values: List[float]) -> Optional[Dict[str, float]]:
+    if not values:
+        return None
+    p50, p95, p99 = np.percentile(np.array(values) * 1000, [50, 95, 99])
+    return {
+        "p50": round(float(p50), 2),
+        "p95": round(float(p95), 2),
+        "p99": round(float(p99), 2),
+        "mean": round(float(np.mean(values)) * 1000, 2),
+    }
+
+
+def summarize(results: List[RequestResult], elapsed_s: float) -> Dict:
+    ok = [r for r in results if r.ok]
+    errors = Counter(r.status for r in results if not r.ok)
+    return {
+        "requests": len(results),
+        "successful": len(ok),
+        "errors": dict(errors),
+        "error_rate": round(sum(errors.values()) / len(results), 4) if results else 0.0,
+        "elapsed_s": round(elapsed_s, 3),
+        "throughput_rps": round(len(ok) / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+        "latency_ms": _percentiles_ms([r.latency_s for r in ok]),
+        "ttft_ms": _percentiles_ms([r.ttft_s for r in ok if r.ttft_s is not None]),
+    }
+
+
+def run_load(
+    base_url: str,
+    questions: List[str],
+    mode: str = "closed",
+    n_requests: int = 100,
+    concurrency: int = 4,
+    rate: float = 2.0,
+    stream: bool = False,
+    timeout_s: float = 120.0,
+) -> Dict:
+    import httpx
+    
+    async def main():
+        # open loop must never queue inside the client, or arrivals stop being independent
+        limits = httpx.Limits(max_connections=None if mode == "open" else concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=timeout_s, limits=limits) as client:
+            start = time.perf_counter()
+            if mode == "closed":
+                results = await closed_loop(client, questions, n_requests, concurrency, stream)
+            elif mode == "open":
+                results = await open_loop(client, questions, n_requests, rate, stream)
+            else:
+                raise ValueError(f"Unknown load mode: {mode}")
+            return summarize(results, time.perf_counter() - start)
+    
+    report = asyncio.run(main())
+    report["config"] = {
+        "url": base_url,
+        "mode": mode,
+        "requests": n_requests,
+        "concurrency": concurrency if mode == "closed" else None,
+        "rate_rps": rate if mode == "open" else None,
+        "endpoint": "/chat/stream" if stream else "/chat",
+    }
+    return report
@@ -0,0 +1,118 @@
+import socket
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List
+from src.config.settings import CONFIG
+from src.evaluation.tracking import tracker
+from src.model.cache import normalize_question
+
+STUB_ANSWER = (
+    "Thank you for reaching out. I have checked your account and can help with this right away. "
+    "Please confirm your order number and I will take care of the rest."
+)
+
+
+class StubBot:
+    """Model-free stand-in for CustomerSupportBot with simulated prefill and per-token decode time."""
+    
+    adapter_path = "stub"
+    tokenizer = None
+    
+    def __init__(self, prefill_s: float = 0.02, token_s: float = 0.005):
+        self.prefill_s = prefill_s
+        self.token_s = token_s
+        self.words = STUB_ANSWER.split()
+    
+    def generation_key(self, question: str) -> tuple:
+        return (normalize_question(question), self.adapter_path)
+    
+    def chat(self, question: str) -> str:
+        start = time.time()
+        time.sleep(self.prefill_s + self.token_s * len(self.words))
+        tracker.log_inference(question, STUB_ANSWER, time.time() - start, tokens=len(self.words))
+        return STUB_ANSWER
+    
+    def chat_batch(self, questions: List[str]) -> List[str]:
+        start = time.time()
+        time.sleep(self.prefill_s + self.token_s * len(self.words))
+        for question in questions:
+            tracker.log_inference(question, STUB_ANSWER, time.time() - start, tokens=len(self.words))
+        return [STUB_ANSWER] * len(questions)
+    
+    def stream_chat(self, question: str) -> Iterator[str]:
+        start = time.time()
+        time.sleep(self.prefill_s)
+        for i, word in enumerate(self.words):
+            time.sleep(self.token_s)
+            yield word if i == 0 else " " + word
+        tracker.log_inference(question, STUB_ANSWER, time.time() - start, tokens=len(self.words))
+
+
+def tiny_bot(seed: int = 0):
+    """A CustomerSupportBot on a randomly initialised two-layer Llama, using the adapter's local tokenizer."""
+    import torch
+    from transformers import AutoTokenizer, LlamaConfig, LlamaForCausalLM
+    from src.model.inference import CustomerSupportBot
+    
+    torch.manual_seed(seed)
+    tokenizer = AutoTokenizer.from_pretrained(CONFIG.adapter_path)
+    config = LlamaConfig(
+        vocab_size=len(tokenizer),
+        hidden_size=64,
+        intermediate_size=128,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=4,
+        max_position_embeddings=2048,
+    )
+    return CustomerSupportBot().attach(LlamaForCausalLM(config).eval(), tokenizer)
+
+
+BOT_FACTORIES = {
+    "stub": StubBot,
+    "tiny": tiny_bot,
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_server(model: str = "tiny") -> Iterator[str]:
+    """Run the real API app in a background thread, serving a stub or tiny model instead of TinyLlama.
+    
+    Metrics, the metrics sink and the semantic cache snapshot go to a temporary
+    directory so a benchmark run never overwrites the server's own files.
+    """
+    import uvicorn
+    import src.api.app as api
+    
+    previous_factory, previous_bot = api.bot_factory, api.bot
+    previous_paths = api.METRICS_DIR, tracker.metrics_file, CONFIG.semantic_cache_path
+    scratch = tempfile.TemporaryDirectory(prefix="benchmark-")
+    api.bot_factory = BOT_FACTORIES[model]
+    api.METRICS_DIR = Path(scratch.name)
+    tracker.metrics_file = api.METRICS_DIR / tracker.metrics_file.name
+    CONFIG.semantic_cache_path = api.METRICS_DIR / CONFIG.semantic_cache_path.name
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        while not server.started:
+            if not thread.is_alive():
+                raise RuntimeError("Local benchmark server failed to start")
+            time.sleep(0.05)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+        api.bot_factory, api.bot = previous_factory, previous_bot
+        api.METRICS_DIR, tracker.metrics_file, CONFIG.semantic_cache_path = previous_paths
+        scratch.cleanup()
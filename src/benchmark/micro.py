@@ -0,0 +1,178 @@
+import json
+import platform
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+BASELINE_PATH = Path("benchmarks/micro_baseline.json")
+DEFAULT_THRESHOLD = 0.3
+
+SAMPLE_QUESTION = "I ordered a jacket last week and it still hasn't arrived, can you check where my package is?"
+SAMPLE_OUTPUT = (
+    "<|system|>\nYou are a helpful customer support assistant.</s>\n<|user|>\n" + SAMPLE_QUESTION + "</s>\n"
+    "<|assistant|>\nI'm sorry your jacket hasn't arrived yet. Please share your order number and I will "
+    "check the shipping status for you right away.</s><|user|>"
+)
+SAMPLE_EXPECTED = (
+    "I understand your concern about the delayed delivery. To track your package, please provide your "
+    "order number and I will look into the current shipping status."
+)
+
+
+def _calibration_loop():
+    total = 0
+    table = {}
+    for i in range(2000):
+        total += i * i
+        table[i & 63] = total
+    return table
+
+
+def measure(fn: Callable[[], object], min_time_s: float = 0.02, repeat: int = 7) -> Tuple[float, float]:
+    """Best and median seconds per call, timeit-style: calls are batched so each repeat lasts >= min_time_s."""
+    fn()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= min_time_s:
+            break
+        number *= 2
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+    return min(timings), statistics.median(timings)
+
+
+class MicroBenchmarks:
+    """Fixtures for each stage of `CustomerSupportBot.chat` plus tracking and scoring.
+    
+    The model is a tiny random-weight Llama, so the suite runs on CPU-only CI.
+    """
+    
+    def __init__(self):
+        import torch
+        from src.benchmark.local_server import tiny_bot
+        from src.evaluation.tracking import MetricsTracker
+        
+        torch.set_num_threads(1)  # single-threaded timings are far less noisy on shared runners
+        self.torch = torch
+        self.bot = tiny_bot()
+        self.tracker = MetricsTracker(history_size=1000)
+        self.prompt = self._render()
+        self.inputs = self.bot.tokenizer(self.prompt, return_tensors="pt")
+        self.output_ids = self.bot.tokenizer(SAMPLE_OUTPUT, return_tensors="pt")["input_ids"][0]
+        self.generated = [SAMPLE_OUTPUT.split("<|assistant|>")[-1].split("<")[0].strip()] * 256
+        self.expected = [SAMPLE_EXPECTED] * 256
+    
+    def _render(self) -> str:
+        from src.config.settings import CONFIG
+        return CONFIG.prompt_template.render(SAMPLE_QUESTION)
+    
+    def stages(self) -> Dict[str, Callable[[], object]]:
+        from src.evaluation.metrics import evaluate_coherence, evaluate_keyword_overlap, evaluate_response_length
+        from src.evaluation.vectorized import score_pairs
+        from src.model.inference import extract_response
+        
+        bot, torch = self.bot, self.torch
+        
+        def forward():
+            with torch.no_grad():
+                return bot.model(**self.inputs)
+        
+        def score_scalar():
+            response = self.generated[0]
+            return (
+                evaluate_coherence(response),
+                evaluate_response_length(response, SAMPLE_EXPECTED),
+                evaluate_keyword_overlap(response, SAMPLE_EXPECTED),
+            )
+        
+        return {
+            "prompt": self._render,
+            "tokenize": lambda: bot.tokenizer(self.prompt, return_tensors="pt"),
+            "forward": forward,
+            "decode": lambda: bot.tokenizer.decode(self.output_ids, skip_special_tokens=True),
+            "postprocess": lambda: extract_response(SAMPLE_OUTPUT),
+            "tracker": lambda: self.tracker.log_inference(SAMPLE_QUESTION, SAMPLE_OUTPUT, 0.1, tokens=32, prompt_tokens=48),
+            "score_scalar": score_scalar,
+            "score_vectorized_256": lambda: score_pairs(self.generated, self.expected),
+        }
+
+
+def run_suite(only: List[str] = None, min_time_s: float = 0.02, repeat: int = 7) -> Dict:
+    """Time each stage; `relative` is best time over a pure-Python calibration loop so baselines travel across machines."""
+    import torch
+    
+    calibration, _ = measure(_calibration_loop, min_time_s, repeat)
+    benchmarks = MicroBenchmarks()
+    stages = {}
+    for name, fn in benchmarks.stages().items():
+        if only and name not in only:
+            continue
+        best, median = measure(fn, min_time_s, repeat)
+        stages[name] = {
+            "best_us": round(best * 1e6, 3),
+            "median_us": round(median * 1e6, 3),
+            "relative": round(best / calibration, 5),
+        }
+    return {
+        "calibration_us": round(calibration * 1e6, 3),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "machine": platform.machine(),
+        "stages": stages,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """Per-stage slowdown vs the baseline; a stage regresses when relative time grows by more than `threshold`."""
+    rows = []
+    for name, base in baseline["stages"].items():
+        if name not in current["stages"]:
+            continue
+        change = current["stages"][name]["relative"] / base["relative"] - 1
+        rows.append({
+            "stage": name,
+            "baseline_us": base["best_us"],
+            "current_us": current["stages"][name]["best_us"],
+            "change": round(change, 3),
+            "regressed": change > threshold,
+        })
+    return rows
+
+
+def environment_mismatch(current: Dict, baseline: Dict) -> List[str]:
+    """What differs between the two runs' Python minor version, torch build and CPU architecture.
+    
+    `compare` uses calibration-normalised times, which absorb CPU speed but not
+    these; they are reported so a regression can be told apart from a new toolchain.
+    """
+    def minor(version: str) -> str:
+        return ".".join(str(version).split(".")[:2])
+    
+    differences = []
+    if minor(current.get("python", "")) != minor(baseline.get("python", "")):
+        differences.append(f"python {baseline.get('python')} -> {current.get('python')}")
+    for key in ("torch", "machine"):
+        if current.get(key) != baseline.get(key):
+            differences.append(f"{key} {baseline.get(key)} -> {current.get(key)}")
+    return differences
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results: Dict, path: Path = BASELINE_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
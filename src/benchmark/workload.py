@@ -0,0 +1,41 @@
+import json
+from pathlib import Path
+from typing import List
+
+SAMPLE_QUESTIONS = [
+    "I want to cancel my order",
+    "Where is my package?",
+    "How do I get a refund?",
+    "I need to change my shipping address",
+    "Can I talk to a human agent?",
+]
+
+
+def read_jsonl_questions(path: Path) -> List[str]:
+    """Questions from a JSONL request log: API bodies / metrics sink records ("question") or Bitext rows ("instruction")."""
+    questions = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                questions.append(record)
+            elif record.get("question") or record.get("instruction"):
+                questions.append(record.get("question") or record.get("instruction"))
+    return questions
+
+
+def load_questions(source: str = None, limit: int = 1000, seed: int = 0) -> List[str]:
+    from src.evaluation.snapshot import sample_snapshot, snapshot_exists
+    
+    if source and source != "snapshot":
+        questions = read_jsonl_questions(Path(source))
+    elif source == "snapshot" or snapshot_exists():
+        questions = [row["instruction"] for row in sample_snapshot(limit, seed)]
+    else:
+        questions = list(SAMPLE_QUESTIONS)
+    if not questions:
+        raise ValueError(f"No questions found in {source}")
+    return questions[:limit]
@@ -1,30 +1,94 @@
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import Dict
 
 LOG_DIR = Path("logs")
 LOG_DIR.mkdir(exist_ok=True)
 
-def setup_logging(name: str = "chatbot") -> logging.Logger:
+# Fraction of records kept per level; levels not listed are always kept.
+DEFAULT_SAMPLE_RATES = {logging.DEBUG: 0.1}
+
+_listeners: Dict[str, QueueListener] = {}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rates: Dict[int, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the listener thread; drops them instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(
+    name: str = "chatbot",
+    level: int = logging.INFO,
+    sample_rates: Dict[int, float] = None,
+    queue_size: int = 10000,
+) -> logging.Logger:
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+    logger.setLevel(level)
+    if name in _listeners:
+        return logger
+    
+    formatter = JsonFormatter()
     
     # Console handler
     console = logging.StreamHandler(sys.stdout)
     console.setLevel(logging.INFO)
-    console_format = logging.Formatter('[%(asctime)s] %(levelname)s - %(message)s')
-    console.setFormatter(console_format)
+    console.setFormatter(formatter)
     
     # File handler
     log_file = LOG_DIR / f"{name}_{datetime.now().strftime('%Y%m%d')}.log"
     file_handler = logging.FileHandler(log_file)
     file_handler.setLevel(logging.DEBUG)
-    file_format = logging.Formatter('[%(asctime)s] %(levelname)s [%(name)s] - %(message)s')
-    file_handler.setFormatter(file_format)
+    file_handler.setFormatter(formatter)
+    
+    # The request path only enqueues; a listener thread does the formatting and I/O.
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(DEFAULT_SAMPLE_RATES if sample_rates is None else sample_rates))
+    listener = QueueListener(log_queue, console, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
     
-    logger.addHandler(console)
-    logger.addHandler(file_handler)
+    logger.addHandler(queue_handler)
+    _listeners[name] = listener
     
     return logger
 
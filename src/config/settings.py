@@ -1,13 +1,71 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Tuple
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    system: str = "You are a helpful customer support assistant."
+
+    def prefix(self) -> str:
+        return f"<|system|>\n{self.system}</s>\n"
+
+    def turn(self, question: str) -> str:
+        return f"<|user|>\n{question}</s>\n<|assistant|>\n"
+
+    def render(self, question: str) -> str:
+        return self.prefix() + self.turn(question)
+
 
 @dataclass
 class Config:
     base_model: str = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"
     adapter_path: Path = Path("models/customer-support-model")
+    merged_model_path: Path = Path("models/customer-support-merged")
+    backend: str = "auto"  # "auto" (float16, device_map="auto") or "cpu"
+    cpu_dtype: str = "bfloat16"  # "bfloat16" or "float32"
+    cpu_quantize_int8: bool = False
+    cpu_threads: int = 0  # 0 keeps the torch default
     max_new_tokens: int = 150
     temperature: float = 0.7
     top_p: float = 0.9
     repetition_penalty: float = 1.2
+    do_sample: bool = True  # set False for deterministic (greedy) answers
+    stop_sequences: Tuple[str, ...] = ("</s>", "<|user|>", "<|")
+    token_budgets: bool = False  # per-intent max_new_tokens fitted by `python run.py budgets`
+    token_budget_path: Path = Path("models/token_budgets.npz")
+    token_budget_percentile: float = 95.0
+    token_budget_min: int = 16
+    token_budget_min_similarity: float = 0.2
+    speculative: bool = False  # prompt-lookup drafts verified by the model; greedy single requests only
+    speculative_draft_tokens: int = 8
+    speculative_ngram: int = 3
+    speculative_index_path: Path = Path("models/speculative_index.npz")
+    prompt_template: PromptTemplate = field(default_factory=PromptTemplate)
+    prefix_cache: bool = True
+    response_cache_size: int = 1024
+    response_cache_ttl_s: float = 3600.0
+    response_cache_max_bytes: int = 16 * 1024 * 1024
+    semantic_cache: bool = False  # only stores answers when do_sample=False
+    semantic_cache_threshold: float = 0.9
+    semantic_cache_size: int = 10000
+    semantic_cache_path: Path = Path("cache/semantic_cache.npz")
+    semantic_cache_encoder: str = "sentence-transformers/all-MiniLM-L6-v2"  # or "hashing"
+    queue_max_concurrency: int = 4
+    queue_max_depth: int = 64
+    request_deadline_s: float = 30.0
+    metrics_sink: bool = True
+    metrics_sink_max_bytes: int = 50 * 1024 * 1024
+    metrics_sink_buffer_size: int = 10000
+    serving_mode: str = "single"  # "single" or "batched"
+    batch_window_ms: float = 10.0
+    max_batch_size: int = 8
+    max_batch_request_size: int = 64
+    dataset_name: str = "bitext/Bitext-customer-support-llm-chatbot-training-dataset"
+    dataset_snapshot_path: Path = Path("data/snapshot/bitext")
+    eval_output_dir: Path = Path("data/results/eval")
+    eval_shard_size: int = 50
+    generation_cache: bool = True
+    generation_cache_path: Path = Path("cache/generations.sqlite")
 
 CONFIG = Config()
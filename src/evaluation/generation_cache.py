@@ -0,0 +1,126 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from src.config.settings import CONFIG
+from src.model.fingerprint import adapter_fingerprint, generation_params
+
+
+class GenerationCache:
+    """Persistent prompt -> generation store shared by evaluation runs.
+    
+    SQLite in WAL mode lets several eval worker processes read and write the
+    same file; each process and thread gets its own connection.
+    """
+    
+    def __init__(self, path: Path = None):
+        self.path = Path(path or CONFIG.generation_cache_path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS generations ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)"
+            )
+    
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    @staticmethod
+    def key(adapter_hash: str, prompt: str, params: Dict) -> str:
+        payload = json.dumps({"adapter": adapter_hash, "prompt": prompt, "params": params}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        found = {}
+        conn = self._connection()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = conn.execute(
+                f"SELECT key, response FROM generations WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            found.update(rows)
+        responses = [found.get(key) for key in keys]
+        hits = sum(r is not None for r in responses)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return responses
+    
+    def put_many(self, items: Dict[str, str]):
+        if not items:
+            return
+        now = time.time()
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO generations (key, response, created) VALUES (?, ?, ?)",
+                [(key, response, now) for key, response in items.items()],
+            )
+    
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM generations").fetchone()[0]
+    
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+    
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class CachedGenerator:
+    """Wraps a bot so `chat`/`chat_batch` answer from the generation cache first."""
+    
+    def __init__(self, bot, cache: GenerationCache):
+        self.bot = bot
+        self.cache = cache
+        self.tokenizer = getattr(bot, "tokenizer", None)
+        self.adapter_hash = adapter_fingerprint(bot.adapter_path)
+    
+    def _keys(self, questions: List[str]) -> List[str]:
+        params = generation_params()
+        return [
+            self.cache.key(self.adapter_hash, CONFIG.prompt_template.render(q), params)
+            for q in questions
+        ]
+    
+    def _answer(self, questions: List[str], generate) -> List[str]:
+        keys = self._keys(questions)
+        responses = self.cache.get_many(keys)
+        pending = [i for i, response in enumerate(responses) if response is None]
+        if pending:
+            for i, response in zip(pending, generate([questions[i] for i in pending])):
+                responses[i] = response
+            self.cache.put_many({keys[i]: responses[i] for i in pending})
+        return responses
+    
+    def chat(self, question: str) -> str:
+        return self._answer([question], lambda qs: [self.bot.chat(q) for q in qs])[0]
+    
+    def chat_batch(self, questions: List[str]) -> List[str]:
+        return self._answer(questions, self.bot.chat_batch)
+
+
+def with_generation_cache(bot):
+    if not CONFIG.generation_cache:
+        return bot
+    return CachedGenerator(bot, GenerationCache())
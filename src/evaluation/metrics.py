@@ -1,11 +1,21 @@
 import json
+import math
+import time
+from collections import Counter
 from pathlib import Path
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 from datasets import load_dataset
+from src.config.settings import CONFIG
+from src.config.logging_config import logger
+from src.evaluation.snapshot import sample_snapshot, snapshot_exists
 
 
-def load_test_data(n_samples: int = 100) -> List[Dict]:
-    dataset = load_dataset("bitext/Bitext-customer-support-llm-chatbot-training-dataset")
+def load_test_data(n_samples: int = 100, seed: int = 0) -> List[Dict]:
+    if snapshot_exists():
+        return sample_snapshot(n_samples, seed)
+    
+    logger.warning("No dataset snapshot found, downloading (run `python run.py snapshot` to work offline)")
+    dataset = load_dataset(CONFIG.dataset_name)
     test_data = dataset["train"].select(range(n_samples))
     return [{"instruction": d["instruction"], "response": d["response"], "intent": d["intent"]} for d in test_data]
 
@@ -40,35 +50,126 @@ def evaluate_coherence(response: str) -> float:
     return 1.0
 
 
-def run_evaluation(bot, test_data: List[Dict]) -> Dict:
-    results = {
-        "total": len(test_data),
+def evaluate_rouge_l(generated: str, expected: str) -> float:
+    gen_words = generated.lower().split()
+    exp_words = expected.lower().split()
+    if not gen_words or not exp_words:
+        return 0.0
+    previous = [0] * (len(exp_words) + 1)
+    for word in gen_words:
+        current = [0]
+        for j, expected_word in enumerate(exp_words):
+            current.append(previous[j] + 1 if word == expected_word else max(previous[j + 1], current[j]))
+        previous = current
+    lcs = previous[-1]
+    if lcs == 0:
+        return 0.0
+    precision = lcs / len(gen_words)
+    recall = lcs / len(exp_words)
+    return 2 * precision * recall / (precision + recall)
+
+
+def evaluate_bleu(generated: str, expected: str, max_n: int = 4) -> float:
+    gen_words = generated.lower().split()
+    exp_words = expected.lower().split()
+    if not gen_words or not exp_words:
+        return 0.0
+    log_precision = 0.0
+    for n in range(1, max_n + 1):
+        gen_ngrams = Counter(tuple(gen_words[i:i + n]) for i in range(len(gen_words) - n + 1))
+        exp_ngrams = Counter(tuple(exp_words[i:i + n]) for i in range(len(exp_words) - n + 1))
+        matches = sum(min(count, exp_ngrams[ngram]) for ngram, count in gen_ngrams.items())
+        total = max(len(gen_words) - n + 1, 0)
+        if n == 1:
+            if matches == 0:
+                return 0.0
+            log_precision += math.log(matches / total)
+        else:
+            # add-one smoothing keeps short answers from scoring zero
+            log_precision += math.log((matches + 1) / (total + 1))
+    brevity = 1.0 if len(gen_words) > len(exp_words) else math.exp(1 - len(exp_words) / len(gen_words))
+    return brevity * math.exp(log_precision / max_n)
+
+
+def length_buckets(test_data: List[Dict], batch_size: int, tokenizer=None) -> List[List[Dict]]:
+    instructions = [item["instruction"] for item in test_data]
+    if tokenizer is not None:
+        lengths = [len(ids) for ids in tokenizer(instructions, add_special_tokens=False)["input_ids"]]
+    else:
+        lengths = [len(text.split()) for text in instructions]
+    order = sorted(range(len(test_data)), key=lambda i: lengths[i])
+    return [
+        [test_data[i] for i in order[start:start + batch_size]]
+        for start in range(0, len(order), batch_size)
+    ]
+
+
+def new_results(total: int) -> Dict:
+    return {
+        "total": total,
         "coherent": 0,
         "length_score": 0.0,
         "keyword_score": 0.0,
         "by_intent": {},
     }
+
+
+def sample_scores(item: Dict, generated: str) -> Dict:
+    return {
+        "intent": item["intent"],
+        "coherence": evaluate_coherence(generated),
+        "length": evaluate_response_length(generated, item["response"]),
+        "keyword": evaluate_keyword_overlap(generated, item["response"]),
+    }
+
+
+def accumulate_scores(results: Dict, scores: Dict):
+    results["coherent"] += scores["coherence"]
+    results["length_score"] += scores["length"]
+    results["keyword_score"] += scores["keyword"]
     
-    for item in test_data:
-        generated = bot.chat(item["instruction"])
-        
-        coherence = evaluate_coherence(generated)
-        length = evaluate_response_length(generated, item["response"])
-        keyword = evaluate_keyword_overlap(generated, item["response"])
-        
-        results["coherent"] += coherence
-        results["length_score"] += length
-        results["keyword_score"] += keyword
-        
-        intent = item["intent"]
-        if intent not in results["by_intent"]:
-            results["by_intent"][intent] = {"count": 0, "coherent": 0}
-        results["by_intent"][intent]["count"] += 1
-        results["by_intent"][intent]["coherent"] += coherence
-    
+    intent = scores["intent"]
+    if intent not in results["by_intent"]:
+        results["by_intent"][intent] = {"count": 0, "coherent": 0}
+    results["by_intent"][intent]["count"] += 1
+    results["by_intent"][intent]["coherent"] += scores["coherence"]
+
+
+def score_sample(results: Dict, item: Dict, generated: str):
+    accumulate_scores(results, sample_scores(item, generated))
+
+
+def finalize_results(results: Dict) -> Dict:
     n = results["total"]
     results["coherence_rate"] = results["coherent"] / n
     results["avg_length_score"] = results["length_score"] / n
     results["avg_keyword_score"] = results["keyword_score"] / n
-    
     return results
+
+
+def run_evaluation(
+    bot,
+    test_data: List[Dict],
+    batch_size: int = 1,
+    progress: Optional[Callable[[int, int, float], None]] = None,
+) -> Dict:
+    results = new_results(len(test_data))
+    start = time.time()
+    done = 0
+    
+    if batch_size > 1:
+        for bucket in length_buckets(test_data, batch_size, getattr(bot, "tokenizer", None)):
+            generated = bot.chat_batch([item["instruction"] for item in bucket])
+            for item, text in zip(bucket, generated):
+                score_sample(results, item, text)
+            done += len(bucket)
+            if progress:
+                progress(done, len(test_data), time.time() - start)
+    else:
+        for item in test_data:
+            score_sample(results, item, bot.chat(item["instruction"]))
+            done += 1
+            if progress:
+                progress(done, len(test_data), time.time() - start)
+    
+    return finalize_results(results)
@@ -0,0 +1,100 @@
+from typing import Dict, List
+from src.evaluation.tracking import MetricsTracker
+
+PREFIX = "chatbot"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Writer:
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def header(self, name: str, kind: str, help_text: str):
+        self.lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        self.lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+    def sample(self, name: str, labels: Dict[str, str], value: float):
+        self.lines.append(f"{PREFIX}_{name}{_labels(labels)} {_format(value)}")
+
+    def metric(self, name: str, kind: str, help_text: str, labels: Dict[str, str], value: float):
+        self.header(name, kind, help_text)
+        self.sample(name, labels, value)
+
+    def histogram(self, name: str, help_text: str, labels: Dict[str, str], state: dict):
+        # Tracker histograms are in milliseconds; Prometheus convention is seconds.
+        self.header(name, "histogram", help_text)
+        cumulative = 0
+        for bound, count in zip(state["bounds"], state["counts"]):
+            cumulative += count
+            self.sample(f"{name}_bucket", {**labels, "le": _format(bound / 1000)}, cumulative)
+        self.sample(f"{name}_bucket", {**labels, "le": "+Inf"}, state["count"])
+        self.sample(f"{name}_sum", labels, state["sum"] / 1000)
+        self.sample(f"{name}_count", labels, state["count"])
+
+
+def render_prometheus(tracker: MetricsTracker) -> str:
+    snapshot = tracker.snapshot()
+    model = snapshot["model"]
+    labels = {"model": model["model_name"], "adapter": model["adapter_path"]}
+    out = _Writer()
+    
+    out.histogram("request_latency_seconds", "End-to-end inference latency.", labels, snapshot["latency"])
+    out.histogram("time_to_first_token_seconds", "Time to first streamed token.", labels, snapshot["ttft"])
+    out.metric("requests_total", "counter", "Completed inference requests.", labels, model["total_inferences"])
+    out.metric("errors_total", "counter", "Failed inference requests.", labels, model["errors"])
+    out.metric("prompt_tokens_total", "counter", "Prompt tokens processed.", labels, snapshot["prompt_tokens"])
+    out.metric("generated_tokens_total", "counter", "Tokens generated.", labels, snapshot["generated_tokens"])
+    generation_s = snapshot["generation_time_ms"] / 1000
+    out.metric(
+        "tokens_per_second", "gauge", "Generated tokens per second of generation time (cache hits excluded).",
+        labels, snapshot["generated_tokens"] / generation_s if generation_s else 0.0,
+    )
+    out.metric("stop_sequence_stops_total", "counter", "Generations ended early by a stop sequence.", labels, model["stop_sequence_stops"])
+    out.metric("stop_sequence_tokens_saved_total", "counter", "Decode steps skipped by stopping at a stop sequence.", labels, snapshot["tokens_saved"])
+    out.metric("speculative_acceptance_ratio", "gauge", "Drafted tokens accepted by speculative decoding.", labels, model["speculative_acceptance_rate"])
+    out.metric("speculative_tokens_per_pass", "gauge", "Tokens produced per verification forward pass.", labels, model["speculative_tokens_per_pass"])
+    out.metric("queue_depth", "gauge", "Requests waiting for an inference slot.", labels, model["queue_depth"])
+    out.metric("coalesced_requests_total", "counter", "Requests served by an identical in-flight generation.", labels, model["coalesced_requests"])
+    
+    out.header("shed_requests_total", "counter", "Requests rejected by admission control.")
+    for reason, count in sorted(snapshot["shed_reasons"].items()):
+        out.sample("shed_requests_total", {**labels, "reason": reason}, count)
+    
+    out.header("cache_requests_total", "counter", "Cache lookups by result.")
+    for cache, stats in sorted(snapshot["caches"].items()):
+        for result in ("hits", "misses"):
+            out.sample("cache_requests_total", {**labels, "cache": cache, "result": result}, stats[result])
+    out.header("cache_evictions_total", "counter", "Cache entries evicted.")
+    for cache, stats in sorted(snapshot["caches"].items()):
+        out.sample("cache_evictions_total", {**labels, "cache": cache}, stats["evictions"])
+    out.header("cache_hit_ratio", "gauge", "Cache hits over lookups.")
+    for cache, stats in sorted(snapshot["caches"].items()):
+        lookups = stats["hits"] + stats["misses"]
+        out.sample("cache_hit_ratio", {**labels, "cache": cache}, stats["hits"] / lookups if lookups else 0.0)
+    
+    out.header("phase_seconds", "summary", "Time spent per generation phase.")
+    for phase, state in sorted(snapshot["phases"].items()):
+        out.sample("phase_seconds_sum", {**labels, "phase": phase}, state["sum_ms"] / 1000)
+        out.sample("phase_seconds_count", {**labels, "phase": phase}, state["count"])
+    
+    out.metric("model_load_seconds", "gauge", "Model load time.", labels, model["load_time_s"])
+    out.header("model_load_phase_seconds", "gauge", "Model load time by phase.")
+    for phase, seconds in sorted(model["load_breakdown"].items()):
+        out.sample("model_load_phase_seconds", {**labels, "phase": phase}, seconds)
+    
+    return "\n".join(out.lines) + "\n"
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from src.config.settings import CONFIG
+from src.config.logging_config import logger
+from src.evaluation.generation_cache import CachedGenerator, with_generation_cache
+from src.model.fingerprint import model_fingerprint
+from src.evaluation.metrics import (
+    accumulate_scores,
+    finalize_results,
+    length_buckets,
+    new_results,
+    sample_scores,
+)
+
+MANIFEST = "manifest.json"
+
+_worker_bot = None
+
+
+def fingerprint(test_data: List[Dict], shard_size: int) -> str:
+    digest = hashlib.sha256(str(shard_size).encode())
+    for item in test_data:
+        digest.update(json.dumps(item, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def shard_path(output_dir: Path, index: int) -> Path:
+    return Path(output_dir) / f"shard_{index:05d}.json"
+
+
+def _write_json(path: Path, data):
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _init_worker(adapter_path: Optional[str], config: Dict):
+    global _worker_bot
+    from src.model.inference import load_model
+    
+    # Spawned workers re-import the default CONFIG; carry over the parent's settings.
+    for key, value in config.items():
+        setattr(CONFIG, key, value)
+    _worker_bot = with_generation_cache(load_model(adapter_path))
+
+
+def _generate(bot, items: List[Dict], batch_size: int) -> List[str]:
+    if batch_size <= 1:
+        return [bot.chat(item["instruction"]) for item in items]
+    
+    position = {id(item): i for i, item in enumerate(items)}
+    generated = [None] * len(items)
+    for bucket in length_buckets(items, batch_size, getattr(bot, "tokenizer", None)):
+        for item, text in zip(bucket, bot.chat_batch([item["instruction"] for item in bucket])):
+            generated[position[id(item)]] = text
+    return generated
+
+
+def evaluate_shard(bot, index: int, items: List[Dict], output_dir: Path, batch_size: int = 1) -> int:
+    start = time.time()
+    generated = _generate(bot, items, batch_size)
+    # Per-sample scores (not partial sums) so merging replays the exact same additions.
+    _write_json(shard_path(output_dir, index), {
+        "shard": index,
+        "elapsed_s": time.time() - start,
+        "scores": [sample_scores(item, text) for item, text in zip(items, generated)],
+    })
+    return index
+
+
+def _cache_counts(bot) -> Tuple[int, int]:
+    if isinstance(bot, CachedGenerator):
+        return bot.cache.hits, bot.cache.misses
+    return 0, 0
+
+
+def _run_shard(bot, index: int, items: List[Dict], output_dir: Path, batch_size: int) -> Tuple[int, int, int]:
+    hits, misses = _cache_counts(bot)
+    evaluate_shard(bot, index, items, output_dir, batch_size)
+    after_hits, after_misses = _cache_counts(bot)
+    return index, after_hits - hits, after_misses - misses
+
+
+def _run_shard_in_worker(index: int, items: List[Dict], output_dir: str, batch_size: int) -> Tuple[int, int, int]:
+    return _run_shard(_worker_bot, index, items, Path(output_dir), batch_size)
+
+
+def merge_results(output_dir: Path) -> Dict:
+    manifest = json.loads((Path(output_dir) / MANIFEST).read_text())
+    results = new_results(manifest["total"])
+    for index in range(manifest["shards"]):
+        shard = json.loads(shard_path(output_dir, index).read_text())
+        for scores in shard["scores"]:
+            accumulate_scores(results, scores)
+    return finalize_results(results)
+
+
+class EvaluationRunner:
+    """Runs an evaluation in fixed-size shards, checkpointing each one to disk.
+    
+    A manifest pins the test set and shard size; shards already on disk are
+    skipped on restart, and a changed test set refuses to mix with old shards.
+    """
+    
+    def __init__(
+        self,
+        output_dir: Path = None,
+        shard_size: int = None,
+        workers: int = 1,
+        batch_size: int = 1,
+        adapter_path: str = None,
+    ):
+        self.output_dir = Path(output_dir or CONFIG.eval_output_dir)
+        self.shard_size = shard_size or CONFIG.eval_shard_size
+        self.workers = workers
+        self.batch_size = batch_size
+        self.adapter_path = adapter_path
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    def shards(self, test_data: List[Dict]) -> List[List[Dict]]:
+        return [test_data[i:i + self.shard_size] for i in range(0, len(test_data), self.shard_size)]
+    
+    def _prepare(self, test_data: List[Dict], n_shards: int, adapter_path: str):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.output_dir / MANIFEST
+        manifest = {
+            "total": len(test_data),
+            "shard_size": self.shard_size,
+            "shards": n_shards,
+            "fingerprint": fingerprint(test_data, self.shard_size),
+            "model": model_fingerprint(adapter_path),
+        }
+        if manifest_path.exists():
+            existing = json.loads(manifest_path.read_text())
+            if any(existing.get(key) != manifest[key] for key in ("total", "shard_size", "shards", "fingerprint")):
+                raise ValueError(
+                    f"{self.output_dir} holds shards from a different test set or shard size; "
+                    "use another output directory or delete it"
+                )
+            if existing.get("model") != manifest["model"]:
+                logger.warning(f"Adapter or generation config changed since {self.output_dir} was written; starting over")
+                for i in range(n_shards):
+                    shard_path(self.output_dir, i).unlink(missing_ok=True)
+                _write_json(manifest_path, manifest)
+        else:
+            _write_json(manifest_path, manifest)
+    
+    def pending(self, n_shards: int) -> List[int]:
+        return [i for i in range(n_shards) if not shard_path(self.output_dir, i).exists()]
+    
+    def run(
+        self,
+        test_data: List[Dict],
+        bot=None,
+        progress: Optional[Callable[[int, int, float], None]] = None,
+    ) -> Dict:
+        shards = self.shards(test_data)
+        adapter_path = getattr(bot, "adapter_path", None) or self.adapter_path or str(CONFIG.adapter_path)
+        self._prepare(test_data, len(shards), adapter_path)
+        pending = self.pending(len(shards))
+        if len(pending) < len(shards):
+            logger.info(f"Resuming evaluation: {len(shards) - len(pending)}/{len(shards)} shards already done")
+        
+        start = time.time()
+        done = len(test_data) - sum(len(shards[i]) for i in pending)
+        
+        def report(outcome):
+            nonlocal done
+            index, hits, misses = outcome
+            self.cache_hits += hits
+            self.cache_misses += misses
+            done += len(shards[index])
+            if progress:
+                progress(done, len(test_data), time.time() - start)
+        
+        if pending and self.workers <= 1:
+            if bot is None:
+                from src.model.inference import load_model
+                bot = with_generation_cache(load_model(self.adapter_path))
+            for index in pending:
+                report(_run_shard(bot, index, shards[index], self.output_dir, self.batch_size))
+        elif pending:
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(pending)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.adapter_path, dict(vars(CONFIG))),
+            ) as pool:
+                futures = [
+                    pool.submit(_run_shard_in_worker, i, shards[i], str(self.output_dir), self.batch_size)
+                    for i in pending
+                ]
+                for future in as_completed(futures):
+                    report(future.result())
+        
+        return merge_results(self.output_dir)
+    
+    def cache_stats(self) -> Dict:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": self.cache_hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,120 @@
+import json
+import threading
+from collections import deque
+from dataclasses import asdict, is_dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Optional
+
+
+class MetricsSink:
+    """Write-behind JSONL sink for per-inference records.
+
+    `submit` only appends to a bounded in-memory buffer (dropping the oldest
+    record when full); a background thread serializes and appends batches to
+    `<prefix>_YYYYMMDD.jsonl`, rolling over to `<prefix>_YYYYMMDD.<n>.jsonl`
+    once a file reaches `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        prefix: str = "inferences",
+        max_bytes: int = 50 * 1024 * 1024,
+        buffer_size: int = 10000,
+        batch_size: int = 256,
+        flush_interval_s: float = 1.0,
+    ):
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.written = 0
+        self.dropped = 0
+        self._buffer: Deque = deque(maxlen=buffer_size)
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+        self._file = None
+        self._file_day = None
+        self._file_path: Optional[Path] = None
+
+    def start(self) -> "MetricsSink":
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="metrics-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._flush()
+        self._close()
+
+    def submit(self, record):
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def _run(self):
+        while self._running:
+            self._wakeup.wait(self.flush_interval_s)
+            self._wakeup.clear()
+            self._flush()
+
+    def _drain(self) -> list:
+        batch = []
+        while True:
+            try:
+                batch.append(self._buffer.popleft())
+            except IndexError:
+                return batch
+
+    def _flush(self):
+        batch = self._drain()
+        if not batch:
+            return
+        lines = "".join(
+            json.dumps(asdict(r) if is_dataclass(r) else r, separators=(",", ":")) + "\n" for r in batch
+        )
+        f = self._current_file()
+        f.write(lines)
+        f.flush()
+        self.written += len(batch)
+
+    def _current_file(self):
+        today = datetime.now().strftime("%Y%m%d")
+        if self._file is not None and self._file_day == today and self._file.tell() < self.max_bytes:
+            return self._file
+        self._close()
+        if self._file_day == today:
+            self._rotate(today)
+        self._file_day = today
+        self._file_path = self.directory / f"{self.prefix}_{today}.jsonl"
+        self._file = open(self._file_path, "a", encoding="utf-8")
+        if self._file.tell() >= self.max_bytes:
+            self._file.close()
+            self._rotate(today)
+            self._file = open(self._file_path, "a", encoding="utf-8")
+        return self._file
+
+    def _rotate(self, day: str):
+        current = self.directory / f"{self.prefix}_{day}.jsonl"
+        if not current.exists():
+            return
+        n = 1
+        while (self.directory / f"{self.prefix}_{day}.{n}.jsonl").exists():
+            n += 1
+        current.rename(self.directory / f"{self.prefix}_{day}.{n}.jsonl")
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
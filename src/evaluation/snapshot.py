@@ -0,0 +1,91 @@
+import json
+import random
+import shutil
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from src.config.settings import CONFIG
+from src.config.logging_config import logger
+
+INTENT_INDEX = "intent_index.json"
+COLUMNS = ["instruction", "response", "intent"]
+
+if TYPE_CHECKING:
+    from datasets import Dataset
+
+
+def create_snapshot(path: Optional[Path] = None) -> Path:
+    """Download the dataset once and store it as Arrow files plus a per-intent row index."""
+    from datasets import load_dataset
+    
+    path = Path(path or CONFIG.dataset_snapshot_path)
+    dataset = load_dataset(CONFIG.dataset_name)["train"].select_columns(COLUMNS)
+    
+    index: Dict[str, List[int]] = {}
+    for row, intent in enumerate(dataset["intent"]):
+        index.setdefault(intent, []).append(row)
+    
+    tmp_path = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    dataset.save_to_disk(str(tmp_path))
+    with open(tmp_path / INTENT_INDEX, "w") as f:
+        json.dump({"dataset": CONFIG.dataset_name, "rows": len(dataset), "intents": index}, f)
+    shutil.rmtree(path, ignore_errors=True)
+    tmp_path.rename(path)
+    
+    logger.info(f"Dataset snapshot saved to {path} ({len(dataset)} rows, {len(index)} intents)")
+    return path
+
+
+def snapshot_exists(path: Optional[Path] = None) -> bool:
+    return (Path(path or CONFIG.dataset_snapshot_path) / INTENT_INDEX).exists()
+
+
+def load_snapshot(path: Optional[Path] = None) -> Tuple["Dataset", Dict[str, List[int]]]:
+    from datasets import load_from_disk
+    
+    path = Path(path or CONFIG.dataset_snapshot_path)
+    # load_from_disk memory-maps the Arrow files, so only selected rows are read.
+    dataset = load_from_disk(str(path))
+    with open(path / INTENT_INDEX) as f:
+        index = json.load(f)["intents"]
+    return dataset, index
+
+
+def stratified_indices(index: Dict[str, List[int]], n_samples: int, seed: int = 0) -> List[int]:
+    """Sample rows so every intent keeps its share of the dataset (largest-remainder rounding)."""
+    total = sum(len(rows) for rows in index.values())
+    n_samples = min(n_samples, total)
+    quotas = {intent: n_samples * len(rows) / total for intent, rows in index.items()}
+    counts = {intent: int(quota) for intent, quota in quotas.items()}
+    remaining = n_samples - sum(counts.values())
+    by_remainder = sorted(quotas, key=lambda intent: (counts[intent] - quotas[intent], intent))
+    for intent in by_remainder[:remaining]:
+        counts[intent] += 1
+    
+    rng = random.Random(seed)
+    selected = []
+    for intent in sorted(index):
+        selected.extend(rng.sample(index[intent], counts[intent]))
+    return sorted(selected)
+
+
+def sample_snapshot(n_samples: int, seed: int = 0, path: Optional[Path] = None) -> List[Dict]:
+    dataset, index = load_snapshot(path)
+    rows = dataset.select(stratified_indices(index, n_samples, seed))
+    return [{column: row[column] for column in COLUMNS} for row in rows]
+
+
+def validate_snapshot(path: Optional[Path] = None, min_per_intent: int = 10) -> Dict:
+    dataset, index = load_snapshot(path)
+    missing = [column for column in COLUMNS if column not in dataset.column_names]
+    if missing:
+        raise ValueError(f"Snapshot is missing columns: {missing}")
+    
+    empty = sum(
+        1 for instruction, response in zip(dataset["instruction"], dataset["response"])
+        if not instruction.strip() or not response.strip()
+    )
+    sparse = {intent: len(rows) for intent, rows in index.items() if len(rows) < min_per_intent}
+    if empty or sparse:
+        raise ValueError(f"Snapshot failed validation: {empty} empty rows, sparse intents {sparse}")
+    return {"rows": len(dataset), "intents": len(index)}
@@ -1,9 +1,13 @@
+import bisect
 import json
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
-from dataclasses import dataclass, asdict
-from typing import Optional, List
+from dataclasses import dataclass, asdict, field
+from collections import defaultdict, deque
+from itertools import islice
+from typing import Deque, Dict, Optional, List
 
 METRICS_DIR = Path("metrics")
 METRICS_DIR.mkdir(exist_ok=True)
@@ -16,6 +20,9 @@ class InferenceMetrics:
     response_length: int
     latency_ms: float
     tokens_generated: int
+    prompt_tokens: int = 0
+    tokens_per_s: float = 0.0
+    cached: bool = False
 
 
 @dataclass
@@ -23,55 +30,286 @@ class ModelMetrics:
     model_name: str
     adapter_path: str
     load_time_s: float
+    load_breakdown: Dict[str, float] = field(default_factory=dict)
     total_inferences: int = 0
     avg_latency_ms: float = 0.0
     errors: int = 0
+    cached_responses: int = 0
+    coalesced_requests: int = 0
+    queue_depth: int = 0
+    queued_requests: int = 0
+    avg_queue_wait_ms: float = 0.0
+    shed_requests: int = 0
+    streamed_inferences: int = 0
+    avg_ttft_ms: float = 0.0
+    avg_inter_token_ms: float = 0.0
+    stop_sequence_stops: int = 0
+    avg_tokens_saved: float = 0.0
+    avg_token_budget: float = 0.0
+    budget_exhausted: int = 0
+    speculative_passes: int = 0
+    speculative_acceptance_rate: float = 0.0
+    speculative_tokens_per_pass: float = 0.0
+
+
+def _default_bounds() -> List[float]:
+    # Roughly 1.25x steps from 1ms to ~2min: percentiles are within ~12% of the true value.
+    bounds, bound = [], 1.0
+    while bound < 120_000:
+        bounds.append(round(bound, 3))
+        bound *= 1.25
+    return bounds
+
+
+class LatencyHistogram:
+    """Fixed-bucket streaming histogram (milliseconds) with O(1) memory and updates."""
+
+    def __init__(self, bounds: List[float] = None):
+        self.bounds = bounds or _default_bounds()
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms: float):
+        self.counts[bisect.bisect_left(self.bounds, value_ms)] += 1
+        self.count += 1
+        self.sum += value_ms
+        self.max = max(self.max, value_ms)
+
+    def percentile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "avg": self.sum / max(1, self.count),
+            "p50": self.percentile(0.50),
+            "p90": self.percentile(0.90),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
 
 
 class MetricsTracker:
-    def __init__(self, model_name: str = "customer-support-chatbot"):
+    def __init__(self, model_name: str = "customer-support-chatbot", history_size: int = 1000):
         self.model_name = model_name
-        self.inference_history: List[InferenceMetrics] = []
+        self.inference_history: Deque[InferenceMetrics] = deque(maxlen=history_size)
         self.model_metrics = ModelMetrics(
             model_name=model_name,
             adapter_path="",
             load_time_s=0.0
         )
+        self.latency_histogram = LatencyHistogram()
+        self.ttft_histogram = LatencyHistogram()
+        self.response_length_total = 0
+        self.tokens_total = 0
+        self.prompt_tokens_total = 0
+        self.generation_time_ms = 0.0
+        self._inter_token_samples = 0
+        self.tokens_saved_total = 0
+        self._stop_samples = 0
+        self._budget_samples = 0
+        self.speculative_totals: Dict[str, int] = defaultdict(int)
+        self.phase_totals_ms: Dict[str, float] = defaultdict(float)
+        self.phase_counts: Dict[str, int] = defaultdict(int)
+        self.shed_reasons: Dict[str, int] = defaultdict(int)
+        self.cache_stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "evictions": 0}
+        )
+        self.cache_lookup_ms: Dict[str, float] = defaultdict(float)
+        self._lock = threading.Lock()
+        self.sink = None
         self.metrics_file = METRICS_DIR / f"metrics_{datetime.now().strftime('%Y%m%d')}.json"
     
-    def log_model_load(self, adapter_path: str, load_time: float):
-        self.model_metrics.adapter_path = adapter_path
-        self.model_metrics.load_time_s = load_time
+    def log_model_load(self, adapter_path: str, load_time: float, breakdown: Optional[Dict[str, float]] = None):
+        with self._lock:
+            self.model_metrics.adapter_path = adapter_path
+            self.model_metrics.load_time_s = load_time
+            self.model_metrics.load_breakdown = dict(breakdown or {})
     
-    def log_inference(self, question: str, response: str, latency: float, tokens: int = 0):
+    def log_inference(
+        self, question: str, response: str, latency: float, tokens: int = 0, prompt_tokens: int = 0, cached: bool = False
+    ):
+        """`cached` answers generated nothing, so they count towards latency but not towards tokens/s."""
         metric = InferenceMetrics(
             timestamp=datetime.now().isoformat(),
             question=question[:100],
             response_length=len(response),
             latency_ms=latency * 1000,
-            tokens_generated=tokens or len(response.split())
+            tokens_generated=tokens,
+            prompt_tokens=prompt_tokens,
+            tokens_per_s=tokens / latency if latency > 0 and not cached else 0.0,
+            cached=cached,
         )
-        self.inference_history.append(metric)
-        self.model_metrics.total_inferences += 1
-        
-        # Update average latency
-        total_latency = sum(m.latency_ms for m in self.inference_history)
-        self.model_metrics.avg_latency_ms = total_latency / len(self.inference_history)
+        with self._lock:
+            self.inference_history.append(metric)
+            self.latency_histogram.observe(metric.latency_ms)
+            self.response_length_total += metric.response_length
+            self.tokens_total += metric.tokens_generated
+            self.prompt_tokens_total += prompt_tokens
+            if cached:
+                self.model_metrics.cached_responses += 1
+            else:
+                self.generation_time_ms += metric.latency_ms
+            self.model_metrics.total_inferences += 1
+            self.model_metrics.avg_latency_ms = self.latency_histogram.sum / self.latency_histogram.count
+        if self.sink is not None:
+            self.sink.submit(metric)
+    
+    def attach_sink(self, sink):
+        self.sink = sink
+    
+    def log_phases(self, phases: Dict[str, float]):
+        with self._lock:
+            for phase, seconds in phases.items():
+                self.phase_totals_ms[phase] += seconds * 1000
+                self.phase_counts[phase] += 1
+    
+    def log_stream(self, ttft: Optional[float], inter_token_latency: Optional[float]):
+        if ttft is None:
+            return
+        with self._lock:
+            self.ttft_histogram.observe(ttft * 1000)
+            self.model_metrics.streamed_inferences += 1
+            n = self.model_metrics.streamed_inferences
+            self.model_metrics.avg_ttft_ms += (ttft * 1000 - self.model_metrics.avg_ttft_ms) / n
+            if inter_token_latency is not None:
+                self._inter_token_samples += 1
+                self.model_metrics.avg_inter_token_ms += (
+                    inter_token_latency * 1000 - self.model_metrics.avg_inter_token_ms
+                ) / self._inter_token_samples
+    
+    def log_stop_savings(self, saved: List[int]):
+        """Per generated row, decode steps skipped because it ended on a stop sequence."""
+        with self._lock:
+            self._stop_samples += len(saved)
+            self.tokens_saved_total += sum(saved)
+            self.model_metrics.stop_sequence_stops += sum(1 for tokens in saved if tokens)
+            if self._stop_samples:
+                self.model_metrics.avg_tokens_saved = self.tokens_saved_total / self._stop_samples
+    
+    def log_token_budgets(self, budgets: List[int], generated_tokens: List[int]):
+        with self._lock:
+            for budget, generated in zip(budgets, generated_tokens):
+                self._budget_samples += 1
+                self.model_metrics.avg_token_budget += (budget - self.model_metrics.avg_token_budget) / self._budget_samples
+                if generated >= budget:
+                    self.model_metrics.budget_exhausted += 1
+    
+    def log_speculative(self, passes: int, drafted: int, accepted: int, generated: int):
+        with self._lock:
+            totals = self.speculative_totals
+            for key, value in (("passes", passes), ("drafted", drafted), ("accepted", accepted), ("generated", generated)):
+                totals[key] += value
+            self.model_metrics.speculative_passes = totals["passes"]
+            self.model_metrics.speculative_acceptance_rate = totals["accepted"] / max(1, totals["drafted"])
+            self.model_metrics.speculative_tokens_per_pass = totals["generated"] / max(1, totals["passes"])
+    
+    def log_coalesced(self):
+        with self._lock:
+            self.model_metrics.coalesced_requests += 1
+    
+    def log_queue(self, depth: int, wait: Optional[float] = None):
+        with self._lock:
+            self.model_metrics.queue_depth = depth
+            if wait is not None:
+                self.model_metrics.queued_requests += 1
+                n = self.model_metrics.queued_requests
+                self.model_metrics.avg_queue_wait_ms += (wait * 1000 - self.model_metrics.avg_queue_wait_ms) / n
+    
+    def log_shed(self, reason: str):
+        with self._lock:
+            self.model_metrics.shed_requests += 1
+            self.shed_reasons[reason] += 1
+    
+    def log_cache_event(self, cache: str, event: str, count: int = 1):
+        with self._lock:
+            self.cache_stats[cache][event] += count
+    
+    def log_cache_lookup(self, cache: str, latency: float):
+        with self._lock:
+            self.cache_lookup_ms[cache] += latency * 1000
+    
+    def cache_summary(self) -> dict:
+        with self._lock:
+            summary = {}
+            for name, stats in self.cache_stats.items():
+                lookups = stats["hits"] + stats["misses"]
+                summary[name] = {**stats, "hit_rate": stats["hits"] / max(1, lookups)}
+                if name in self.cache_lookup_ms:
+                    summary[name]["avg_lookup_ms"] = self.cache_lookup_ms[name] / max(1, lookups)
+            return summary
     
     def log_error(self):
-        self.model_metrics.errors += 1
+        with self._lock:
+            self.model_metrics.errors += 1
+    
+    def latency_percentiles(self) -> dict:
+        with self._lock:
+            return self.latency_histogram.summary()
+    
+    def snapshot(self) -> dict:
+        """Consistent copy of the aggregates, for exporters that must not hold the lock."""
+        with self._lock:
+            return {
+                "model": asdict(self.model_metrics),
+                "latency": self._histogram_state(self.latency_histogram),
+                "ttft": self._histogram_state(self.ttft_histogram),
+                "prompt_tokens": self.prompt_tokens_total,
+                "generated_tokens": self.tokens_total,
+                "generation_time_ms": self.generation_time_ms,
+                "tokens_saved": self.tokens_saved_total,
+                "shed_reasons": dict(self.shed_reasons),
+                "phases": {
+                    phase: {"sum_ms": total, "count": self.phase_counts[phase]}
+                    for phase, total in self.phase_totals_ms.items()
+                },
+                "caches": {name: dict(stats) for name, stats in self.cache_stats.items()},
+            }
+    
+    @staticmethod
+    def _histogram_state(histogram: LatencyHistogram) -> dict:
+        return {"bounds": histogram.bounds, "counts": list(histogram.counts), "count": histogram.count, "sum": histogram.sum}
     
     def get_summary(self) -> dict:
-        return {
-            "model": asdict(self.model_metrics),
-            "recent_inferences": [asdict(m) for m in self.inference_history[-10:]],
-            "stats": {
-                "total_requests": self.model_metrics.total_inferences,
-                "error_rate": self.model_metrics.errors / max(1, self.model_metrics.total_inferences),
-                "avg_latency_ms": self.model_metrics.avg_latency_ms,
-                "avg_response_length": sum(m.response_length for m in self.inference_history) / max(1, len(self.inference_history))
+        caches = self.cache_summary()
+        with self._lock:
+            total = self.model_metrics.total_inferences
+            return {
+                "model": asdict(self.model_metrics),
+                "recent_inferences": [asdict(m) for m in reversed(list(islice(reversed(self.inference_history), 10)))],
+                "caches": caches,
+                "shed_reasons": dict(self.shed_reasons),
+                "sink": {"written": self.sink.written, "dropped": self.sink.dropped} if self.sink else None,
+                "stats": {
+                    "total_requests": total,
+                    "error_rate": self.model_metrics.errors / max(1, total),
+                    "avg_latency_ms": self.model_metrics.avg_latency_ms,
+                    "latency_ms": self.latency_histogram.summary(),
+                    "avg_ttft_ms": self.model_metrics.avg_ttft_ms,
+                    "ttft_ms": self.ttft_histogram.summary(),
+                    "avg_inter_token_ms": self.model_metrics.avg_inter_token_ms,
+                    "avg_response_length": self.response_length_total / max(1, total),
+                    "prompt_tokens": self.prompt_tokens_total,
+                    "generated_tokens": self.tokens_total,
+                    "tokens_saved": self.tokens_saved_total,
+                    "tokens_per_s": self.tokens_total / (self.generation_time_ms / 1000) if self.generation_time_ms else 0.0,
+                    "avg_phase_ms": {
+                        phase: total / self.phase_counts[phase] for phase, total in self.phase_totals_ms.items()
+                    },
+                }
             }
-        }
     
     def save(self):
         with open(self.metrics_file, 'w') as f:
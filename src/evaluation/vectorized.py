@@ -0,0 +1,198 @@
+import math
+from collections import defaultdict
+from typing import Dict, Iterator, List, Tuple
+import numpy as np
+
+COHERENCE_CHUNK = 1024
+
+
+class TokenizedPairs:
+    """Generated/expected texts mapped onto one shared vocabulary of integer ids.
+    
+    Tokenization matches the scalar metrics (`text.lower().split()`); each side is
+    stored as a flat id array plus per-document offsets.
+    """
+    
+    def __init__(self, generated: List[str], expected: List[str]):
+        if len(generated) != len(expected):
+            raise ValueError(f"Got {len(generated)} generated and {len(expected)} expected texts")
+        vocab = defaultdict()
+        vocab.default_factory = vocab.__len__
+        self.gen_ids, self.gen_offsets = self._encode(generated, vocab)
+        self.exp_ids, self.exp_offsets = self._encode(expected, vocab)
+        self.vocab_size = max(len(vocab), 1)
+        self.size = len(generated)
+    
+    @staticmethod
+    def _encode(texts: List[str], vocab) -> Tuple[np.ndarray, np.ndarray]:
+        lookup = vocab.__getitem__
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        ids = []
+        for i, text in enumerate(texts):
+            ids.extend(map(lookup, text.lower().split()))
+            offsets[i + 1] = len(ids)
+        return np.array(ids, dtype=np.int64), offsets
+    
+    @property
+    def gen_lengths(self) -> np.ndarray:
+        return np.diff(self.gen_offsets)
+    
+    @property
+    def exp_lengths(self) -> np.ndarray:
+        return np.diff(self.exp_offsets)
+    
+    def ngrams(self, max_n: int) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """Yield sparse 1..max_n-gram keys per side; equal keys mean the same n-gram in the same document.
+        
+        Each n-gram key extends the (n-1)-gram key starting at the same position by one token.
+        """
+        ids = np.concatenate([self.gen_ids, self.exp_ids])
+        offsets = np.concatenate([self.gen_offsets[:-1], self.exp_offsets + len(self.gen_ids)])
+        lengths = np.diff(offsets)
+        docs = np.concatenate([np.arange(self.size), np.arange(self.size)])
+        docs = np.repeat(docs, lengths)
+        starts = np.arange(len(ids))
+        ends = np.repeat(offsets[1:], lengths)
+        side = np.arange(len(ids)) < len(self.gen_ids)
+        keys = docs.copy()
+        limit = np.iinfo(np.int64).max // self.vocab_size - self.vocab_size
+        for n in range(1, max_n + 1):
+            if n > 1:
+                keep = starts + n <= ends
+                keys, docs, starts, ends, side = keys[keep], docs[keep], starts[keep], ends[keep], side[keep]
+            # re-number keys densely before the base-vocab shift could overflow int64
+            if len(keys) and keys.max() >= limit:
+                keys = np.unique(keys, return_inverse=True)[1].reshape(-1)
+            keys = keys * self.vocab_size + ids[starts + n - 1]
+            yield keys[side], docs[side], keys[~side], docs[~side]
+
+
+def _group(keys: np.ndarray, docs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Distinct keys (sorted) with their document and multiplicity, via one argsort."""
+    order = np.argsort(keys)
+    keys, docs = keys[order], docs[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    starts = np.flatnonzero(first)
+    return keys[starts], docs[starts], np.diff(np.append(starts, len(keys)))
+
+
+def _apply(fn, values: np.ndarray) -> np.ndarray:
+    # math.log/exp rather than NumPy's SIMD versions so results match the scalar metrics bit for bit
+    return np.fromiter(map(fn, values.tolist()), dtype=np.float64, count=len(values))
+
+
+def batch_response_length(generated: List[str], expected: List[str]) -> np.ndarray:
+    gen_lengths = np.fromiter(map(len, generated), dtype=np.float64, count=len(generated))
+    exp_lengths = np.fromiter(map(len, expected), dtype=np.float64, count=len(expected))
+    ratio = np.divide(gen_lengths, exp_lengths, out=np.zeros_like(gen_lengths), where=exp_lengths > 0)
+    scores = np.select(
+        [(ratio >= 0.5) & (ratio <= 1.5), (ratio >= 0.3) & (ratio <= 2.0)],
+        [1.0, 0.5],
+        default=0.0,
+    )
+    scores[exp_lengths == 0] = 0.0
+    return scores
+
+
+def batch_keyword_overlap(generated: List[str], expected: List[str], pairs: TokenizedPairs = None) -> np.ndarray:
+    pairs = pairs or TokenizedPairs(generated, expected)
+    gen_keys, gen_docs, exp_keys, exp_docs = next(pairs.ngrams(1))
+    gen_unique, _, _ = _group(gen_keys, gen_docs)
+    exp_unique, exp_unique_docs, _ = _group(exp_keys, exp_docs)
+    shared = np.isin(exp_unique, gen_unique, assume_unique=True)
+    overlap = np.bincount(exp_unique_docs[shared], minlength=pairs.size).astype(np.float64)
+    vocabulary = np.bincount(exp_unique_docs, minlength=pairs.size).astype(np.float64)
+    scores = np.divide(overlap, vocabulary, out=np.zeros_like(overlap), where=vocabulary > 0)
+    return np.minimum(scores, 1.0)
+
+
+def batch_coherence(responses: List[str]) -> np.ndarray:
+    lengths = np.fromiter(map(len, responses), dtype=np.int64, count=len(responses))
+    scores = np.zeros(len(responses), dtype=np.float64)
+    for start in range(0, len(responses), COHERENCE_CHUNK):
+        chunk = responses[start:start + COHERENCE_CHUNK]
+        chunk_lengths = lengths[start:start + COHERENCE_CHUNK]
+        width = int(chunk_lengths.max()) if len(chunk) else 0
+        if width == 0:
+            continue
+        # UTF-32 code points, zero-padded to the longest response in the chunk
+        codes = np.array(chunk, dtype=f"<U{width}").view(np.uint32).reshape(len(chunk), width)
+        opens = (codes == ord("<")).sum(axis=1)
+        closes = (codes == ord(">")).sum(axis=1)
+        ordered = np.sort(codes, axis=1)
+        distinct = (ordered[:, 1:] != ordered[:, :-1]).sum(axis=1) + 1
+        distinct -= chunk_lengths < width  # padding zeros counted as one extra symbol
+        ok = (chunk_lengths >= 10) & (opens <= 2) & (closes <= 2) & (distinct >= 10)
+        scores[start:start + len(chunk)] = ok
+    return scores
+
+
+def _lcs_lengths(pairs: TokenizedPairs) -> np.ndarray:
+    """Bit-parallel LCS (Allison-Dix): one big-int update per generated token."""
+    lcs = np.zeros(pairs.size, dtype=np.int64)
+    gen_ids, exp_ids = pairs.gen_ids.tolist(), pairs.exp_ids.tolist()
+    gen_offsets, exp_offsets = pairs.gen_offsets.tolist(), pairs.exp_offsets.tolist()
+    for i in range(pairs.size):
+        reference = exp_ids[exp_offsets[i]:exp_offsets[i + 1]]
+        if not reference or gen_offsets[i] == gen_offsets[i + 1]:
+            continue
+        masks = {}
+        for position, token in enumerate(reference):
+            masks[token] = masks.get(token, 0) | (1 << position)
+        full = (1 << len(reference)) - 1
+        row = full
+        for token in gen_ids[gen_offsets[i]:gen_offsets[i + 1]]:
+            matched = row & masks.get(token, 0)
+            row = ((row + matched) | (row - matched)) & full
+        lcs[i] = len(reference) - bin(row).count("1")
+    return lcs
+
+
+def batch_rouge_l(generated: List[str], expected: List[str], pairs: TokenizedPairs = None) -> np.ndarray:
+    pairs = pairs or TokenizedPairs(generated, expected)
+    lcs = _lcs_lengths(pairs).astype(np.float64)
+    matched = lcs > 0
+    precision = np.divide(lcs, pairs.gen_lengths, out=np.zeros_like(lcs), where=matched)
+    recall = np.divide(lcs, pairs.exp_lengths, out=np.zeros_like(lcs), where=matched)
+    total = precision + recall
+    return np.divide(2 * precision * recall, total, out=np.zeros_like(lcs), where=matched)
+
+
+def batch_bleu(generated: List[str], expected: List[str], max_n: int = 4, pairs: TokenizedPairs = None) -> np.ndarray:
+    pairs = pairs or TokenizedPairs(generated, expected)
+    gen_lengths = pairs.gen_lengths.astype(np.float64)
+    exp_lengths = pairs.exp_lengths.astype(np.float64)
+    valid = (gen_lengths > 0) & (exp_lengths > 0)
+    log_precision = np.zeros(pairs.size, dtype=np.float64)
+    
+    for n, (gen_keys, gen_docs, exp_keys, exp_docs) in enumerate(pairs.ngrams(max_n), start=1):
+        gen_unique, gen_unique_docs, gen_counts = _group(gen_keys, gen_docs)
+        exp_unique, _, exp_counts = _group(exp_keys, exp_docs)
+        # both sides are sorted, so matching n-grams line up through searchsorted
+        at = np.minimum(np.searchsorted(exp_unique, gen_unique), max(len(exp_unique) - 1, 0))
+        shared = exp_unique[at] == gen_unique if len(exp_unique) else np.zeros(len(gen_unique), dtype=bool)
+        clipped = np.minimum(gen_counts[shared], exp_counts[at[shared]]).astype(np.float64)
+        matches = np.bincount(gen_unique_docs[shared], weights=clipped, minlength=pairs.size).astype(np.float64)
+        total = np.maximum(gen_lengths - n + 1, 0)
+        if n == 1:
+            valid &= matches > 0
+            precision = np.divide(matches, total, out=np.ones_like(matches), where=valid)
+        else:
+            precision = (matches + 1) / (total + 1)
+        log_precision += _apply(math.log, precision)
+    
+    safe_gen = np.where(valid, gen_lengths, 1.0)
+    brevity = np.where(gen_lengths > exp_lengths, 1.0, _apply(math.exp, 1 - exp_lengths / safe_gen))
+    return np.where(valid, brevity * _apply(math.exp, log_precision / max_n), 0.0)
+
+
+def score_pairs(generated: List[str], expected: List[str]) -> Dict[str, np.ndarray]:
+    pairs = TokenizedPairs(generated, expected)
+    return {
+        "coherence": batch_coherence(generated),
+        "length": batch_response_length(generated, expected),
+        "keyword": batch_keyword_overlap(generated, expected, pairs),
+        "rouge_l": batch_rouge_l(generated, expected, pairs),
+        "bleu": batch_bleu(generated, expected, pairs=pairs),
+    }
@@ -0,0 +1,99 @@
+import multiprocessing
+import resource
+import time
+from typing import Dict, List
+import torch
+from src.config.settings import CONFIG
+from src.config.logging_config import logger
+
+
+def model_dtype() -> torch.dtype:
+    if CONFIG.backend != "cpu":
+        return torch.float16
+    if CONFIG.cpu_quantize_int8:
+        # Dynamic int8 kernels take float32 weights.
+        return torch.float32
+    return getattr(torch, CONFIG.cpu_dtype)
+
+
+def configure_threads():
+    if CONFIG.backend == "cpu" and CONFIG.cpu_threads:
+        torch.set_num_threads(CONFIG.cpu_threads)
+
+
+def model_load_kwargs() -> dict:
+    if CONFIG.backend == "cpu":
+        return {"torch_dtype": model_dtype(), "device_map": {"": "cpu"}}
+    return {"torch_dtype": model_dtype(), "device_map": "auto"}
+
+
+def optimize_for_backend(model):
+    if CONFIG.backend != "cpu" or not CONFIG.cpu_quantize_int8:
+        return model
+    if hasattr(model, "merge_and_unload"):
+        model = model.merge_and_unload()
+    logger.info("Applying dynamic int8 quantization to linear layers")
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak RSS; kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+BENCHMARK_VARIANTS: Dict[str, dict] = {
+    "default": {"backend": "auto"},
+    "cpu-float32": {"backend": "cpu", "cpu_dtype": "float32", "cpu_quantize_int8": False},
+    "cpu-bfloat16": {"backend": "cpu", "cpu_dtype": "bfloat16", "cpu_quantize_int8": False},
+    "cpu-int8": {"backend": "cpu", "cpu_quantize_int8": True},
+}
+
+
+def _benchmark_variant(overrides: dict, questions: List[str]) -> dict:
+    from src.model.inference import load_model
+    
+    for key, value in overrides.items():
+        setattr(CONFIG, key, value)
+    CONFIG.do_sample = False
+    CONFIG.response_cache_size = 0
+    
+    start = time.time()
+    bot = load_model()
+    load_time = time.time() - start
+    bot.chat(questions[0])  # warm-up
+    
+    latencies, tokens = [], 0
+    for question in questions:
+        step = time.time()
+        response = bot.chat(question)
+        latencies.append(time.time() - step)
+        tokens += len(bot.tokenizer(response, add_special_tokens=False).input_ids)
+    
+    total = sum(latencies)
+    return {
+        "load_time_s": round(load_time, 2),
+        "avg_latency_ms": round(total / len(latencies) * 1000, 1),
+        "tokens_per_s": round(tokens / total, 2) if total else 0.0,
+        "rss_mb": round(current_rss_mb(), 1),
+    }
+
+
+def benchmark_backends(questions: List[str], variants: List[str] = None) -> Dict[str, dict]:
+    """Benchmark each backend variant in a fresh process so RSS numbers don't mix."""
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for name in variants or list(BENCHMARK_VARIANTS):
+        logger.info(f"Benchmarking backend variant: {name}")
+        with context.Pool(1) as pool:
+            try:
+                results[name] = pool.apply(_benchmark_variant, (BENCHMARK_VARIANTS[name], questions))
+            except Exception as e:
+                results[name] = {"error": str(e)}
+    return results
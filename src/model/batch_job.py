@@ -0,0 +1,114 @@
+import json
+import os
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+from src.config.logging_config import logger
+from src.evaluation.tracking import tracker
+
+
+def iter_records(path: Path) -> Iterator[Dict]:
+    """Stream {"question": ...} records from JSONL (objects with question/instruction, or bare strings)."""
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"question": record}
+            elif "question" not in record:
+                if "instruction" not in record:
+                    raise ValueError(f"Record has no question or instruction field: {line[:80]}")
+                record = {**record, "question": record["instruction"]}
+            yield record
+
+
+def completed_count(path: Path, chunk_size: int = 1 << 20) -> int:
+    """Number of finished output lines; a partially written last line (crash mid-write) is truncated.
+    
+    The file is read in chunks, and only its tail is scanned to find the last newline.
+    """
+    path = Path(path)
+    if not path.exists():
+        return 0
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - chunk_size)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        if end < size:
+            f.truncate(end)
+        
+        f.seek(0)
+        count = 0
+        remaining = end
+        while remaining:
+            chunk = f.read(min(chunk_size, remaining))
+            count += chunk.count(b"\n")
+            remaining -= len(chunk)
+    return count
+
+
+def _length_sorted_batches(records: List[Dict], batch_size: int) -> Iterator[List[int]]:
+    order = sorted(range(len(records)), key=lambda i: len(records[i]["question"]))
+    for start in range(0, len(order), batch_size):
+        yield order[start:start + batch_size]
+
+
+def run_batch_job(
+    bot,
+    input_path: Path,
+    output_path: Path,
+    batch_size: int = 16,
+    window_batches: int = 8,
+    progress: Optional[Callable[[Dict], None]] = None,
+) -> Dict:
+    """Answer every question in `input_path`, appending results to `output_path` in input order.
+    
+    Questions are read in windows of `batch_size * window_batches`; each window is
+    length-sorted into padded batches, then written out in input order, so memory is
+    bounded by one window and a restart resumes after the last complete line.
+    """
+    skip = completed_count(output_path)
+    if skip:
+        logger.info(f"Resuming batch job: {skip} answers already in {output_path}")
+    records = islice(iter_records(input_path), skip, None)
+    window_size = batch_size * window_batches
+    
+    stats = {"skipped": skip, "answered": 0, "elapsed_s": 0.0, "questions_per_s": 0.0, "tokens_per_s": 0.0}
+    start = time.time()
+    tokens_start = tracker.tokens_total
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "a") as out:
+        while True:
+            window = list(islice(records, window_size))
+            if not window:
+                break
+            responses = [None] * len(window)
+            for batch in _length_sorted_batches(window, batch_size):
+                answers = bot.chat_batch([window[i]["question"] for i in batch])
+                for i, answer in zip(batch, answers):
+                    responses[i] = answer
+            for i, (record, response) in enumerate(zip(window, responses)):
+                out.write(json.dumps({**record, "index": skip + stats["answered"] + i, "response": response}) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+            
+            stats["answered"] += len(window)
+            elapsed = time.time() - start
+            stats.update(
+                elapsed_s=round(elapsed, 2),
+                questions_per_s=round(stats["answered"] / elapsed, 2) if elapsed else 0.0,
+                tokens_per_s=round((tracker.tokens_total - tokens_start) / elapsed, 2) if elapsed else 0.0,
+            )
+            if progress:
+                progress(stats)
+    return stats
@@ -0,0 +1,90 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+from src.config.settings import CONFIG
+from src.config.logging_config import logger
+
+
+class BatchScheduler:
+    """Collects concurrent chat requests into batches for `CustomerSupportBot.chat_batch`.
+
+    The first queued request opens a window of `window_ms`; everything that arrives
+    before it closes (up to `max_batch_size`) is generated in the same batch.
+    """
+
+    def __init__(self, bot, window_ms: float = None, max_batch_size: int = None):
+        self.bot = bot
+        self.window_s = (CONFIG.batch_window_ms if window_ms is None else window_ms) / 1000
+        self.max_batch_size = max_batch_size or CONFIG.max_batch_size
+        self._queue: "queue.Queue[Optional[Tuple[str, Future]]]" = queue.Queue()
+        self._thread = None
+        self._running = False
+
+    def start(self) -> "BatchScheduler":
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="batch-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"Batch scheduler started (window={self.window_s*1000:.0f}ms, max_batch={self.max_batch_size})")
+        return self
+
+    def stop(self):
+        self._running = False
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, question: str) -> Future:
+        future = Future()
+        self._queue.put((question, future))
+        return future
+
+    def chat(self, question: str) -> str:
+        return self.submit(question).result()
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.window_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._running = False
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while self._running:
+            batch = self._collect()
+            if not batch:
+                continue
+            questions = [question for question, _ in batch]
+            try:
+                responses = self.bot.chat_batch(questions)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), response in zip(batch, responses):
+                future.set_result(response)
+        self._drain()
+
+    def _drain(self):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item[1].set_exception(RuntimeError("Batch scheduler stopped"))
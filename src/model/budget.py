@@ -0,0 +1,190 @@
+import os
+import random
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import torch
+from transformers import StoppingCriteria
+from src.config.settings import CONFIG
+from src.model.semantic_cache import HashingEncoder
+
+
+class TokenBudgetPredictor:
+    """Per-request `max_new_tokens` from the answer lengths seen for the question's intent.
+    
+    The intent is guessed by the nearest centroid of `HashingEncoder` vectors. Each
+    intent keeps a high percentile of its answer lengths in tokens as its budget, a
+    hard cap that is never above `max_new_tokens`. Questions that match no centroid
+    well get the percentile over all intents.
+    """
+    
+    def __init__(self, intents: List[str], centroids: np.ndarray, budgets: np.ndarray, default: int,
+                 min_similarity: float = None, encoder=None):
+        self.encoder = encoder or HashingEncoder()
+        self.intents = list(intents)
+        self.centroids = centroids.astype(np.float32)
+        self.budgets = budgets.astype(np.int64)
+        self.default = default
+        self.min_similarity = CONFIG.token_budget_min_similarity if min_similarity is None else min_similarity
+        if self.centroids.shape[1:] != (self.encoder.dim,):
+            raise ValueError(f"Centroid dimension {self.centroids.shape[1:]} does not match encoder ({self.encoder.dim})")
+    
+    @classmethod
+    def fit(cls, questions: List[str], intents: List[str], answer_tokens: List[int],
+            percentile: float = None, encoder=None) -> "TokenBudgetPredictor":
+        percentile = CONFIG.token_budget_percentile if percentile is None else percentile
+        encoder = encoder or HashingEncoder()
+        
+        names = sorted(set(intents))
+        ids = {name: i for i, name in enumerate(names)}
+        row_intent = np.array([ids[intent] for intent in intents], dtype=np.int64)
+        lengths = np.asarray(answer_tokens, dtype=np.float64)
+        vectors = encoder.encode(questions)
+        
+        centroids = np.zeros((len(names), encoder.dim), dtype=np.float32)
+        np.add.at(centroids, row_intent, vectors)
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        
+        def budget(values) -> int:
+            return int(np.ceil(np.percentile(values, percentile)))
+        
+        return cls(
+            names,
+            centroids,
+            np.array([budget(lengths[row_intent == i]) for i in range(len(names))]),
+            default=budget(lengths),
+            encoder=encoder,
+        )
+    
+    def _nearest(self, questions: List[str]) -> List[Optional[int]]:
+        scores = self.encoder.encode(questions) @ self.centroids.T
+        best = scores.argmax(axis=1)
+        return [
+            i if score >= self.min_similarity else None
+            for i, score in zip(best.tolist(), scores[np.arange(len(questions)), best].tolist())
+        ]
+    
+    def guess_intents(self, questions: List[str]) -> List[Optional[str]]:
+        """Nearest intent per question, or None when no centroid is similar enough."""
+        return [None if i is None else self.intents[i] for i in self._nearest(questions)]
+    
+    def predict(self, questions: List[str]) -> List[int]:
+        budgets = [self.default if i is None else int(self.budgets[i]) for i in self._nearest(questions)]
+        return [min(CONFIG.max_new_tokens, max(CONFIG.token_budget_min, budget)) for budget in budgets]
+    
+    def summary(self) -> Dict[str, int]:
+        return {intent: int(budget) for intent, budget in zip(self.intents, self.budgets)}
+    
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                intents=np.array(self.intents, dtype=str),
+                centroids=self.centroids,
+                budgets=self.budgets,
+                default=np.array(self.default),
+            )
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: Path, encoder=None) -> "TokenBudgetPredictor":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["intents"].tolist(),
+                data["centroids"],
+                data["budgets"],
+                # Files written before budgets became a hard cap store (budget, floor).
+                default=int(np.ravel(data["default"])[0]),
+                encoder=encoder,
+            )
+
+
+def evaluate_budgets(predictor: TokenBudgetPredictor, questions: List[str], intents: List[str],
+                     answer_tokens: List[int]) -> Dict[str, float]:
+    """Held-out intent accuracy, mean budget, and decode steps and truncation versus the fixed `max_new_tokens`.
+    
+    An answer needs its own length in decode steps and is cut at its cap, so
+    `min(length, cap)` is the decode work per question under either cap.
+    """
+    guesses = predictor.guess_intents(questions)
+    budgets = predictor.predict(questions)
+    fixed = CONFIG.max_new_tokens
+    n = max(1, len(questions))
+    return {
+        "intent_accuracy": sum(g == t for g, t in zip(guesses, intents)) / n,
+        "mean_budget": sum(budgets) / n,
+        "mean_decode_steps": sum(min(tokens, budget) for tokens, budget in zip(answer_tokens, budgets)) / n,
+        "truncated_rate": sum(tokens > budget for tokens, budget in zip(answer_tokens, budgets)) / n,
+        "fixed_budget": fixed,
+        "fixed_mean_decode_steps": sum(min(tokens, fixed) for tokens in answer_tokens) / n,
+        "fixed_truncated_rate": sum(tokens > fixed for tokens in answer_tokens) / n,
+    }
+
+
+def fit_from_snapshot(tokenizer, holdout: float = 0.1, seed: int = 0) -> Tuple[TokenBudgetPredictor, Dict[str, float]]:
+    """Fit on the Bitext snapshot, scoring the budgets on a held-out share of its rows."""
+    from src.evaluation.snapshot import load_snapshot
+    
+    dataset, _ = load_snapshot()
+    questions, intents = dataset["instruction"], dataset["intent"]
+    # +1 for the stop token that ends every answer.
+    lengths = [len(ids) + 1 for ids in tokenizer(dataset["response"], add_special_tokens=False)["input_ids"]]
+    
+    rows = list(range(len(questions)))
+    random.Random(seed).shuffle(rows)
+    n_test = int(len(rows) * holdout)
+    test, train = rows[:n_test], rows[n_test:]
+    
+    def pick(values, selected):
+        return [values[i] for i in selected]
+    
+    predictor = TokenBudgetPredictor.fit(pick(questions, train), pick(intents, train), pick(lengths, train))
+    report = evaluate_budgets(predictor, pick(questions, test), pick(intents, test), pick(lengths, test))
+    return predictor, report
+
+
+
+def compare_budgets(bot, questions: List[str], predictor: TokenBudgetPredictor) -> Dict:
+    """Answer `questions` with the fixed `max_new_tokens` and with `predictor`'s budgets; report decode work and agreement."""
+    previous = bot.budget_predictor
+    runs = {}
+    try:
+        for name, budgets in (("fixed", None), ("budgeted", predictor)):
+            bot.budget_predictor = budgets
+            start = time.perf_counter()
+            runs[name] = [bot._generate([q]) for q in questions]
+            runs[name + "_s"] = time.perf_counter() - start
+    finally:
+        bot.budget_predictor = previous
+    
+    def mean_steps(generations) -> float:
+        return sum(g.generated_tokens[0] for g in generations) / max(1, len(generations))
+    
+    return {
+        "questions": len(questions),
+        "fixed_mean_decode_steps": round(mean_steps(runs["fixed"]), 2),
+        "mean_decode_steps": round(mean_steps(runs["budgeted"]), 2),
+        "fixed_s": round(runs["fixed_s"], 3),
+        "budgeted_s": round(runs["budgeted_s"], 3),
+        "speedup": round(runs["fixed_s"] / runs["budgeted_s"], 3) if runs["budgeted_s"] else 0.0,
+        "identical": sum(a.responses == b.responses for a, b in zip(runs["fixed"], runs["budgeted"])),
+    }
+
+class RowTokenBudget(StoppingCriteria):
+    """Stops each row of a batch once it has generated its own `max_new_tokens`.
+    
+    The batch still decodes up to its largest budget, so this saves no compute; it
+    keeps each answer identical to what the question gets when generated alone.
+    """
+    
+    def __init__(self, prompt_length: int, budgets: List[int]):
+        self.prompt_length = prompt_length
+        self.budgets = torch.tensor(budgets)
+    
+    def __call__(self, input_ids, scores, **kwargs) -> torch.BoolTensor:
+        generated = input_ids.shape[1] - self.prompt_length
+        return (generated >= self.budgets).to(input_ids.device)
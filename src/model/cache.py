@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Optional
+from src.evaluation.tracking import tracker
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.lower().split()).rstrip("?!. ")
+
+
+@dataclass
+class CacheEntry:
+    value: str
+    expires_at: float
+    size: int
+
+
+class ResponseCache:
+    """In-process LRU cache of generated answers with TTL expiry and a byte budget."""
+
+    def __init__(self, max_entries: int, ttl_s: float, max_bytes: int, name: str = "response"):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.name = name
+        self.current_bytes = 0
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                tracker.log_cache_event(self.name, "evictions")
+                entry = None
+            if entry is None:
+                tracker.log_cache_event(self.name, "misses")
+                return None
+            self._entries.move_to_end(key)
+        tracker.log_cache_event(self.name, "hits")
+        return entry.value
+
+    def put(self, key: Hashable, value: str):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(value, time.monotonic() + self.ttl_s, size)
+            self.current_bytes += size
+            evicted = 0
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                evicted += 1
+        if evicted:
+            tracker.log_cache_event(self.name, "evictions", evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry.size
@@ -0,0 +1,44 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+from src.evaluation.tracking import tracker
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers with the same key share its result.
+
+    The call runs as its own task. A caller that is cancelled (its client went away)
+    only stops waiting; the call itself is cancelled once nobody waits for it.
+    """
+
+    def __init__(self):
+        # Only touched from the event loop, so no lock is needed.
+        self._calls: Dict[Hashable, _Call] = {}
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            tracker.log_coalesced()
+        
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
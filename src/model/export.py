@@ -0,0 +1,68 @@
+import json
+import time
+from pathlib import Path
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+from peft import PeftModel
+from src.config.settings import CONFIG
+from src.config.logging_config import logger
+from src.model.backends import model_dtype
+from src.model.fingerprint import adapter_fingerprint
+
+EXPORT_INFO = "export_info.json"
+WEIGHTS_FILE = "model.safetensors"
+
+
+def dtype_name(dtype: torch.dtype) -> str:
+    return str(dtype).replace("torch.", "")
+
+
+def export_merged_model(adapter_path: str = None, output_dir: Path = None) -> Path:
+    adapter_path = adapter_path or str(CONFIG.adapter_path)
+    output_dir = Path(output_dir or CONFIG.merged_model_path)
+    start_time = time.time()
+    
+    logger.info(f"Merging adapter {adapter_path} into {CONFIG.base_model}")
+    base_model = AutoModelForCausalLM.from_pretrained(
+        CONFIG.base_model,
+        torch_dtype=model_dtype(),
+        trust_remote_code=True,
+    )
+    model = PeftModel.from_pretrained(base_model, adapter_path).merge_and_unload()
+    
+    output_dir.mkdir(parents=True, exist_ok=True)
+    # One shard, so load() can memory-map a single file.
+    model.save_pretrained(output_dir, safe_serialization=True, max_shard_size="100GB")
+    AutoTokenizer.from_pretrained(adapter_path).save_pretrained(output_dir)
+    with open(output_dir / EXPORT_INFO, "w") as f:
+        json.dump({
+            "base_model": CONFIG.base_model,
+            "adapter_path": adapter_path,
+            "adapter_fingerprint": adapter_fingerprint(adapter_path),
+            "dtype": dtype_name(model_dtype()),
+        }, f, indent=2)
+    
+    logger.info(f"Merged model written to {output_dir} in {time.time() - start_time:.1f}s")
+    return output_dir
+
+
+def find_merged_model(adapter_path: str, merged_path: Path = None):
+    merged_path = Path(merged_path or CONFIG.merged_model_path)
+    info_file = merged_path / EXPORT_INFO
+    if not (merged_path / WEIGHTS_FILE).exists() or not info_file.exists():
+        return None
+    with open(info_file) as f:
+        info = json.load(f)
+    if info.get("adapter_path") != adapter_path or info.get("base_model") != CONFIG.base_model:
+        return None
+    if info.get("adapter_fingerprint") != adapter_fingerprint(adapter_path):
+        logger.warning(f"Merged model in {merged_path} is stale (adapter changed since export); re-run `python run.py export`")
+        return None
+    if info.get("dtype") != dtype_name(model_dtype()):
+        # Loading would convert every tensor, losing the single-shard fast path (and precision for fp16 -> bf16).
+        logger.warning(
+            f"Merged model in {merged_path} was exported as {info.get('dtype')}, backend loads "
+            f"{dtype_name(model_dtype())}; re-run `python run.py export`"
+        )
+        return None
+    return merged_path
@@ -0,0 +1,60 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Optional
+from src.config.settings import CONFIG
+
+_fingerprints: Dict[tuple, str] = {}
+
+
+def adapter_fingerprint(adapter_path) -> str:
+    """Content hash of the adapter files, memoized on their paths, sizes and mtimes."""
+    path = Path(adapter_path)
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else []
+    if not files:
+        return hashlib.sha256(str(adapter_path).encode()).hexdigest()
+    
+    stamp = tuple((str(p), p.stat().st_size, p.stat().st_mtime_ns) for p in files)
+    if stamp not in _fingerprints:
+        digest = hashlib.sha256()
+        for p in files:
+            digest.update(str(p.relative_to(path)).encode())
+            with open(p, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        _fingerprints[stamp] = digest.hexdigest()
+    return _fingerprints[stamp]
+
+
+def file_fingerprint(path) -> Optional[str]:
+    path = Path(path)
+    if not path.is_file():
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def generation_params() -> Dict:
+    return {
+        "base_model": CONFIG.base_model,
+        "backend": CONFIG.backend,
+        "cpu_dtype": CONFIG.cpu_dtype,
+        "cpu_quantize_int8": CONFIG.cpu_quantize_int8,
+        "max_new_tokens": CONFIG.max_new_tokens,
+        "do_sample": CONFIG.do_sample,
+        "temperature": CONFIG.temperature,
+        "top_p": CONFIG.top_p,
+        "repetition_penalty": CONFIG.repetition_penalty,
+        "stop_sequences": list(CONFIG.stop_sequences),
+        "token_budgets": CONFIG.token_budgets,
+        "token_budgets_fingerprint": file_fingerprint(CONFIG.token_budget_path) if CONFIG.token_budgets else None,
+    }
+
+
+def model_fingerprint(adapter_path) -> str:
+    """Adapter contents plus generation settings; stored results from another model or config are not reused."""
+    params = json.dumps(generation_params(), sort_keys=True)
+    return hashlib.sha256(f"{adapter_fingerprint(adapter_path)}:{params}".encode()).hexdigest()
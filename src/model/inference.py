@@ -1,10 +1,71 @@
+import threading
 import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
 import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import AutoModelForCausalLM, AutoTokenizer, StopStringCriteria, StoppingCriteriaList
 from peft import PeftModel
 from src.config.settings import CONFIG
 from src.config.logging_config import logger
 from src.evaluation.tracking import tracker
+from src.model.cache import ResponseCache, normalize_question
+from src.model.budget import RowTokenBudget, TokenBudgetPredictor
+from src.model.backends import configure_threads, model_dtype, model_load_kwargs, optimize_for_backend
+from src.model.export import find_merged_model
+from src.model.prefix_cache import PrefixCache
+from src.model.speculative import NgramIndex, SpeculativeDecoder, index_from_snapshot
+from src.model.streaming import StopOnEvent, TimedTextStreamer, TokenTimer
+
+
+def extract_response(text: str) -> str:
+    if "<|assistant|>" in text:
+        text = text.split("<|assistant|>")[-1].strip()
+    return text.split("<")[0].strip()
+
+
+def count_tokens(inputs, outputs, eos_token_id: int) -> Tuple[List[int], List[int]]:
+    if not isinstance(outputs, torch.Tensor):
+        return [0] * len(outputs), [0] * len(outputs)
+    prompt_length = inputs["input_ids"].shape[1]
+    attention_mask = inputs.get("attention_mask")
+    if attention_mask is not None:
+        prompt_tokens = attention_mask.sum(dim=1).tolist()
+    else:
+        prompt_tokens = [prompt_length] * outputs.shape[0]
+    
+    new_tokens = outputs[:, prompt_length:]
+    is_eos = new_tokens == eos_token_id
+    first_eos = is_eos.int().argmax(dim=1) + 1
+    generated = torch.where(is_eos.any(dim=1), first_eos, torch.full_like(first_eos, new_tokens.shape[1]))
+    return prompt_tokens, generated.tolist()
+
+
+def new_token_ids(inputs, outputs):
+    """Only the generated part of each row; the prompt is never decoded."""
+    if not isinstance(outputs, torch.Tensor):
+        return outputs
+    return outputs[:, inputs["input_ids"].shape[1]:]
+
+
+def stop_savings(texts: List[str], generated_tokens: List[int], budgets: List[int], decode_steps: int) -> List[int]:
+    """Decode steps each row skipped by ending on a stop sequence instead of running to its token budget.
+    
+    A batch keeps decoding until its last row finishes, so a row is only credited
+    with the steps the whole batch (`decode_steps` long) did not run.
+    """
+    return [
+        max(0, budget - decode_steps)
+        if 0 < generated < budget and any(stop in text for stop in CONFIG.stop_sequences) else 0
+        for text, generated, budget in zip(texts, generated_tokens, budgets)
+    ]
+
+
+@dataclass
+class Generation:
+    responses: List[str]
+    prompt_tokens: List[int]
+    generated_tokens: List[int]
+    phases: Dict[str, float] = field(default_factory=dict)
 
 
 class CustomerSupportBot:
@@ -13,67 +74,368 @@ class CustomerSupportBot:
         self.model = None
         self.tokenizer = None
         self.device = None
+        self.prefix_cache = None
+        self.stop_criteria = None
+        self.budget_predictor = None
+        self.speculative = None
+        self.response_cache = ResponseCache(
+            max_entries=CONFIG.response_cache_size,
+            ttl_s=CONFIG.response_cache_ttl_s,
+            max_bytes=CONFIG.response_cache_max_bytes,
+        )
     
     def load(self):
         start_time = time.time()
-        logger.info(f"Loading base model: {CONFIG.base_model}")
+        configure_threads()
+        merged_path = find_merged_model(self.adapter_path)
+        if merged_path is not None:
+            breakdown = self._load_merged(merged_path)
+        else:
+            breakdown = self._load_with_adapter()
+        self._prepare(breakdown)
         
+        load_time = time.time() - start_time
+        tracker.log_model_load(self.adapter_path, load_time, breakdown)
+        logger.info(f"Model loaded in {load_time:.2f}s ({', '.join(f'{k}={v:.2f}' for k, v in breakdown.items())})")
+        
+        return self
+    
+    def attach(self, model, tokenizer) -> "CustomerSupportBot":
+        """Serve an already-built model, e.g. a tiny random one for benchmarks."""
+        self.model = model
+        self.tokenizer = tokenizer
+        self._prepare({})
+        return self
+    
+    def _prepare(self, breakdown: dict):
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.device = self.model.device
+        if CONFIG.stop_sequences:
+            self._build_stop_criteria(CONFIG.stop_sequences)
+        if CONFIG.token_budgets:
+            self._load_budget_predictor(CONFIG.token_budget_path)
+        if CONFIG.speculative:
+            step = time.time()
+            self._build_speculative(CONFIG.speculative_index_path)
+            breakdown["speculative_index_s"] = time.time() - step
+        if CONFIG.prefix_cache:
+            step = time.time()
+            self._build_prefix_cache(CONFIG.prompt_template)
+            breakdown["prefix_cache_s"] = time.time() - step
+    
+    def _load_with_adapter(self) -> dict:
+        breakdown = {}
+        step = time.time()
+        logger.info(f"Loading base model: {CONFIG.base_model}")
         base_model = AutoModelForCausalLM.from_pretrained(
             CONFIG.base_model,
-            torch_dtype=torch.float16,
-            device_map="auto",
             trust_remote_code=True,
+            **model_load_kwargs(),
         )
         
         logger.info(f"Loading adapter: {self.adapter_path}")
-        self.model = PeftModel.from_pretrained(base_model, self.adapter_path)
+        self.model = optimize_for_backend(PeftModel.from_pretrained(base_model, self.adapter_path))
+        breakdown["weights_s"] = time.time() - step
+        
+        step = time.time()
         self.tokenizer = AutoTokenizer.from_pretrained(self.adapter_path)
-        self.device = self.model.device
+        breakdown["tokenizer_s"] = time.time() - step
+        return breakdown
+    
+    def _load_merged(self, merged_path) -> dict:
+        breakdown = {}
+        step = time.time()
+        logger.info(f"Loading merged model: {merged_path}")
+        # safetensors are memory-mapped, so weights are paged in instead of copied.
+        self.model = AutoModelForCausalLM.from_pretrained(
+            merged_path,
+            torch_dtype=model_dtype(),
+            low_cpu_mem_usage=True,
+        )
+        breakdown["weights_s"] = time.time() - step
         
-        load_time = time.time() - start_time
-        tracker.log_model_load(self.adapter_path, load_time)
-        logger.info(f"Model loaded in {load_time:.2f}s")
+        step = time.time()
+        self.tokenizer = AutoTokenizer.from_pretrained(merged_path)
+        breakdown["tokenizer_s"] = time.time() - step
         
-        return self
+        step = time.time()
+        if CONFIG.backend != "cpu" and torch.cuda.is_available():
+            self.model.to("cuda")
+        self.model.eval()
+        self.model = optimize_for_backend(self.model)
+        breakdown["device_s"] = time.time() - step
+        return breakdown
     
-    def chat(self, question: str) -> str:
-        start_time = time.time()
+    def _load_budget_predictor(self, path):
+        try:
+            self.budget_predictor = TokenBudgetPredictor.load(path)
+            logger.info(f"Loaded token budgets for {len(self.budget_predictor.intents)} intents from {path}")
+        except Exception as e:
+            self.budget_predictor = None
+            logger.warning(f"Token budgets disabled, using max_new_tokens={CONFIG.max_new_tokens}: {e}")
+    
+    def _build_speculative(self, index_path):
+        from src.evaluation.snapshot import snapshot_exists
         
+        index = None
         try:
-            prompt = f"""<|system|>
-You are a helpful customer support assistant.</s>
-<|user|>
-{question}</s>
-<|assistant|>
-"""
-            inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
-            
+            if index_path.exists():
+                index = NgramIndex.load(index_path)
+            elif snapshot_exists():
+                index = index_from_snapshot(self.tokenizer)
+                index.save(index_path)
+        except Exception as e:
+            logger.warning(f"Speculative decoding drafts from the prompt only: {e}")
+        if index is None:
+            logger.info("No reference answer index; speculative drafts come from the prompt only")
+        self.speculative = SpeculativeDecoder(index)
+    
+    def _token_budgets(self, questions: List[str]) -> List[int]:
+        if self.budget_predictor is None:
+            return [CONFIG.max_new_tokens] * len(questions)
+        return self.budget_predictor.predict(questions)
+    
+    def _generation_kwargs(self, max_new_tokens: int = None) -> dict:
+        kwargs = dict(
+            max_new_tokens=max_new_tokens or CONFIG.max_new_tokens,
+            do_sample=CONFIG.do_sample,
+            repetition_penalty=CONFIG.repetition_penalty,
+            pad_token_id=self.tokenizer.eos_token_id,
+        )
+        if CONFIG.do_sample:
+            kwargs.update(temperature=CONFIG.temperature, top_p=CONFIG.top_p)
+        return kwargs
+    
+    def _stopping_criteria(self, *extra) -> StoppingCriteriaList:
+        criteria = list(extra)
+        if self.stop_criteria is not None:
+            criteria.append(self.stop_criteria)
+        return StoppingCriteriaList(criteria)
+    
+    def generation_key(self, question: str) -> tuple:
+        return (
+            normalize_question(question),
+            self.adapter_path,
+            CONFIG.prompt_template,
+            CONFIG.max_new_tokens,
+            CONFIG.do_sample,
+            CONFIG.temperature,
+            CONFIG.top_p,
+            CONFIG.repetition_penalty,
+            CONFIG.token_budgets,
+        )
+    
+    def _cached_response(self, question: str) -> Optional[str]:
+        # Sampled answers differ on every call, so only greedy output is reusable.
+        if CONFIG.do_sample:
+            return None
+        return self.response_cache.get(self.generation_key(question))
+    
+    def _store_response(self, question: str, response: str):
+        if not CONFIG.do_sample:
+            self.response_cache.put(self.generation_key(question), response)
+    
+    def _build_stop_criteria(self, stop_sequences):
+        # Matched per row on the token ids, so in a batch only the rows that hit a stop sequence finish early.
+        try:
+            self.stop_criteria = StopStringCriteria(self.tokenizer, list(stop_sequences))
+        except Exception as e:
+            self.stop_criteria = None
+            logger.warning(f"Stop sequences disabled: {e}")
+    
+    def _build_prefix_cache(self, template):
+        try:
+            self.prefix_cache = PrefixCache.build(self.model, self.tokenizer, template)
+        except Exception as e:
+            self.prefix_cache = None
+            logger.warning(f"Prefix cache disabled: {e}")
+    
+    def _encode(self, questions: List[str]) -> dict:
+        template = CONFIG.prompt_template
+        prompts = [template.render(q) for q in questions]
+        
+        if self.prefix_cache is not None:
+            if self.prefix_cache.template != template:
+                logger.info("Prompt template changed, rebuilding prefix cache")
+                self._build_prefix_cache(template)
+        if self.prefix_cache is not None:
+            inputs = self.prefix_cache.encode(self.tokenizer, prompts, self.device)
+            if inputs is not None:
+                return inputs
+        
+        prompt = prompts[0] if len(prompts) == 1 else prompts
+        return self.tokenizer(prompt, return_tensors="pt", padding=True).to(self.device)
+    
+    def _generate(self, questions: List[str]) -> Generation:
+        phases = {}
+        step = time.perf_counter()
+        inputs = self._encode(questions)
+        budgets = self._token_budgets(questions)
+        phases["tokenize"] = time.perf_counter() - step
+        
+        criteria = []
+        if len(set(budgets)) > 1:
+            criteria.append(RowTokenBudget(inputs["input_ids"].shape[1], budgets))
+        timer = TokenTimer()
+        step = time.perf_counter()
+        if self.speculative is not None and len(questions) == 1 and not CONFIG.do_sample:
+            outputs = self.speculative.generate(
+                self.model,
+                inputs,
+                max_new_tokens=budgets[0],
+                eos_token_id=self.tokenizer.eos_token_id,
+                repetition_penalty=CONFIG.repetition_penalty,
+                stopping_criteria=self.stop_criteria,
+                streamer=timer,
+            )
+        else:
             with torch.no_grad():
                 outputs = self.model.generate(
                     **inputs,
-                    max_new_tokens=CONFIG.max_new_tokens,
-                    temperature=CONFIG.temperature,
-                    top_p=CONFIG.top_p,
-                    do_sample=True,
-                    repetition_penalty=CONFIG.repetition_penalty,
-                    pad_token_id=self.tokenizer.eos_token_id,
+                    **self._generation_kwargs(max(budgets)),
+                    streamer=timer,
+                    stopping_criteria=self._stopping_criteria(*criteria),
                 )
-            
-            response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            if "<|assistant|>" in response:
-                response = response.split("<|assistant|>")[-1].strip()
-            response = response.split("<")[0].strip()
+        done = time.perf_counter()
+        first_token = timer.first_token_time or done
+        phases["prefill"] = first_token - step
+        phases["decode"] = done - first_token
+        
+        step = time.perf_counter()
+        texts = [self.tokenizer.decode(ids, skip_special_tokens=True) for ids in new_token_ids(inputs, outputs)]
+        responses = [extract_response(text) for text in texts]
+        phases["detokenize"] = time.perf_counter() - step
+        
+        prompt_tokens, generated_tokens = count_tokens(inputs, outputs, self.tokenizer.eos_token_id)
+        # Rows stopped by their own budget are padded with eos, which count_tokens would include.
+        generated_tokens = [min(generated, budget) for generated, budget in zip(generated_tokens, budgets)]
+        tracker.log_phases(phases)
+        decode_steps = outputs.shape[1] - inputs["input_ids"].shape[1] if isinstance(outputs, torch.Tensor) else 0
+        tracker.log_stop_savings(stop_savings(texts, generated_tokens, budgets, decode_steps))
+        if self.budget_predictor is not None:
+            tracker.log_token_budgets(budgets, generated_tokens)
+        return Generation(responses, prompt_tokens, generated_tokens, phases)
+    
+    def chat(self, question: str) -> str:
+        start_time = time.time()
+        
+        try:
+            response = self._cached_response(question)
+            cached = response is not None
+            prompt_tokens = tokens = 0
+            if not cached:
+                generation = self._generate([question])
+                response = generation.responses[0]
+                prompt_tokens = generation.prompt_tokens[0]
+                tokens = generation.generated_tokens[0]
+                self._store_response(question, response)
             
             latency = time.time() - start_time
-            tracker.log_inference(question, response, latency)
+            tracker.log_inference(question, response, latency, tokens=tokens, prompt_tokens=prompt_tokens, cached=cached)
             logger.debug(f"Inference completed in {latency*1000:.0f}ms")
             
             return response
-            
+        
         except Exception as e:
             tracker.log_error()
             logger.error(f"Inference error: {e}")
             raise
+    
+    def stream_chat(self, question: str) -> Iterator[str]:
+        start_time = time.time()
+        cached = self._cached_response(question)
+        if cached is not None:
+            tracker.log_inference(question, cached, time.time() - start_time, cached=True)
+            yield cached
+            return
+        
+        inputs = self._encode([question])
+        budget = self._token_budgets([question])[0]
+        streamer = TimedTextStreamer(self.tokenizer, skip_special_tokens=True)
+        stop = threading.Event()
+        errors = []
+        
+        def generate():
+            try:
+                with torch.no_grad():
+                    self.model.generate(
+                        **inputs,
+                        **self._generation_kwargs(budget),
+                        streamer=streamer,
+                        stopping_criteria=self._stopping_criteria(StopOnEvent(stop)),
+                    )
+            except Exception as e:
+                errors.append(e)
+                streamer.end()
+        
+        thread = threading.Thread(target=generate, daemon=True)
+        thread.start()
+        
+        text = ""
+        emitted = ""
+        try:
+            for chunk in streamer:
+                text += chunk
+                visible = text.split("<")[0].lstrip()
+                if len(visible) > len(emitted):
+                    delta = visible[len(emitted):]
+                    emitted = visible
+                    yield delta
+                if "<" in text:
+                    break
+        finally:
+            stop.set()
+            thread.join()
+        
+        if errors:
+            tracker.log_error()
+            logger.error(f"Streaming inference error: {errors[0]}")
+            raise errors[0]
+        
+        response = emitted.strip()
+        generated = len(streamer.token_times)
+        self._store_response(question, response)
+        latency = time.time() - start_time
+        prompt_tokens = int(inputs["attention_mask"].sum()) if "attention_mask" in inputs else 0
+        tracker.log_inference(question, response, latency, tokens=generated, prompt_tokens=prompt_tokens)
+        tracker.log_stream(streamer.time_to_first_token(start_time), streamer.inter_token_latency())
+        tracker.log_stop_savings(stop_savings([text], [generated], [budget], generated))
+        if self.budget_predictor is not None:
+            tracker.log_token_budgets([budget], [generated])
+        logger.debug(f"Streaming inference completed in {latency*1000:.0f}ms")
+    
+    def chat_batch(self, questions: List[str]) -> List[str]:
+        start_time = time.time()
+        
+        try:
+            responses = [self._cached_response(q) for q in questions]
+            prompt_tokens = [0] * len(questions)
+            tokens = [0] * len(questions)
+            pending = [i for i, response in enumerate(responses) if response is None]
+            if pending:
+                generation = self._generate([questions[i] for i in pending])
+                for row, i in enumerate(pending):
+                    responses[i] = generation.responses[row]
+                    prompt_tokens[i] = generation.prompt_tokens[row]
+                    tokens[i] = generation.generated_tokens[row]
+                    self._store_response(questions[i], responses[i])
+            
+            latency = time.time() - start_time
+            generated = set(pending)
+            for i, question in enumerate(questions):
+                tracker.log_inference(
+                    question, responses[i], latency, tokens=tokens[i], prompt_tokens=prompt_tokens[i], cached=i not in generated
+                )
+            logger.debug(f"Batch of {len(questions)} completed in {latency*1000:.0f}ms")
+            
+            return responses
+        
+        except Exception as e:
+            tracker.log_error()
+            logger.error(f"Batch inference error: {e}")
+            raise
 
 
 def load_model(adapter_path: str = None) -> CustomerSupportBot:
@@ -0,0 +1,51 @@
+import copy
+from typing import List, Optional
+import torch
+from src.config.settings import PromptTemplate
+
+
+class PrefixCache:
+    """Token ids and `past_key_values` for the system-prompt prefix shared by every request.
+
+    Requests are encoded as `[prefix | padding | user turn]` so the cached prefix
+    keeps positions `0..n-1` in every row of a batch; the padding in the middle is
+    masked out and position ids are derived from the attention mask.
+    """
+
+    def __init__(self, template: PromptTemplate, input_ids: List[int], past_key_values):
+        self.template = template
+        self.input_ids = input_ids
+        self.past_key_values = past_key_values
+
+    @classmethod
+    def build(cls, model, tokenizer, template: PromptTemplate) -> "PrefixCache":
+        input_ids = tokenizer(template.prefix()).input_ids
+        with torch.no_grad():
+            outputs = model(torch.tensor([input_ids], device=model.device), use_cache=True)
+        return cls(template, input_ids, outputs.past_key_values)
+
+    def encode(self, tokenizer, prompts: List[str], device) -> Optional[dict]:
+        # Tokenize whole prompts so the boundary tokens match the uncached path exactly.
+        encoded = tokenizer(prompts).input_ids
+        n = len(self.input_ids)
+        if any(ids[:n] != self.input_ids for ids in encoded):
+            return None
+        
+        suffixes = [ids[n:] for ids in encoded]
+        width = max(len(s) for s in suffixes)
+        pad_id = tokenizer.pad_token_id
+        input_ids, attention_mask = [], []
+        for suffix in suffixes:
+            padding = width - len(suffix)
+            input_ids.append(self.input_ids + [pad_id] * padding + suffix)
+            attention_mask.append([1] * n + [0] * padding + [1] * len(suffix))
+        
+        past_key_values = copy.deepcopy(self.past_key_values)
+        if len(prompts) > 1:
+            past_key_values.batch_repeat_interleave(len(prompts))
+        
+        return {
+            "input_ids": torch.tensor(input_ids, device=device),
+            "attention_mask": torch.tensor(attention_mask, device=device),
+            "past_key_values": past_key_values,
+        }
@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import FrozenSet, List, Optional
+import numpy as np
+from src.config.logging_config import logger
+from src.evaluation.tracking import tracker
+from src.model.cache import normalize_question
+
+# Function words that do not change what a support question asks for. Negations stay
+# out of this list: "would like" and "would not like" must not share an answer.
+STOPWORDS = frozenset(
+    "a an the i me my we our you your it its is am are was were be been do does did can could "
+    "would should will shall may might to of in on at for from with about how what where when "
+    "which who please help hi hello hey there this that some any just".split()
+)
+
+
+def content_words(text: str) -> FrozenSet[str]:
+    return frozenset(w for w in normalize_question(text).split() if w not in STOPWORDS)
+
+
+class HashingEncoder:
+    """Small local text encoder: L2-normalised hashed word and character n-gram counts.
+
+    Needs no download and embeds a question in microseconds. Any object with the
+    same `dim`, `name` and `lexical` attributes and an `encode(texts) -> ndarray`
+    method can replace it. Lexical vectors score "shipping address" and "billing
+    address" as near-duplicates, so `SemanticCache` also compares content words.
+    """
+
+    lexical = True
+
+    def __init__(self, dim: int = 1024, char_ngram: int = 3):
+        self.dim = dim
+        self.char_ngram = char_ngram
+        self.name = f"hashing-{dim}-{char_ngram}"
+
+    def _features(self, text: str) -> List[str]:
+        text = normalize_question(text)
+        words = text.split()
+        padded = f" {text} "
+        chars = [padded[i:i + self.char_ngram] for i in range(len(padded) - self.char_ngram + 1)]
+        return [f"w:{w}" for w in words] + [f"c:{c}" for c in chars]
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                vectors[row, zlib.crc32(feature.encode("utf-8")) % self.dim] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class TransformerEncoder:
+    """Mean-pooled sentence embeddings from a Hugging Face encoder such as all-MiniLM-L6-v2."""
+
+    lexical = False
+
+    def __init__(self, model_name: str, max_length: int = 128):
+        from transformers import AutoModel, AutoTokenizer
+
+        self.name = model_name
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).eval()
+        self.dim = self.model.config.hidden_size
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        import torch
+
+        inputs = self.tokenizer(
+            list(texts), padding=True, truncation=True, max_length=self.max_length, return_tensors="pt"
+        )
+        with torch.no_grad():
+            hidden = self.model(**inputs).last_hidden_state
+        mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        vectors = ((hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)).numpy().astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+def load_encoder(name: str):
+    """`TransformerEncoder` for a model name, or `HashingEncoder` for "hashing" or when the model cannot load."""
+    if name == "hashing":
+        return HashingEncoder()
+    try:
+        return TransformerEncoder(name)
+    except Exception as e:
+        logger.warning(f"Could not load sentence encoder {name}, falling back to hashing: {e}")
+        return HashingEncoder()
+
+
+class SemanticCache:
+    """Answers paraphrased questions from a bounded nearest-neighbour index of past answers.
+
+    The index is a flat matrix of unit vectors searched with one matrix-vector
+    product; when full, the least recently used entry is overwritten. With a
+    lexical encoder a hit also needs the same content words as the cached question.
+    `namespace` identifies the model and generation settings the answers came from;
+    a snapshot from another namespace is not restored.
+    """
+
+    def __init__(self, threshold: float, max_entries: int, encoder=None, name: str = "semantic",
+                 namespace: str = ""):
+        self.encoder = encoder or HashingEncoder()
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.name = name
+        self.namespace = namespace
+        self._vectors = np.zeros((max_entries, self.encoder.dim), dtype=np.float32)
+        self._questions: List[str] = []
+        self._answers: List[str] = []
+        self._terms: List[FrozenSet[str]] = []
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def _terms_of(self, question: str) -> FrozenSet[str]:
+        return content_words(question) if self.encoder.lexical else frozenset()
+
+    def lookup(self, question: str) -> Optional[str]:
+        start = time.perf_counter()
+        vector = self.encoder.encode([question])[0]
+        terms = self._terms_of(question)
+        answer = None
+        with self._lock:
+            size = len(self._answers)
+            if size:
+                scores = self._vectors[:size] @ vector
+                candidates = np.flatnonzero(scores >= self.threshold)
+                for best in candidates[np.argsort(-scores[candidates], kind="stable")].tolist():
+                    if self._terms[best] == terms:
+                        answer = self._answers[best]
+                        self._last_used[best] = time.monotonic()
+                        break
+        tracker.log_cache_event(self.name, "hits" if answer is not None else "misses")
+        tracker.log_cache_lookup(self.name, time.perf_counter() - start)
+        return answer
+
+    def add(self, question: str, answer: str):
+        vector = self.encoder.encode([question])[0]
+        terms = self._terms_of(question)
+        with self._lock:
+            if len(self._answers) < self.max_entries:
+                slot = len(self._answers)
+                self._questions.append(question)
+                self._answers.append(answer)
+                self._terms.append(terms)
+            else:
+                slot = int(np.argmin(self._last_used))
+                self._questions[slot] = question
+                self._answers[slot] = answer
+                self._terms[slot] = terms
+                tracker.log_cache_event(self.name, "evictions")
+            self._vectors[slot] = vector
+            self._last_used[slot] = time.monotonic()
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            size = len(self._answers)
+            arrays = dict(
+                vectors=self._vectors[:size].copy(),
+                questions=np.array(self._questions, dtype=str),
+                answers=np.array(self._answers, dtype=str),
+                namespace=np.array(self.namespace),
+            )
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def restore(self, path: Path) -> int:
+        with np.load(path, allow_pickle=False) as data:
+            vectors = data["vectors"]
+            questions = data["questions"].tolist()
+            answers = data["answers"].tolist()
+            namespace = str(data["namespace"]) if "namespace" in data.files else ""
+        if vectors.shape[1:] != (self.encoder.dim,):
+            raise ValueError(f"Snapshot dimension {vectors.shape[1:]} does not match encoder ({self.encoder.dim})")
+        if namespace != self.namespace:
+            raise ValueError("Snapshot was made with another model, generation settings or encoder")
+        keep = min(len(answers), self.max_entries)
+        start = len(answers) - keep
+        now = time.monotonic()
+        with self._lock:
+            self._vectors[:keep] = vectors[start:]
+            self._questions = questions[start:]
+            self._answers = answers[start:]
+            self._terms = [self._terms_of(q) for q in self._questions]
+            self._last_used[:keep] = now
+        return keep
@@ -0,0 +1,220 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+import torch
+from transformers import DynamicCache, RepetitionPenaltyLogitsProcessor
+from src.config.settings import CONFIG
+from src.evaluation.tracking import tracker
+
+_HASH_BASE = np.int64(1_000_003)
+
+
+def ngram_keys(tokens: np.ndarray, n: int) -> np.ndarray:
+    """Rolling int64 key for every window of `n` tokens; collisions only cost a rejected draft."""
+    count = len(tokens) - n + 1
+    keys = np.zeros(max(0, count), dtype=np.int64)
+    with np.errstate(over="ignore"):
+        for i in range(n):
+            keys = keys * _HASH_BASE + tokens[i:i + count]
+    return keys
+
+
+class NgramIndex:
+    """Continuations of reference answers, looked up by their last `n` token ids.
+    
+    All answers are stored in one flat array separated by -1. For every n-gram the
+    first continuation seen is kept, as sorted keys plus offsets for `searchsorted`.
+    """
+    
+    def __init__(self, tokens: np.ndarray, keys: np.ndarray, offsets: np.ndarray, n: int):
+        self.tokens = tokens
+        self.keys = keys
+        self.offsets = offsets
+        self.n = n
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    @classmethod
+    def build(cls, sequences: List[List[int]], n: int = None) -> "NgramIndex":
+        n = n or CONFIG.speculative_ngram
+        tokens = np.fromiter(
+            (t for ids in sequences for t in (*ids, -1)), dtype=np.int64, count=sum(len(ids) + 1 for ids in sequences)
+        )
+        keys = ngram_keys(tokens, n)[:-1]
+        # A window must lie inside one answer and be followed by at least one token of it.
+        inside = ngram_keys((tokens == -1).astype(np.int64), n)[:-1] == 0
+        valid = np.flatnonzero(inside & (tokens[n:] != -1))
+        order = valid[np.argsort(keys[valid], kind="stable")]
+        sorted_keys = keys[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        return cls(tokens, sorted_keys[first], order[first] + n, n)
+    
+    def draft(self, context: np.ndarray, k: int) -> List[int]:
+        if len(self.keys) == 0 or len(context) < self.n:
+            return []
+        key = ngram_keys(context[-self.n:], self.n)[0]
+        i = int(np.searchsorted(self.keys, key))
+        if i == len(self.keys) or self.keys[i] != key:
+            return []
+        continuation = self.tokens[self.offsets[i]:self.offsets[i] + k]
+        end = np.flatnonzero(continuation == -1)
+        return continuation[:end[0] if len(end) else k].tolist()
+    
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, tokens=self.tokens.astype(np.int32), keys=self.keys, offsets=self.offsets, n=np.array(self.n))
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: Path) -> "NgramIndex":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["tokens"].astype(np.int64), data["keys"], data["offsets"], int(data["n"]))
+
+
+def index_from_snapshot(tokenizer, n: int = None) -> NgramIndex:
+    from src.evaluation.snapshot import load_snapshot
+    
+    dataset, _ = load_snapshot()
+    return NgramIndex.build(tokenizer(dataset["response"], add_special_tokens=False)["input_ids"], n)
+
+
+def draft_from_context(context: np.ndarray, n: int, k: int) -> List[int]:
+    """Prompt lookup: what followed the most recent earlier occurrence of the last `n` tokens."""
+    for size in range(min(n, len(context) - 1), 1, -1):
+        keys = ngram_keys(context, size)
+        matches = np.flatnonzero(keys[:-1] == keys[-1])
+        if len(matches):
+            start = int(matches[-1]) + size
+            return context[start:start + k].tolist()
+    return []
+
+
+class SpeculativeDecoder:
+    """Greedy decoding that drafts tokens by n-gram lookup and verifies them in one forward pass.
+    
+    Drafts come from the context first (prompt plus answer so far), then from the
+    `NgramIndex` of reference answers. The model scores the last accepted token
+    plus the draft at once; the matching prefix of the draft is kept along with the
+    model's own next token, and the KV cache is cropped back to the accepted tokens.
+    The repetition penalty is applied per position, so the output is the greedy one.
+    """
+    
+    def __init__(self, index: Optional[NgramIndex] = None, draft_tokens: int = None, ngram: int = None):
+        self.index = index
+        self.draft_tokens = draft_tokens or CONFIG.speculative_draft_tokens
+        self.ngram = ngram or CONFIG.speculative_ngram
+        self.stats = {"passes": 0, "drafted": 0, "accepted": 0, "generated": 0}
+        self._lock = threading.Lock()
+    
+    def draft(self, context: np.ndarray, k: int) -> List[int]:
+        draft = draft_from_context(context, self.ngram, k)
+        if not draft and self.index is not None:
+            draft = self.index.draft(context, k)
+        return draft
+    
+    def generate(self, model, inputs: dict, max_new_tokens: int, eos_token_id: int, repetition_penalty: float = 1.0,
+                 stopping_criteria=None, streamer=None) -> torch.Tensor:
+        input_ids = inputs["input_ids"]
+        device = input_ids.device
+        cache = inputs.get("past_key_values") or DynamicCache()
+        penalty = RepetitionPenaltyLogitsProcessor(repetition_penalty) if repetition_penalty != 1.0 else None
+        tokens = input_ids[0].tolist()
+        prompt_length = len(tokens)
+        stats = {"passes": 0, "drafted": 0, "accepted": 0}
+        
+        def pick(logits: torch.Tensor) -> int:
+            logits = logits.float()[None]
+            if penalty is not None:
+                logits = penalty(torch.tensor([tokens], device=device), logits)
+            return int(logits.argmax(dim=-1))
+        
+        def finished() -> bool:
+            if tokens[-1] == eos_token_id or len(tokens) - prompt_length >= max_new_tokens:
+                return True
+            return bool(stopping_criteria and stopping_criteria(torch.tensor([tokens], device=device), None).all())
+        
+        if streamer is not None:
+            streamer.put(input_ids.cpu())
+        pending = tokens[cache.get_seq_length():]
+        draft = []
+        while True:
+            with torch.no_grad():
+                logits = model(
+                    input_ids=torch.tensor([pending + draft], device=device), past_key_values=cache, use_cache=True
+                ).logits[0, len(pending) - 1:]
+            stats["passes"] += 1
+            stats["drafted"] += len(draft)
+            
+            new_tokens = []
+            for position, proposed in enumerate(draft + [None]):
+                token = pick(logits[position])
+                tokens.append(token)
+                new_tokens.append(token)
+                if token != proposed:
+                    break
+                stats["accepted"] += 1
+                if finished():
+                    break
+            if streamer is not None:
+                streamer.put(torch.tensor(new_tokens))
+            if finished():
+                break
+            
+            # The cache now also holds rejected draft tokens; keep only what was accepted.
+            rejected = cache.get_seq_length() - (len(tokens) - 1)
+            if rejected:
+                cache.crop(-rejected)
+            pending = tokens[-1:]
+            remaining = max_new_tokens - (len(tokens) - prompt_length)
+            draft = self.draft(np.array(tokens, dtype=np.int64), min(self.draft_tokens, remaining - 1))
+        
+        if streamer is not None:
+            streamer.end()
+        stats["generated"] = len(tokens) - prompt_length
+        with self._lock:
+            for key, value in stats.items():
+                self.stats[key] += value
+        tracker.log_speculative(**stats)
+        return torch.tensor([tokens], device=device)
+
+
+def acceptance_rate(stats: Dict[str, int]) -> float:
+    return stats["accepted"] / stats["drafted"] if stats["drafted"] else 0.0
+
+
+def compare_speculative(bot, questions: List[str]) -> Dict:
+    """Answer `questions` greedily with and without speculation; report speed, acceptance and agreement."""
+    previous = CONFIG.do_sample, bot.speculative
+    CONFIG.do_sample = False
+    try:
+        bot.speculative = None
+        start = time.perf_counter()
+        greedy = [bot._generate([q]).responses[0] for q in questions]
+        greedy_s = time.perf_counter() - start
+        
+        decoder = previous[1] or SpeculativeDecoder()
+        bot.speculative = SpeculativeDecoder(decoder.index, decoder.draft_tokens, decoder.ngram)
+        start = time.perf_counter()
+        speculative = [bot._generate([q]).responses[0] for q in questions]
+        speculative_s = time.perf_counter() - start
+        stats = bot.speculative.stats
+    finally:
+        CONFIG.do_sample, bot.speculative = previous
+    
+    return {
+        "questions": len(questions),
+        "greedy_s": round(greedy_s, 3),
+        "speculative_s": round(speculative_s, 3),
+        "speedup": round(greedy_s / speculative_s, 3) if speculative_s else 0.0,
+        "acceptance_rate": round(acceptance_rate(stats), 4),
+        "tokens_per_pass": round(stats["generated"] / stats["passes"], 3) if stats["passes"] else 0.0,
+        "identical": sum(a == b for a, b in zip(greedy, speculative)),
+    }
@@ -0,0 +1,55 @@
+import threading
+import time
+from typing import List, Optional
+from transformers import StoppingCriteria, TextIteratorStreamer
+from transformers.generation.streamers import BaseStreamer
+
+
+class TimedTextStreamer(TextIteratorStreamer):
+    """`TextIteratorStreamer` that also records when each generated token arrived."""
+
+    def __init__(self, tokenizer, **decode_kwargs):
+        super().__init__(tokenizer, skip_prompt=True, **decode_kwargs)
+        self.token_times: List[float] = []
+
+    def put(self, value):
+        if not self.next_tokens_are_prompt:
+            self.token_times.append(time.time())
+        super().put(value)
+
+    def time_to_first_token(self, start_time: float) -> Optional[float]:
+        if not self.token_times:
+            return None
+        return self.token_times[0] - start_time
+
+    def inter_token_latency(self) -> Optional[float]:
+        if len(self.token_times) < 2:
+            return None
+        return (self.token_times[-1] - self.token_times[0]) / (len(self.token_times) - 1)
+
+
+class TokenTimer(BaseStreamer):
+    """Streamer that only notes when the first generated token arrives, to split prefill from decode."""
+
+    def __init__(self):
+        self.calls = 0
+        self.first_token_time: Optional[float] = None
+
+    def put(self, value):
+        # The first call carries the prompt; the second the first token after prefill.
+        self.calls += 1
+        if self.calls == 2:
+            self.first_token_time = time.perf_counter()
+
+    def end(self):
+        pass
+
+
+class StopOnEvent(StoppingCriteria):
+    """Stops generation once `event` is set, e.g. when the client has gone away."""
+
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return self.event.is_set()
@@ -1,8 +1,17 @@
+import time
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, patch
 
 
+def wait_until(condition, timeout: float = 1.0) -> bool:
+    """The queue slot is freed by the worker thread's completion callback, just after the response ends."""
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
 class TestChatEndpoint:
     @patch("src.api.app.bot")
     def test_chat_success(self, mock_bot):
@@ -31,3 +40,205 @@ class TestHealthEndpoint:
         
         assert response.status_code == 200
         assert "status" in response.json()
+
+
+class TestBatchedServing:
+    @patch("src.api.app.scheduler")
+    @patch("src.api.app.bot")
+    def test_chat_uses_scheduler_when_enabled(self, mock_bot, mock_scheduler):
+        mock_scheduler.chat.return_value = "Batched answer."
+        
+        from src.api.app import app
+        client = TestClient(app)
+        
+        response = client.post("/chat", json={"question": "Cancel my order"})
+        
+        assert response.status_code == 200
+        assert response.json()["response"] == "Batched answer."
+        mock_bot.chat.assert_not_called()
+
+
+class TestChatStreamEndpoint:
+    @patch("src.api.app.bot")
+    def test_stream_sends_deltas(self, mock_bot):
+        mock_bot.stream_chat.return_value = iter(["I can ", "help."])
+        
+        from src.api.app import app
+        client = TestClient(app)
+        
+        response = client.post("/chat/stream", json={"question": "Cancel my order"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert 'data: {"delta": "I can "}' in response.text
+        assert response.text.rstrip().endswith("data: [DONE]")
+    
+    @patch("src.api.app.bot")
+    def test_stream_holds_a_queue_slot(self, mock_bot):
+        from src.api.app import app, inference_queue
+        
+        def chunks():
+            assert inference_queue.active == 1
+            yield "Done."
+        
+        mock_bot.stream_chat.return_value = chunks()
+        client = TestClient(app)
+        
+        response = client.post("/chat/stream", json={"question": "Cancel my order"})
+        
+        assert 'data: {"delta": "Done."}' in response.text
+        assert wait_until(lambda: inference_queue.active == 0)
+    
+    @patch("src.api.app.bot")
+    def test_stream_error_is_sent_and_generation_closed(self, mock_bot):
+        closed = []
+        
+        def chunks():
+            try:
+                yield "I can "
+                raise RuntimeError("model crashed")
+            finally:
+                closed.append(1)
+        
+        mock_bot.stream_chat.return_value = chunks()
+        from src.api.app import app, inference_queue
+        client = TestClient(app)
+        
+        response = client.post("/chat/stream", json={"question": "Cancel my order"})
+        
+        assert "event: error" in response.text
+        assert "model crashed" in response.text
+        assert closed == [1]
+        assert wait_until(lambda: inference_queue.active == 0)
+    
+    @patch("src.api.app.inference_queue")
+    @patch("src.api.app.bot")
+    def test_stream_overload_returns_503(self, mock_bot, mock_queue):
+        from src.api.inference_queue import Overloaded
+        
+        async def overloaded(*args, **kwargs):
+            raise Overloaded("deadline", retry_after=1.2)
+        
+        mock_queue.acquire.side_effect = overloaded
+        
+        from src.api.app import app
+        client = TestClient(app)
+        
+        response = client.post("/chat/stream", json={"question": "Cancel my order"})
+        
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "2"
+        mock_bot.stream_chat.assert_not_called()
+    
+    def test_stream_without_model(self):
+        with patch("src.api.app.bot", None):
+            from src.api.app import app
+            client = TestClient(app)
+            response = client.post("/chat/stream", json={"question": "Hi"})
+            assert response.status_code == 503
+
+
+class TestSemanticCacheRoute:
+    @patch("src.api.app.semantic_cache")
+    @patch("src.api.app.bot")
+    def test_semantic_hit_skips_model(self, mock_bot, mock_cache):
+        mock_cache.lookup.return_value = "Cached answer."
+        
+        from src.api.app import app
+        client = TestClient(app)
+        
+        response = client.post("/chat", json={"question": "where's my order"})
+        
+        assert response.json()["response"] == "Cached answer."
+        mock_bot.chat.assert_not_called()
+    
+    @patch("src.api.app.semantic_cache")
+    @patch("src.api.app.bot")
+    def test_semantic_miss_stores_answer(self, mock_bot, mock_cache):
+        mock_cache.lookup.return_value = None
+        mock_bot.chat.return_value = "Fresh answer."
+        
+        from src.api.app import app
+        client = TestClient(app)
+        
+        with patch("src.api.app.CONFIG.do_sample", False):
+            response = client.post("/chat", json={"question": "where's my order"})
+        
+        assert response.json()["response"] == "Fresh answer."
+        mock_cache.add.assert_called_once_with("where's my order", "Fresh answer.")
+    
+    @patch("src.api.app.semantic_cache")
+    @patch("src.api.app.bot")
+    def test_sampled_answer_is_not_stored(self, mock_bot, mock_cache):
+        mock_cache.lookup.return_value = None
+        mock_bot.chat.return_value = "Sampled answer."
+        mock_bot.chat_batch.return_value = ["Sampled answer.", "Another sample."]
+        
+        from src.api.app import app
+        client = TestClient(app)
+        
+        with patch("src.api.app.CONFIG.do_sample", True):
+            response = client.post("/chat", json={"question": "where's my order"})
+            batch = client.post("/chat/batch", json={"questions": ["where's my order", "refund please"]})
+        
+        assert response.json()["response"] == "Sampled answer."
+        assert batch.status_code == 200
+        mock_cache.add.assert_not_called()
+
+
+class TestLoadShedding:
+    @patch("src.api.app.inference_queue")
+    @patch("src.api.app.bot")
+    def test_overload_returns_503_with_retry_after(self, mock_bot, mock_queue):
+        from src.api.inference_queue import Overloaded
+        
+        async def overloaded(*args, **kwargs):
+            raise Overloaded("queue_full", retry_after=2.5)
+        
+        mock_queue.run.side_effect = overloaded
+        
+        from src.api.app import app
+        client = TestClient(app)
+        
+        response = client.post("/chat", json={"question": "Cancel my order"})
+        
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "3"
+
+
+class TestChatBatchEndpoint:
+    @patch("src.api.app.bot")
+    def test_batch_answers_in_order(self, mock_bot):
+        mock_bot.chat_batch.side_effect = lambda qs: [f"Answer to {q}" for q in qs]
+        
+        from src.api.app import app
+        client = TestClient(app)
+        
+        response = client.post("/chat/batch", json={"questions": ["Cancel my order", "Refund"]})
+        
+        assert response.status_code == 200
+        data = response.json()["responses"]
+        assert [r["question"] for r in data] == ["Cancel my order", "Refund"]
+        assert data[1]["response"] == "Answer to Refund"
+        mock_bot.chat_batch.assert_called_once_with(["Cancel my order", "Refund"])
+    
+    @patch("src.api.app.bot")
+    def test_batch_size_limit(self, mock_bot):
+        from src.api.app import app
+        client = TestClient(app)
+        
+        with patch("src.api.app.CONFIG.max_batch_request_size", 2):
+            response = client.post("/chat/batch", json={"questions": ["a", "b", "c"]})
+        
+        assert response.status_code == 413
+        mock_bot.chat_batch.assert_not_called()
+    
+    @patch("src.api.app.bot")
+    def test_empty_batch_rejected(self, mock_bot):
+        from src.api.app import app
+        client = TestClient(app)
+        
+        response = client.post("/chat/batch", json={"questions": []})
+        
+        assert response.status_code == 422
+
@@ -0,0 +1,47 @@
+import torch
+from unittest.mock import MagicMock, patch
+from src.model.backends import current_rss_mb, model_dtype, model_load_kwargs, optimize_for_backend
+
+
+class TestModelLoadKwargs:
+    def test_default_backend(self):
+        kwargs = model_load_kwargs()
+        assert kwargs["torch_dtype"] == torch.float16
+        assert kwargs["device_map"] == "auto"
+    
+    @patch("src.model.backends.CONFIG")
+    def test_cpu_bfloat16(self, mock_config):
+        mock_config.backend = "cpu"
+        mock_config.cpu_dtype = "bfloat16"
+        mock_config.cpu_quantize_int8 = False
+        kwargs = model_load_kwargs()
+        assert kwargs["torch_dtype"] == torch.bfloat16
+        assert kwargs["device_map"] == {"": "cpu"}
+    
+    @patch("src.model.backends.CONFIG")
+    def test_int8_loads_float32(self, mock_config):
+        mock_config.backend = "cpu"
+        mock_config.cpu_dtype = "bfloat16"
+        mock_config.cpu_quantize_int8 = True
+        assert model_dtype() == torch.float32
+
+
+class TestOptimizeForBackend:
+    def test_default_backend_is_untouched(self):
+        model = MagicMock()
+        assert optimize_for_backend(model) is model
+    
+    @patch("src.model.backends.CONFIG")
+    def test_int8_quantizes_linear_layers(self, mock_config):
+        mock_config.backend = "cpu"
+        mock_config.cpu_quantize_int8 = True
+        model = torch.nn.Sequential(torch.nn.Linear(8, 8), torch.nn.ReLU(), torch.nn.Linear(8, 2))
+        
+        quantized = optimize_for_backend(model)
+        
+        assert not any(type(m) is torch.nn.Linear for m in quantized.modules())
+        assert quantized(torch.randn(1, 8)).shape == (1, 2)
+
+
+def test_current_rss_mb():
+    assert current_rss_mb() > 0
@@ -0,0 +1,82 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from src.model.batch_job import completed_count, iter_records, run_batch_job
+
+
+def make_bot():
+    bot = MagicMock()
+    bot.chat_batch.side_effect = lambda qs: [f"answer: {q}" for q in qs]
+    return bot
+
+
+@pytest.fixture
+def questions(tmp_path):
+    path = tmp_path / "in.jsonl"
+    lines = [json.dumps({"id": i, "question": "q" * (10 - i)}) for i in range(10)]
+    path.write_text("\n".join(lines) + "\n\n")
+    return path
+
+
+class TestBatchJob:
+    def test_iter_records_accepts_strings_and_instructions(self, tmp_path):
+        path = tmp_path / "in.jsonl"
+        path.write_text('"where is it"\n{"instruction": "refund", "intent": "refund"}\n')
+        
+        records = list(iter_records(path))
+        
+        assert records[0] == {"question": "where is it"}
+        assert records[1]["question"] == "refund"
+        assert records[1]["intent"] == "refund"
+    
+    def test_writes_answers_in_input_order(self, tmp_path, questions):
+        bot = make_bot()
+        output = tmp_path / "out.jsonl"
+        
+        stats = run_batch_job(bot, questions, output, batch_size=3, window_batches=2)
+        
+        rows = [json.loads(line) for line in output.read_text().splitlines()]
+        assert [r["id"] for r in rows] == list(range(10))
+        assert all(r["response"] == f"answer: {r['question']}" for r in rows)
+        assert stats["answered"] == 10
+        assert max(len(call.args[0]) for call in bot.chat_batch.call_args_list) == 3
+    
+    def test_batches_are_length_sorted_within_window(self, tmp_path, questions):
+        bot = make_bot()
+        
+        run_batch_job(bot, questions, tmp_path / "out.jsonl", batch_size=2, window_batches=5)
+        
+        first_batch = bot.chat_batch.call_args_list[0].args[0]
+        assert [len(q) for q in first_batch] == [1, 2]
+    
+    def test_resumes_after_partial_line(self, tmp_path, questions):
+        output = tmp_path / "out.jsonl"
+        run_batch_job(make_bot(), questions, output, batch_size=4)
+        lines = output.read_text().splitlines()
+        output.write_text("\n".join(lines[:6]) + "\n" + lines[6][:15])
+        
+        bot = make_bot()
+        stats = run_batch_job(bot, questions, output, batch_size=4)
+        
+        rows = [json.loads(line) for line in output.read_text().splitlines()]
+        assert stats["skipped"] == 6
+        assert stats["answered"] == 4
+        assert [r["index"] for r in rows] == list(range(10))
+    
+    def test_completed_count_missing_file(self, tmp_path):
+        assert completed_count(tmp_path / "missing.jsonl") == 0
+    
+    def test_completed_count_reads_in_chunks(self, tmp_path):
+        output = tmp_path / "out.jsonl"
+        output.write_bytes(b'{"index": 0}\n{"index": 1}\n{"index": 2, "answer": "cut of')
+        
+        assert completed_count(output, chunk_size=4) == 2
+        assert output.read_bytes() == b'{"index": 0}\n{"index": 1}\n'
+        assert completed_count(output, chunk_size=4) == 2
+    
+    def test_completed_count_without_any_newline(self, tmp_path):
+        output = tmp_path / "out.jsonl"
+        output.write_bytes(b'{"index": 0, "ans')
+        
+        assert completed_count(output, chunk_size=4) == 0
+        assert output.read_bytes() == b""
@@ -0,0 +1,59 @@
+import threading
+import pytest
+from unittest.mock import MagicMock
+from src.model.batching import BatchScheduler
+
+
+class RecordingBot:
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def chat_batch(self, questions):
+        with self.lock:
+            self.batches.append(list(questions))
+        return [f"answer: {q}" for q in questions]
+
+
+class TestBatchScheduler:
+    def test_single_request(self):
+        bot = RecordingBot()
+        scheduler = BatchScheduler(bot, window_ms=5, max_batch_size=4).start()
+        try:
+            assert scheduler.chat("Hello") == "answer: Hello"
+        finally:
+            scheduler.stop()
+        assert bot.batches == [["Hello"]]
+
+    def test_groups_requests_in_window(self):
+        bot = RecordingBot()
+        scheduler = BatchScheduler(bot, window_ms=200, max_batch_size=8)
+        futures = [scheduler.submit(f"Q{i}") for i in range(5)]
+        scheduler.start()
+        try:
+            results = [f.result(timeout=5) for f in futures]
+        finally:
+            scheduler.stop()
+        assert results == [f"answer: Q{i}" for i in range(5)]
+        assert bot.batches == [[f"Q{i}" for i in range(5)]]
+
+    def test_respects_max_batch_size(self):
+        bot = RecordingBot()
+        scheduler = BatchScheduler(bot, window_ms=200, max_batch_size=2)
+        futures = [scheduler.submit(f"Q{i}") for i in range(5)]
+        scheduler.start()
+        try:
+            [f.result(timeout=5) for f in futures]
+        finally:
+            scheduler.stop()
+        assert [len(b) for b in bot.batches] == [2, 2, 1]
+
+    def test_propagates_errors(self):
+        bot = MagicMock()
+        bot.chat_batch.side_effect = RuntimeError("boom")
+        scheduler = BatchScheduler(bot, window_ms=1).start()
+        try:
+            with pytest.raises(RuntimeError):
+                scheduler.chat("Hello")
+        finally:
+            scheduler.stop()
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.benchmark.loadgen import RequestResult, closed_loop, open_loop, run_load, summarize
+from src.benchmark.local_server import local_server
+from src.benchmark.workload import SAMPLE_QUESTIONS, load_questions, read_jsonl_questions
+
+
+def fake_client(status=200):
+    client = MagicMock()
+    client.post = AsyncMock(return_value=MagicMock(status_code=status))
+    return client
+
+
+class TestWorkload:
+    def test_reads_request_logs_and_bitext_rows(self, tmp_path):
+        path = tmp_path / "requests.jsonl"
+        path.write_text(
+            json.dumps({"question": "Where is my order?", "latency_ms": 12}) + "\n"
+            + json.dumps({"instruction": "cancel it", "intent": "cancel_order"}) + "\n\n"
+            + json.dumps({"latency_ms": 3}) + "\n"
+        )
+        
+        assert read_jsonl_questions(path) == ["Where is my order?", "cancel it"]
+    
+    def test_falls_back_to_sample_questions(self):
+        with patch("src.evaluation.snapshot.snapshot_exists", return_value=False):
+            assert load_questions(limit=3) == SAMPLE_QUESTIONS[:3]
+
+
+class TestLoadGenerator:
+    def test_closed_loop_sends_every_request(self):
+        client = fake_client()
+        
+        results = asyncio.run(closed_loop(client, ["a", "b"], n_requests=7, concurrency=3, stream=False))
+        
+        assert len(results) == 7
+        assert client.post.await_count == 7
+    
+    def test_open_loop_follows_arrival_schedule(self):
+        client = fake_client()
+        
+        results = asyncio.run(open_loop(client, ["a"], n_requests=5, rate=500.0, stream=False))
+        
+        assert len(results) == 5
+        assert all(r.ok for r in results)
+    
+    def test_summarize(self):
+        results = [RequestResult(0.0, 0.1 * (i + 1), "200", ttft_s=0.01) for i in range(9)]
+        results.append(RequestResult(0.0, 0.5, "503"))
+        
+        report = summarize(results, elapsed_s=2.0)
+        
+        assert report["successful"] == 9
+        assert report["errors"] == {"503": 1}
+        assert report["error_rate"] == 0.1
+        assert report["throughput_rps"] == 4.5
+        assert report["latency_ms"]["p50"] == pytest.approx(500.0)
+        assert report["ttft_ms"]["p99"] == pytest.approx(10.0)
+
+
+class TestLocalServer:
+    def test_stub_server_end_to_end(self):
+        with local_server("stub") as url:
+            report = run_load(url, ["Where is my order?"], n_requests=4, concurrency=2, stream=True)
+        
+        assert report["successful"] == 4
+        assert report["ttft_ms"]["p50"] < report["latency_ms"]["p50"]
+    
+    def test_metrics_stay_out_of_the_real_metrics_dir(self):
+        import src.api.app as api
+        from src.evaluation.tracking import METRICS_DIR, tracker
+        
+        metrics_file = tracker.metrics_file
+        before = metrics_file.stat().st_mtime_ns if metrics_file.exists() else None
+        saved = []
+        
+        def save():
+            saved.append((tracker.metrics_file, sorted(p.name for p in tracker.metrics_file.parent.iterdir())))
+        
+        with patch("src.api.app.CONFIG.metrics_sink", True), patch.object(tracker, "save", side_effect=save):
+            with local_server("stub") as url:
+                scratch = api.METRICS_DIR
+                run_load(url, ["Where is my order?"], n_requests=2, concurrency=1)
+        
+        assert scratch != METRICS_DIR and not scratch.exists()
+        [(saved_file, sink_files)] = saved
+        assert saved_file == scratch / metrics_file.name
+        assert len(sink_files) == 1 and sink_files[0].startswith("inferences_")
+        assert api.METRICS_DIR == METRICS_DIR
+        assert tracker.metrics_file == metrics_file
+        assert (metrics_file.stat().st_mtime_ns if metrics_file.exists() else None) == before
@@ -0,0 +1,98 @@
+import pytest
+import torch
+from unittest.mock import MagicMock, patch
+from src.config.settings import CONFIG
+from src.model.budget import RowTokenBudget, TokenBudgetPredictor, compare_budgets, evaluate_budgets
+from src.model.inference import CustomerSupportBot
+
+
+def make_rows():
+    questions, intents, lengths = [], [], []
+    for n in range(40):
+        questions += [f"check my invoice number {n}", f"I want a refund for order {n}"]
+        intents += ["check_invoice", "get_refund"]
+        lengths += [10 + n % 10, 100 + n % 40]
+    return questions, intents, lengths
+
+
+@pytest.fixture
+def predictor():
+    return TokenBudgetPredictor.fit(*make_rows(), percentile=95)
+
+
+class TestTokenBudgetPredictor:
+    def test_budgets_follow_intent_percentiles(self, predictor):
+        assert predictor.guess_intents(["please check my invoice", "refund for my order"]) == ["check_invoice", "get_refund"]
+        short, long = predictor.predict(["please check my invoice", "refund for my order"])
+        assert 18 <= short <= 19
+        assert 137 <= long <= 139
+    
+    def test_unknown_questions_get_overall_budget(self, predictor):
+        predictor.min_similarity = 0.99
+        assert predictor.guess_intents(["zzz"]) == [None]
+        assert predictor.predict(["zzz"]) == [predictor.default]
+    
+    def test_budgets_never_exceed_max_new_tokens(self, predictor):
+        with patch("src.model.budget.CONFIG.max_new_tokens", 50):
+            assert predictor.predict(["refund for my order"]) == [50]
+    
+    def test_save_and_load(self, predictor, tmp_path):
+        path = tmp_path / "budgets.npz"
+        predictor.save(path)
+        restored = TokenBudgetPredictor.load(path)
+        assert restored.summary() == predictor.summary()
+        assert restored.default == predictor.default
+    
+    def test_evaluate_budgets(self, predictor):
+        report = evaluate_budgets(predictor, *make_rows())
+        assert report["intent_accuracy"] == 1.0
+        assert report["truncated_rate"] <= 0.1
+        assert report["mean_decode_steps"] <= report["fixed_mean_decode_steps"]
+
+
+class TestRowTokenBudget:
+    def test_stops_each_row_at_its_budget(self):
+        criteria = RowTokenBudget(prompt_length=3, budgets=[2, 4])
+        assert criteria(torch.zeros((2, 5), dtype=torch.long), None).tolist() == [True, False]
+        assert criteria(torch.zeros((2, 7), dtype=torch.long), None).tolist() == [True, True]
+
+
+def rambling_bot():
+    """A bot whose model never emits eos, so it runs to whatever cap it is given."""
+    bot = CustomerSupportBot()
+    inputs = {"input_ids": torch.tensor([[1, 5]]), "attention_mask": torch.tensor([[1, 1]])}
+    mock_inputs = MagicMock()
+    mock_inputs.to.return_value = mock_inputs
+    mock_inputs.keys.return_value = inputs.keys()
+    mock_inputs.__getitem__.side_effect = inputs.__getitem__
+    mock_inputs.get.side_effect = inputs.get
+    bot.tokenizer = MagicMock()
+    bot.tokenizer.return_value = mock_inputs
+    bot.tokenizer.eos_token_id = 2
+    bot.tokenizer.decode.side_effect = lambda ids, **kwargs: "word " * len(ids)
+    bot.model = MagicMock()
+    bot.model.generate.side_effect = lambda **kwargs: torch.cat(
+        [inputs["input_ids"], torch.full((1, kwargs["max_new_tokens"]), 7)], dim=1
+    )
+    bot.device = "cpu"
+    return bot
+
+
+class TestBotBudgets:
+    def test_rambling_answers_stop_at_their_budget(self, predictor):
+        bot = rambling_bot()
+        fixed = bot._generate(["check my invoice"]).generated_tokens[0]
+        bot.budget_predictor = predictor
+        budgeted = bot._generate(["check my invoice"]).generated_tokens[0]
+        
+        assert fixed == CONFIG.max_new_tokens
+        assert budgeted == predictor.predict(["check my invoice"])[0] < fixed / 5
+    
+    def test_compare_budgets_reports_fewer_decode_steps(self, predictor):
+        bot = rambling_bot()
+        report = compare_budgets(bot, ["check my invoice", "refund for my order"], predictor)
+        
+        assert report["fixed_mean_decode_steps"] == CONFIG.max_new_tokens
+        assert report["mean_decode_steps"] < 0.6 * report["fixed_mean_decode_steps"]
+        assert report["identical"] == 0
+        assert bot.budget_predictor is None
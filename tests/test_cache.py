@@ -0,0 +1,99 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from src.evaluation.tracking import MetricsTracker
+from src.model.cache import ResponseCache, normalize_question
+
+
+@pytest.fixture
+def cache_tracker():
+    tracker = MetricsTracker()
+    with patch("src.model.cache.tracker", tracker):
+        yield tracker
+
+
+def test_normalize_question():
+    assert normalize_question("  Where is   my ORDER? ") == "where is my order"
+    assert normalize_question("cancel my order!") == normalize_question("Cancel my order")
+
+
+class TestResponseCache:
+    def test_hit_and_miss(self, cache_tracker):
+        cache = ResponseCache(max_entries=10, ttl_s=60, max_bytes=1024)
+        assert cache.get("q") is None
+        cache.put("q", "answer")
+        assert cache.get("q") == "answer"
+        assert cache_tracker.cache_stats["response"]["hits"] == 1
+        assert cache_tracker.cache_stats["response"]["misses"] == 1
+    
+    def test_lru_eviction(self, cache_tracker):
+        cache = ResponseCache(max_entries=2, ttl_s=60, max_bytes=1024)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache_tracker.cache_stats["response"]["evictions"] == 1
+    
+    def test_ttl_expiry(self, cache_tracker):
+        cache = ResponseCache(max_entries=10, ttl_s=60, max_bytes=1024)
+        with patch("src.model.cache.time.monotonic", return_value=0.0):
+            cache.put("a", "1")
+        with patch("src.model.cache.time.monotonic", return_value=61.0):
+            assert cache.get("a") is None
+        assert len(cache) == 0
+        assert cache_tracker.cache_stats["response"]["evictions"] == 1
+    
+    def test_memory_bound(self, cache_tracker):
+        cache = ResponseCache(max_entries=10, ttl_s=60, max_bytes=10)
+        cache.put("a", "12345")
+        cache.put("b", "123456")
+        assert len(cache) == 1
+        assert cache.current_bytes == 6
+        cache.put("c", "x" * 11)
+        assert cache.get("c") is None
+
+
+class TestBotResponseCache:
+    def make_bot(self):
+        from src.model.inference import CustomerSupportBot
+        
+        mock_inputs = MagicMock()
+        mock_inputs.to.return_value = mock_inputs
+        
+        bot = CustomerSupportBot()
+        bot.tokenizer = MagicMock()
+        bot.tokenizer.return_value = mock_inputs
+        bot.tokenizer.eos_token_id = 2
+        bot.tokenizer.decode.return_value = "<|assistant|>Your order is on its way."
+        bot.model = MagicMock()
+        bot.model.generate.return_value = [[1, 2, 3]]
+        bot.device = "cpu"
+        return bot
+    
+    def test_greedy_mode_reuses_answers(self, cache_tracker):
+        bot = self.make_bot()
+        with patch("src.model.inference.CONFIG.do_sample", False):
+            first = bot.chat("Where is my order?")
+            second = bot.chat("where is my order")
+        
+        assert first == second
+        assert bot.model.generate.call_count == 1
+        assert bot.model.generate.call_args[1]["do_sample"] is False
+        assert "temperature" not in bot.model.generate.call_args[1]
+    
+    def test_sampling_mode_skips_cache(self, cache_tracker):
+        bot = self.make_bot()
+        bot.chat("Where is my order?")
+        bot.chat("Where is my order?")
+        assert bot.model.generate.call_count == 2
+    
+    def test_batch_only_generates_misses(self, cache_tracker):
+        bot = self.make_bot()
+        with patch("src.model.inference.CONFIG.do_sample", False):
+            bot.chat("Where is my order?")
+            bot.tokenizer.decode.return_value = "<|assistant|>Sure."
+            responses = bot.chat_batch(["Where is my order?", "Cancel it"])
+        
+        assert responses == ["Your order is on its way.", "Sure."]
+        assert bot.model.generate.call_count == 2
@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from src.evaluation.tracking import MetricsTracker
+from src.model.coalescing import SingleFlight
+
+
+@pytest.fixture
+def flight_tracker():
+    tracker = MetricsTracker()
+    with patch("src.model.coalescing.tracker", tracker):
+        yield tracker
+
+
+class TestSingleFlight:
+    def test_sequential_calls_run_separately(self, flight_tracker):
+        flight = SingleFlight()
+        
+        async def value(v):
+            return v
+        
+        async def main():
+            return [await flight.do_async("k", lambda: value(1)), await flight.do_async("k", lambda: value(2))]
+        
+        assert asyncio.run(main()) == [1, 2]
+        assert flight._calls == {}
+        assert flight_tracker.model_metrics.coalesced_requests == 0
+    
+    def test_concurrent_coroutines_share_result(self, flight_tracker):
+        flight = SingleFlight()
+        calls = []
+        
+        async def generate():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "answer"
+        
+        async def main():
+            return await asyncio.gather(*[flight.do_async("k", generate) for _ in range(4)])
+        
+        assert asyncio.run(main()) == ["answer"] * 4
+        assert len(calls) == 1
+        assert flight_tracker.model_metrics.coalesced_requests == 3
+        assert flight._calls == {}
+    
+    def test_errors_propagate_to_followers(self, flight_tracker):
+        flight = SingleFlight()
+        
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+        
+        async def main():
+            return await asyncio.gather(*[flight.do_async("k", fail) for _ in range(3)], return_exceptions=True)
+        
+        results = asyncio.run(main())
+        assert [type(r) for r in results] == [RuntimeError] * 3
+        assert flight_tracker.model_metrics.coalesced_requests == 2
+        assert flight._calls == {}
+    
+    def test_cancelled_leader_does_not_cancel_followers(self, flight_tracker):
+        flight = SingleFlight()
+        calls = []
+        
+        async def generate():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "answer"
+        
+        async def main():
+            leader = asyncio.create_task(flight.do_async("k", generate))
+            await asyncio.sleep(0.01)
+            follower = asyncio.create_task(flight.do_async("k", generate))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return await follower
+        
+        assert asyncio.run(main()) == "answer"
+        assert len(calls) == 1
+    
+    def test_call_is_cancelled_when_every_caller_is(self, flight_tracker):
+        flight = SingleFlight()
+        cancelled = []
+        
+        async def generate():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+        
+        async def main():
+            callers = [asyncio.create_task(flight.do_async("k", generate)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            for caller in callers:
+                caller.cancel()
+            await asyncio.gather(*callers, return_exceptions=True)
+            await asyncio.sleep(0)
+        
+        asyncio.run(main())
+        assert cancelled == [1]
+        assert flight._calls == {}
@@ -1,5 +1,5 @@
 import pytest
-from src.config.settings import Config, CONFIG
+from src.config.settings import Config, CONFIG, PromptTemplate
 
 
 def test_config_defaults():
@@ -17,3 +17,17 @@ def test_config_adapter_path():
 def test_config_singleton():
     assert CONFIG.base_model == "TinyLlama/TinyLlama-1.1B-Chat-v1.0"
     assert CONFIG.repetition_penalty == 1.2
+
+
+def test_prompt_template_render():
+    template = PromptTemplate()
+    prompt = template.render("Where is my order?")
+    assert prompt.startswith(template.prefix())
+    assert "<|system|>" in prompt
+    assert "<|user|>\nWhere is my order?</s>" in prompt
+    assert prompt.endswith("<|assistant|>\n")
+
+
+def test_prompt_template_equality():
+    assert PromptTemplate() == PromptTemplate()
+    assert PromptTemplate(system="Be brief.") != PromptTemplate()
@@ -0,0 +1,94 @@
+import json
+import pytest
+import torch
+from unittest.mock import MagicMock, patch
+from src.config.settings import CONFIG
+from src.model.backends import model_dtype
+from src.model.export import EXPORT_INFO, WEIGHTS_FILE, dtype_name, export_merged_model, find_merged_model
+from src.model.fingerprint import adapter_fingerprint
+
+
+def write_export(path, adapter_path="models/customer-support-model", base_model=None, fingerprint=None, dtype=None):
+    path.mkdir(parents=True, exist_ok=True)
+    (path / WEIGHTS_FILE).write_bytes(b"")
+    with open(path / EXPORT_INFO, "w") as f:
+        json.dump({
+            "adapter_path": adapter_path,
+            "base_model": base_model or CONFIG.base_model,
+            "adapter_fingerprint": fingerprint or adapter_fingerprint(adapter_path),
+            "dtype": dtype or dtype_name(model_dtype()),
+        }, f)
+
+
+class TestFindMergedModel:
+    def test_missing_export(self, tmp_path):
+        assert find_merged_model("models/customer-support-model", tmp_path / "merged") is None
+    
+    def test_matching_export(self, tmp_path):
+        write_export(tmp_path)
+        assert find_merged_model("models/customer-support-model", tmp_path) == tmp_path
+    
+    def test_export_of_other_adapter(self, tmp_path):
+        write_export(tmp_path, adapter_path="models/other")
+        assert find_merged_model("models/customer-support-model", tmp_path) is None
+    
+    def test_export_of_other_base_model(self, tmp_path):
+        write_export(tmp_path, base_model="some/other-model")
+        assert find_merged_model("models/customer-support-model", tmp_path) is None
+    
+    def test_adapter_retrained_in_place(self, tmp_path):
+        adapter = tmp_path / "adapter"
+        adapter.mkdir()
+        (adapter / "adapter_model.safetensors").write_bytes(b"v1")
+        write_export(tmp_path / "merged", adapter_path=str(adapter))
+        assert find_merged_model(str(adapter), tmp_path / "merged") == tmp_path / "merged"
+        
+        (adapter / "adapter_model.safetensors").write_bytes(b"v2, retrained")
+        assert find_merged_model(str(adapter), tmp_path / "merged") is None
+    
+    def test_export_in_other_dtype(self, tmp_path):
+        write_export(tmp_path, dtype="float16")
+        with patch("src.model.backends.CONFIG.backend", "cpu"), patch("src.model.backends.CONFIG.cpu_dtype", "bfloat16"):
+            assert find_merged_model("models/customer-support-model", tmp_path) is None
+            write_export(tmp_path, dtype="bfloat16")
+            assert find_merged_model("models/customer-support-model", tmp_path) == tmp_path
+
+
+class TestExportMergedModel:
+    @patch("src.model.export.PeftModel")
+    @patch("src.model.export.AutoTokenizer")
+    @patch("src.model.export.AutoModelForCausalLM")
+    def test_writes_single_safetensors_checkpoint(self, mock_auto_model, mock_tokenizer, mock_peft, tmp_path):
+        merged = MagicMock()
+        mock_peft.from_pretrained.return_value.merge_and_unload.return_value = merged
+        
+        with patch("src.model.backends.CONFIG.backend", "cpu"), patch("src.model.backends.CONFIG.cpu_dtype", "bfloat16"), \
+                patch("src.model.backends.CONFIG.cpu_quantize_int8", False):
+            output = export_merged_model("adapter/path", tmp_path / "merged")
+        
+        merged.save_pretrained.assert_called_once()
+        assert merged.save_pretrained.call_args[1]["safe_serialization"] is True
+        assert mock_auto_model.from_pretrained.call_args[1]["torch_dtype"] == torch.bfloat16
+        with open(output / EXPORT_INFO) as f:
+            info = json.load(f)
+        assert info["adapter_path"] == "adapter/path"
+        assert info["dtype"] == "bfloat16"
+
+
+class TestMergedLoadPath:
+    @patch("src.model.inference.PeftModel")
+    @patch("src.model.inference.AutoTokenizer")
+    @patch("src.model.inference.AutoModelForCausalLM")
+    @patch("src.model.inference.tracker")
+    def test_load_uses_merged_checkpoint(self, mock_tracker, mock_auto_model, mock_tokenizer, mock_peft, tmp_path):
+        from src.model.inference import CustomerSupportBot
+        
+        write_export(tmp_path, adapter_path="test/path")
+        with patch("src.model.export.CONFIG.merged_model_path", tmp_path):
+            bot = CustomerSupportBot(adapter_path="test/path").load()
+        
+        mock_peft.from_pretrained.assert_not_called()
+        assert mock_auto_model.from_pretrained.call_args[0][0] == tmp_path
+        breakdown = mock_tracker.log_model_load.call_args[0][2]
+        assert {"weights_s", "tokenizer_s", "device_s"} <= set(breakdown)
+        assert bot.model is mock_auto_model.from_pretrained.return_value
@@ -0,0 +1,108 @@
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from src.evaluation.generation_cache import CachedGenerator, GenerationCache
+from src.evaluation.metrics import run_evaluation
+from src.model.fingerprint import adapter_fingerprint
+
+
+def make_bot(adapter_path):
+    bot = MagicMock(spec=["chat", "chat_batch", "adapter_path"])
+    bot.adapter_path = str(adapter_path)
+    bot.chat.side_effect = lambda q: f"Answer about {q}, happy to help."
+    bot.chat_batch.side_effect = lambda qs: [f"Answer about {q}, happy to help." for q in qs]
+    return bot
+
+
+@pytest.fixture
+def adapter(tmp_path):
+    path = tmp_path / "adapter"
+    path.mkdir()
+    (path / "adapter_model.safetensors").write_bytes(b"weights-v1")
+    (path / "adapter_config.json").write_text("{}")
+    return path
+
+
+class TestAdapterFingerprint:
+    def test_changes_with_content(self, adapter):
+        before = adapter_fingerprint(adapter)
+        (adapter / "adapter_model.safetensors").write_bytes(b"weights-v2")
+        
+        assert adapter_fingerprint(adapter) != before
+    
+    def test_missing_path_hashes_name(self, tmp_path):
+        assert adapter_fingerprint(tmp_path / "a") != adapter_fingerprint(tmp_path / "b")
+
+
+class TestCachedGenerator:
+    def test_rescoring_reuses_generations(self, tmp_path, adapter):
+        data = [
+            {"instruction": "cancel my order", "response": "I can cancel it.", "intent": "cancel_order"},
+            {"instruction": "where is my parcel", "response": "Let me check.", "intent": "track_order"},
+        ]
+        first = CachedGenerator(make_bot(adapter), GenerationCache(tmp_path / "gen.sqlite"))
+        expected = run_evaluation(first, data, batch_size=2)
+        
+        bot = make_bot(adapter)
+        second = CachedGenerator(bot, GenerationCache(tmp_path / "gen.sqlite"))
+        results = run_evaluation(second, data)
+        
+        assert results["coherent"] == expected["coherent"]
+        bot.chat.assert_not_called()
+        assert second.cache.stats() == {"hits": 2, "misses": 0, "hit_rate": 1.0}
+        assert first.cache.stats()["misses"] == 2
+    
+    def test_generation_params_in_key(self, tmp_path, adapter):
+        cache = GenerationCache(tmp_path / "gen.sqlite")
+        bot = make_bot(adapter)
+        generator = CachedGenerator(bot, cache)
+        generator.chat("refund please")
+        
+        with patch("src.evaluation.generation_cache.CONFIG.max_new_tokens", 7):
+            generator.chat("refund please")
+        with patch("src.evaluation.generation_cache.CONFIG.cpu_quantize_int8", True):
+            generator.chat("refund please")
+        with patch("src.evaluation.generation_cache.CONFIG.stop_sequences", ("</s>",)):
+            generator.chat("refund please")
+        
+        assert bot.chat.call_count == 4
+    
+    def test_refitted_token_budgets_miss(self, tmp_path, adapter):
+        budgets = tmp_path / "token_budgets.npz"
+        budgets.write_bytes(b"fit-1")
+        bot = make_bot(adapter)
+        generator = CachedGenerator(bot, GenerationCache(tmp_path / "gen.sqlite"))
+        
+        with patch("src.evaluation.generation_cache.CONFIG.token_budgets", True), \
+                patch("src.evaluation.generation_cache.CONFIG.token_budget_path", budgets):
+            generator.chat("refund please")
+            generator.chat("refund please")
+            budgets.write_bytes(b"fit-2")
+            generator.chat("refund please")
+        
+        assert bot.chat.call_count == 2
+    
+    def test_adapter_change_misses(self, tmp_path, adapter):
+        cache = GenerationCache(tmp_path / "gen.sqlite")
+        CachedGenerator(make_bot(adapter), cache).chat("refund please")
+        (adapter / "adapter_model.safetensors").write_bytes(b"retrained")
+        
+        bot = make_bot(adapter)
+        CachedGenerator(bot, cache).chat("refund please")
+        
+        bot.chat.assert_called_once()
+    
+    def test_concurrent_writers(self, tmp_path, adapter):
+        path = tmp_path / "gen.sqlite"
+        
+        def work(offset):
+            generator = CachedGenerator(make_bot(adapter), GenerationCache(path))
+            generator.chat_batch([f"question {offset + i}" for i in range(20)])
+        
+        threads = [threading.Thread(target=work, args=(n * 10,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        assert len(GenerationCache(path)) == 50
@@ -56,3 +56,181 @@ class TestChatGeneration:
         
         response = bot.chat("Test")
         assert response == "Direct response without tags"
+
+
+class TestChatBatch:
+    def test_chat_batch_pads_and_decodes_each_row(self):
+        bot = CustomerSupportBot()
+        
+        mock_inputs = MagicMock()
+        mock_inputs.to.return_value = mock_inputs
+        
+        bot.tokenizer = MagicMock()
+        bot.tokenizer.return_value = mock_inputs
+        bot.tokenizer.eos_token_id = 2
+        
+        bot.model = MagicMock()
+        bot.model.generate.return_value = [[1, 2], [3, 4]]
+        bot.tokenizer.decode.side_effect = [
+            "<|assistant|>First answer</s>",
+            "<|assistant|>Second answer<|user|>",
+        ]
+        bot.device = "cpu"
+        
+        responses = bot.chat_batch(["Q1", "Q2"])
+        
+        prompts = bot.tokenizer.call_args[0][0]
+        assert len(prompts) == 2
+        assert bot.tokenizer.call_args[1]["padding"] is True
+        assert responses == ["First answer", "Second answer"]
+
+
+class TestStreamChat:
+    def test_stream_chat_stops_at_special_marker(self):
+        import torch
+        
+        bot = CustomerSupportBot()
+        
+        mock_inputs = MagicMock()
+        mock_inputs.to.return_value = mock_inputs
+        mock_inputs.keys.return_value = []
+        
+        bot.tokenizer = MagicMock()
+        bot.tokenizer.return_value = mock_inputs
+        bot.tokenizer.eos_token_id = 2
+        pieces = {(): "", (4,): "Sure, ", (4, 5): "Sure, I can ", (4, 5, 6): "Sure, I can help.<|user|> "}
+        bot.tokenizer.decode.side_effect = lambda ids, **kw: pieces[tuple(ids)]
+        
+        def generate(streamer, **kwargs):
+            streamer.put(torch.tensor([[1, 2, 3]]))
+            for token in (4, 5, 6):
+                streamer.put(torch.tensor([token]))
+            streamer.end()
+        
+        bot.model = MagicMock()
+        bot.model.generate.side_effect = generate
+        bot.device = "cpu"
+        
+        deltas = list(bot.stream_chat("Test"))
+        
+        assert "".join(deltas) == "Sure, I can help."
+
+
+class TestPrefixCacheReuse:
+    @patch("src.model.inference.PrefixCache")
+    def test_rebuilds_prefix_cache_when_template_changes(self, mock_prefix_cache):
+        from src.config.settings import PromptTemplate
+        
+        stale = MagicMock()
+        stale.template = PromptTemplate(system="Old prompt.")
+        fresh = MagicMock()
+        fresh.encode.return_value = {"input_ids": MagicMock()}
+        mock_prefix_cache.build.return_value = fresh
+        
+        bot = CustomerSupportBot()
+        bot.tokenizer = MagicMock()
+        bot.tokenizer.eos_token_id = 2
+        bot.tokenizer.decode.return_value = "<|assistant|>Cached answer"
+        bot.model = MagicMock()
+        bot.model.generate.return_value = [[1, 2, 3]]
+        bot.device = "cpu"
+        bot.prefix_cache = stale
+        
+        response = bot.chat("Hello")
+        
+        mock_prefix_cache.build.assert_called_once()
+        assert bot.prefix_cache is fresh
+        bot.tokenizer.assert_not_called()
+        assert response == "Cached answer"
+
+
+class TestTokenAccounting:
+    def test_count_tokens_stops_at_first_eos(self):
+        import torch
+        from src.model.inference import count_tokens
+        
+        inputs = {
+            "input_ids": torch.tensor([[2, 5, 6], [7, 8, 9]]),
+            "attention_mask": torch.tensor([[0, 1, 1], [1, 1, 1]]),
+        }
+        outputs = torch.tensor([
+            [2, 5, 6, 10, 11, 2, 2],
+            [7, 8, 9, 12, 13, 14, 15],
+        ])
+        
+        prompt_tokens, generated = count_tokens(inputs, outputs, eos_token_id=2)
+        
+        assert prompt_tokens == [2, 3]
+        assert generated == [3, 4]
+    
+    @patch("src.model.inference.tracker")
+    def test_chat_logs_real_token_counts_and_phases(self, mock_tracker):
+        import torch
+        
+        bot = CustomerSupportBot()
+        inputs = {"input_ids": torch.tensor([[1, 5, 6]]), "attention_mask": torch.tensor([[1, 1, 1]])}
+        mock_inputs = MagicMock()
+        mock_inputs.to.return_value = mock_inputs
+        mock_inputs.keys.return_value = inputs.keys()
+        mock_inputs.__getitem__.side_effect = inputs.__getitem__
+        mock_inputs.get.side_effect = inputs.get
+        
+        bot.tokenizer = MagicMock()
+        bot.tokenizer.return_value = mock_inputs
+        bot.tokenizer.eos_token_id = 2
+        bot.tokenizer.decode.return_value = "<|assistant|>Sure thing"
+        bot.model = MagicMock()
+        bot.model.generate.return_value = torch.tensor([[1, 5, 6, 7, 8, 2]])
+        bot.device = "cpu"
+        
+        assert bot.chat("Hi") == "Sure thing"
+        
+        kwargs = mock_tracker.log_inference.call_args[1]
+        assert kwargs["prompt_tokens"] == 3
+        assert kwargs["tokens"] == 3
+        phases = mock_tracker.log_phases.call_args[0][0]
+        assert set(phases) == {"tokenize", "prefill", "decode", "detokenize"}
+
+
+class TestStopSequences:
+    def test_stop_savings_only_for_rows_ending_on_a_stop_sequence(self):
+        from src.model.inference import stop_savings
+        
+        texts = ["Done.<|user|>", "Ran out of budget", "Hit eos", "Late stop</s>"]
+        assert stop_savings(texts[:1] + texts[2:3], [10, 40], [150, 150], decode_steps=40) == [110, 0]
+    
+    def test_stop_savings_only_credit_steps_the_batch_skipped(self):
+        from src.model.inference import stop_savings
+        
+        texts = ["Done.<|user|>", "Ran out of budget"]
+        assert stop_savings(texts, [10, 150], [150, 150], decode_steps=150) == [0, 0]
+        assert stop_savings(["Done.<|user|>"], [10], [150], decode_steps=10) == [140]
+    
+    @patch("src.model.inference.tracker")
+    def test_generate_decodes_only_new_tokens(self, mock_tracker):
+        import torch
+        
+        bot = CustomerSupportBot()
+        inputs = {"input_ids": torch.tensor([[1, 5], [1, 6]]), "attention_mask": torch.tensor([[1, 1], [1, 1]])}
+        mock_inputs = MagicMock()
+        mock_inputs.to.return_value = mock_inputs
+        mock_inputs.keys.return_value = inputs.keys()
+        mock_inputs.__getitem__.side_effect = inputs.__getitem__
+        mock_inputs.get.side_effect = inputs.get
+        
+        bot.tokenizer = MagicMock()
+        bot.tokenizer.return_value = mock_inputs
+        bot.tokenizer.eos_token_id = 2
+        pieces = {(7, 8, 2): "Thanks<|user|>", (9, 9, 9): "Still going"}
+        bot.tokenizer.decode.side_effect = lambda ids, **kw: pieces[tuple(ids.tolist())]
+        bot.model = MagicMock()
+        bot.model.generate.return_value = torch.tensor([[1, 5, 7, 8, 2], [1, 6, 9, 9, 9]])
+        bot.device = "cpu"
+        bot.stop_criteria = MagicMock()
+        
+        with patch("src.model.inference.CONFIG.max_new_tokens", 5):
+            generation = bot._generate(["Q1", "Q2"])
+        
+        assert generation.responses == ["Thanks", "Still going"]
+        assert bot.stop_criteria in bot.model.generate.call_args[1]["stopping_criteria"]
+        mock_tracker.log_stop_savings.assert_called_once_with([2, 0])
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch
+from src.api.inference_queue import InferenceQueue, Overloaded
+from src.evaluation.tracking import MetricsTracker
+
+
+@pytest.fixture
+def queue_tracker():
+    tracker = MetricsTracker()
+    with patch("src.api.inference_queue.tracker", tracker):
+        yield tracker
+
+
+class TestInferenceQueue:
+    def test_runs_call(self, queue_tracker):
+        queue = InferenceQueue(max_concurrency=2, max_depth=4, deadline_s=5)
+        result = asyncio.run(queue.run(lambda x: x * 2, 21))
+        assert result == 42
+        assert queue.active == 0
+        assert queue.service_times["chat"] > 0
+        assert queue_tracker.model_metrics.queued_requests == 1
+    
+    def test_limits_concurrency(self, queue_tracker):
+        queue = InferenceQueue(max_concurrency=2, max_depth=10, deadline_s=5)
+        running = []
+        peak = []
+        lock = threading.Lock()
+        
+        def work():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            threading.Event().wait(0.02)
+            with lock:
+                running.pop()
+            return "ok"
+        
+        async def main():
+            return await asyncio.gather(*[queue.run(work) for _ in range(6)])
+        
+        assert asyncio.run(main()) == ["ok"] * 6
+        assert max(peak) == 2
+        assert queue.active == 0
+        assert queue.depth == 0
+    
+    def test_sheds_when_queue_full(self, queue_tracker):
+        queue = InferenceQueue(max_concurrency=1, max_depth=1, deadline_s=5)
+        release = threading.Event()
+        
+        async def main():
+            first = asyncio.create_task(queue.run(release.wait, 5))
+            await asyncio.sleep(0.01)
+            second = asyncio.create_task(queue.run(lambda: "queued"))
+            await asyncio.sleep(0.01)
+            with pytest.raises(Overloaded) as exc:
+                await queue.run(lambda: "shed")
+            release.set()
+            await asyncio.gather(first, second)
+            return exc.value
+        
+        error = asyncio.run(main())
+        assert error.reason == "queue_full"
+        assert error.retry_after >= 1
+        assert queue_tracker.model_metrics.shed_requests == 1
+        assert queue_tracker.shed_reasons["queue_full"] == 1
+    
+    def test_sheds_request_that_cannot_meet_deadline(self, queue_tracker):
+        queue = InferenceQueue(max_concurrency=1, max_depth=10, deadline_s=5)
+        queue.service_times["chat"] = 0.05
+        release = threading.Event()
+        
+        async def main():
+            first = asyncio.create_task(queue.run(release.wait, 5))
+            await asyncio.sleep(0.01)
+            with pytest.raises(Overloaded) as exc:
+                await queue.run(lambda: "late", deadline_s=0.08)
+            release.set()
+            await first
+            return exc.value
+        
+        assert asyncio.run(main()).reason == "deadline"
+        assert queue.active == 0
+        assert queue.depth == 0
+    
+    def test_cancelled_caller_keeps_slot_until_thread_finishes(self, queue_tracker):
+        queue = InferenceQueue(max_concurrency=1, max_depth=4, deadline_s=5)
+        release = threading.Event()
+        
+        async def main():
+            caller = asyncio.create_task(queue.run(release.wait, 5))
+            await asyncio.sleep(0.01)
+            caller.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await caller
+            held = queue.active
+            release.set()
+            for _ in range(100):
+                if queue.active == 0:
+                    break
+                await asyncio.sleep(0.01)
+            return held
+        
+        assert asyncio.run(main()) == 1
+        assert queue.active == 0
+    
+    def test_service_time_is_tracked_per_kind(self, queue_tracker):
+        queue = InferenceQueue(max_concurrency=1, max_depth=4, deadline_s=5)
+        asyncio.run(queue.run(lambda: "fast"))
+        chat_time = queue.service_times["chat"]
+        asyncio.run(queue.run(threading.Event().wait, 0.05, kind="batch"))
+        
+        assert queue.service_times["chat"] == chat_time
+        assert queue.service_times["batch"] >= 0.05
+        assert queue.slot_time_s > chat_time
+    
+    def test_acquired_slot_is_held_until_released(self, queue_tracker):
+        queue = InferenceQueue(max_concurrency=1, max_depth=4, deadline_s=5)
+        
+        async def main():
+            release = await queue.acquire(kind="stream")
+            assert queue.active == 1
+            waiting = asyncio.create_task(queue.run(lambda: "next"))
+            await asyncio.sleep(0.01)
+            assert queue.depth == 1
+            release()
+            release()
+            return await waiting
+        
+        assert asyncio.run(main()) == "next"
+        assert queue.active == 0
+        assert "stream" in queue.service_times
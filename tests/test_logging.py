@@ -1,5 +1,14 @@
+import json
+import logging
+import queue
 import pytest
-from src.config.logging_config import setup_logging, LOG_DIR
+from src.config.logging_config import (
+    setup_logging,
+    LOG_DIR,
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    SamplingFilter,
+)
 
 
 def test_setup_logging():
@@ -10,3 +19,35 @@ def test_setup_logging():
 
 def test_log_dir_exists():
     assert LOG_DIR.exists()
+
+
+def test_setup_logging_is_idempotent():
+    first = setup_logging("test_idempotent")
+    second = setup_logging("test_idempotent")
+    assert first is second
+    assert len(first.handlers) == 1
+    assert isinstance(first.handlers[0], NonBlockingQueueHandler)
+
+
+def test_json_formatter():
+    record = logging.LogRecord("chatbot", logging.INFO, __file__, 1, "hello %s", ("world",), None)
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["message"] == "hello world"
+    assert payload["level"] == "INFO"
+    assert payload["logger"] == "chatbot"
+
+
+def test_sampling_filter():
+    sampler = SamplingFilter({logging.DEBUG: 0.0})
+    debug = logging.LogRecord("chatbot", logging.DEBUG, __file__, 1, "noisy", None, None)
+    info = logging.LogRecord("chatbot", logging.INFO, __file__, 1, "kept", None, None)
+    assert sampler.filter(debug) is False
+    assert sampler.filter(info) is True
+
+
+def test_queue_handler_drops_when_full():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    record = logging.LogRecord("chatbot", logging.INFO, __file__, 1, "msg", None, None)
+    handler.handle(record)
+    handler.handle(record)
+    assert handler.dropped == 1
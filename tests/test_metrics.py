@@ -3,6 +3,8 @@ from src.evaluation.metrics import (
     evaluate_response_length,
     evaluate_keyword_overlap,
     evaluate_coherence,
+    evaluate_rouge_l,
+    evaluate_bleu,
 )
 
 
@@ -53,3 +55,29 @@ class TestCoherence:
     def test_repetitive_chars(self):
         response = "aaaaaaaaaa"
         assert evaluate_coherence(response) == 0.0
+
+
+class TestRougeL:
+    def test_identical(self):
+        assert evaluate_rouge_l("I can help you", "i can help you") == 1.0
+    
+    def test_subsequence(self):
+        score = evaluate_rouge_l("I will help you today", "I help you")
+        assert score == pytest.approx(2 * (3 / 5) * 1.0 / (3 / 5 + 1.0))
+    
+    def test_empty(self):
+        assert evaluate_rouge_l("", "hello") == 0.0
+
+
+class TestBleu:
+    def test_identical(self):
+        assert evaluate_bleu("please track my order now", "please track my order now") == pytest.approx(1.0)
+    
+    def test_no_unigram_match(self):
+        assert evaluate_bleu("foo bar", "hello world") == 0.0
+    
+    def test_short_candidate_penalized(self):
+        assert evaluate_bleu("track my order", "please track my order now") < evaluate_bleu(
+            "please track my order", "please track my order now"
+        )
+
@@ -6,6 +6,7 @@ from src.evaluation.metrics import (
     evaluate_keyword_overlap,
     evaluate_coherence,
     run_evaluation,
+    length_buckets,
 )
 
 
@@ -104,3 +105,41 @@ class TestRunEvaluation:
         results = run_evaluation(mock_bot, test_data)
         
         assert results["coherent"] == 0
+
+
+class TestBatchedEvaluation:
+    def _data(self):
+        return [
+            {"instruction": "where is my very late order now", "response": "Let me check your order.", "intent": "track_order"},
+            {"instruction": "cancel", "response": "I can cancel it for you.", "intent": "cancel_order"},
+            {"instruction": "I want a refund please", "response": "I can help with your refund.", "intent": "refund"},
+        ]
+    
+    def test_length_buckets_sorted_by_length(self):
+        buckets = length_buckets(self._data(), batch_size=2)
+        
+        assert [len(b) for b in buckets] == [2, 1]
+        assert buckets[0][0]["intent"] == "cancel_order"
+        assert buckets[1][0]["intent"] == "track_order"
+    
+    def test_batched_matches_sequential(self):
+        bot = MagicMock(spec=["chat", "chat_batch"])
+        bot.chat.side_effect = lambda q: f"Here is help about {q}."
+        bot.chat_batch.side_effect = lambda qs: [f"Here is help about {q}." for q in qs]
+        
+        sequential = run_evaluation(bot, self._data())
+        batched = run_evaluation(bot, self._data(), batch_size=2)
+        
+        assert bot.chat_batch.call_count == 2
+        assert batched["coherent"] == sequential["coherent"]
+        assert batched["by_intent"] == sequential["by_intent"]
+        assert batched["avg_keyword_score"] == pytest.approx(sequential["avg_keyword_score"])
+    
+    def test_progress_reported_per_bucket(self):
+        bot = MagicMock(spec=["chat_batch"])
+        bot.chat_batch.side_effect = lambda qs: ["Sure, I can help with that."] * len(qs)
+        progress = MagicMock()
+        
+        run_evaluation(bot, self._data(), batch_size=2, progress=progress)
+        
+        assert [c.args[:2] for c in progress.call_args_list] == [(2, 3), (3, 3)]
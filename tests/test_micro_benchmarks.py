@@ -0,0 +1,35 @@
+from src.benchmark.micro import compare, environment_mismatch, load_baseline, measure, run_suite, save_baseline
+
+
+def results(**relative):
+    return {"stages": {name: {"best_us": value * 10, "relative": value} for name, value in relative.items()}}
+
+
+class TestMicroBenchmarks:
+    def test_measure_returns_best_and_median(self):
+        best, median = measure(lambda: sum(range(100)), min_time_s=0.001, repeat=3)
+        
+        assert 0 < best <= median
+    
+    def test_compare_flags_regressions_beyond_threshold(self):
+        rows = compare(results(tokenize=1.5, forward=1.1, new_stage=1.0), results(tokenize=1.0, forward=1.0), threshold=0.3)
+        
+        by_stage = {row["stage"]: row for row in rows}
+        assert by_stage["tokenize"]["regressed"]
+        assert not by_stage["forward"]["regressed"]
+        assert "new_stage" not in by_stage
+    
+    def test_environment_mismatch_ignores_python_patch_release(self):
+        dev = {"python": "3.11.7", "torch": "2.14.1+cu130", "machine": "x86_64"}
+        ci = {"python": "3.11.9", "torch": "2.14.1+cpu", "machine": "x86_64"}
+        
+        assert environment_mismatch(dev, dev) == []
+        assert environment_mismatch(ci, dev) == ["torch 2.14.1+cu130 -> 2.14.1+cpu"]
+    
+    def test_suite_runs_on_cpu(self, tmp_path):
+        current = run_suite(only=["prompt", "forward", "postprocess"], min_time_s=0.001, repeat=2)
+        save_baseline(current, tmp_path / "baseline.json")
+        
+        assert set(current["stages"]) == {"prompt", "forward", "postprocess"}
+        assert load_baseline(tmp_path / "baseline.json")["stages"]["forward"]["relative"] > 0
+        assert not any(row["regressed"] for row in compare(current, current))
@@ -0,0 +1,59 @@
+import pytest
+import torch
+from transformers import AutoTokenizer, LlamaConfig, LlamaForCausalLM
+from src.config.settings import PromptTemplate
+from src.model.prefix_cache import PrefixCache
+
+
+@pytest.fixture(scope="module")
+def tiny_model():
+    torch.manual_seed(0)
+    config = LlamaConfig(
+        vocab_size=32000, hidden_size=32, intermediate_size=64,
+        num_hidden_layers=2, num_attention_heads=4, num_key_value_heads=4,
+    )
+    return LlamaForCausalLM(config).eval()
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    return AutoTokenizer.from_pretrained("models/customer-support-model")
+
+
+def greedy(model, **inputs):
+    return model.generate(**inputs, max_new_tokens=8, do_sample=False, pad_token_id=2)
+
+
+class TestPrefixCache:
+    def test_build(self, tiny_model, tokenizer):
+        template = PromptTemplate()
+        cache = PrefixCache.build(tiny_model, tokenizer, template)
+        assert cache.template == template
+        assert cache.input_ids == tokenizer(template.prefix()).input_ids
+        assert cache.past_key_values.get_seq_length() == len(cache.input_ids)
+
+    def test_matches_uncached_generation(self, tiny_model, tokenizer):
+        template = PromptTemplate()
+        cache = PrefixCache.build(tiny_model, tokenizer, template)
+        prompt = template.render("Where is my order?")
+        
+        plain = greedy(tiny_model, **tokenizer(prompt, return_tensors="pt"))
+        cached = greedy(tiny_model, **cache.encode(tokenizer, [prompt], "cpu"))
+        
+        assert torch.equal(plain, cached)
+
+    def test_batch_matches_single_requests(self, tiny_model, tokenizer):
+        template = PromptTemplate()
+        cache = PrefixCache.build(tiny_model, tokenizer, template)
+        prompts = [template.render("Refund?"), template.render("I want to cancel my order please")]
+        
+        batched = greedy(tiny_model, **cache.encode(tokenizer, prompts, "cpu"))
+        
+        for prompt, row in zip(prompts, batched):
+            single = greedy(tiny_model, **cache.encode(tokenizer, [prompt], "cpu"))[0]
+            assert row[-8:].tolist() == single[-8:].tolist()
+
+    def test_mismatched_prefix_returns_none(self, tiny_model, tokenizer):
+        cache = PrefixCache.build(tiny_model, tokenizer, PromptTemplate())
+        other = PromptTemplate(system="Something else.").render("Hi")
+        assert cache.encode(tokenizer, [other], "cpu") is None
@@ -0,0 +1,67 @@
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from src.evaluation.prometheus import render_prometheus
+from src.evaluation.tracking import MetricsTracker
+
+
+def sample_value(text, prefix):
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{prefix} not found")
+
+
+class TestRenderPrometheus:
+    def make_tracker(self):
+        tracker = MetricsTracker()
+        tracker.log_model_load("models/customer-support-model", 2.0, {"weights_s": 1.5})
+        tracker.log_inference("Q1", "one two three", 0.5, tokens=3, prompt_tokens=20)
+        tracker.log_inference("Q2", "one", 1.5, tokens=1, prompt_tokens=10)
+        tracker.log_cache_event("response", "hits")
+        tracker.log_cache_event("response", "misses", 3)
+        tracker.log_shed("queue_full")
+        tracker.log_error()
+        return tracker
+    
+    def test_histogram_is_cumulative(self):
+        text = render_prometheus(self.make_tracker())
+        buckets = [
+            float(line.rsplit(" ", 1)[1])
+            for line in text.splitlines()
+            if line.startswith("chatbot_request_latency_seconds_bucket")
+        ]
+        assert buckets == sorted(buckets)
+        assert buckets[-1] == 2
+        assert 'le="+Inf"' in text
+        assert sample_value(text, "chatbot_request_latency_seconds_sum") == pytest.approx(2.0)
+    
+    def test_counters_and_gauges(self):
+        text = render_prometheus(self.make_tracker())
+        assert sample_value(text, "chatbot_prompt_tokens_total") == 30
+        assert sample_value(text, "chatbot_generated_tokens_total") == 4
+        assert sample_value(text, "chatbot_tokens_per_second") == pytest.approx(2.0)
+        assert sample_value(text, "chatbot_errors_total") == 1
+        assert sample_value(text, "chatbot_cache_hit_ratio") == 0.25
+        assert sample_value(text, "chatbot_model_load_seconds") == 2.0
+        assert 'reason="queue_full"' in text
+    
+    def test_labelled_by_adapter(self):
+        text = render_prometheus(self.make_tracker())
+        samples = [line for line in text.splitlines() if not line.startswith("#")]
+        assert all('adapter="models/customer-support-model"' in line for line in samples)
+    
+    def test_escapes_label_values(self):
+        tracker = MetricsTracker()
+        tracker.log_model_load('odd"path\\x', 1.0)
+        assert 'adapter="odd\\"path\\\\x"' in render_prometheus(tracker)
+
+
+def test_prometheus_endpoint():
+    with patch("src.api.app.bot", None):
+        from src.api.app import app
+        client = TestClient(app)
+        response = client.get("/metrics/prometheus")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE chatbot_request_latency_seconds histogram" in response.text
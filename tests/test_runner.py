@@ -0,0 +1,82 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from src.evaluation.metrics import run_evaluation
+from src.evaluation.runner import EvaluationRunner, merge_results, shard_path
+
+
+def make_data(n):
+    intents = ["cancel_order", "track_order", "refund"]
+    return [
+        {
+            "instruction": f"question number {i} " + "word " * (i % 4),
+            "response": f"Here is the answer to question {i}.",
+            "intent": intents[i % 3],
+        }
+        for i in range(n)
+    ]
+
+
+def make_bot():
+    bot = MagicMock(spec=["chat", "chat_batch"])
+    bot.chat.side_effect = lambda q: f"Here is the answer to {q}."
+    bot.chat_batch.side_effect = lambda qs: [f"Here is the answer to {q}." for q in qs]
+    return bot
+
+
+class TestEvaluationRunner:
+    def test_merged_results_match_run_evaluation(self, tmp_path):
+        data = make_data(10)
+        
+        expected = run_evaluation(make_bot(), data)
+        results = EvaluationRunner(tmp_path, shard_size=3).run(data, bot=make_bot())
+        
+        assert results == expected
+        assert len(list(tmp_path.glob("shard_*.json"))) == 4
+    
+    def test_batched_shards_match_run_evaluation(self, tmp_path):
+        data = make_data(7)
+        
+        expected = run_evaluation(make_bot(), data)
+        results = EvaluationRunner(tmp_path, shard_size=4, batch_size=3).run(data, bot=make_bot())
+        
+        assert results == expected
+    
+    def test_resume_skips_completed_shards(self, tmp_path):
+        data = make_data(9)
+        runner = EvaluationRunner(tmp_path, shard_size=3)
+        runner.run(data, bot=make_bot())
+        shard_path(tmp_path, 1).unlink()
+        
+        bot = make_bot()
+        results = runner.run(data, bot=bot)
+        
+        assert bot.chat.call_count == 3
+        assert results == merge_results(tmp_path)
+        assert results["total"] == 9
+    
+    def test_changed_test_set_rejected(self, tmp_path):
+        EvaluationRunner(tmp_path, shard_size=3).run(make_data(6), bot=make_bot())
+        
+        with pytest.raises(ValueError):
+            EvaluationRunner(tmp_path, shard_size=3).run(make_data(7), bot=make_bot())
+    
+    def test_changed_generation_config_starts_over(self, tmp_path):
+        data = make_data(6)
+        EvaluationRunner(tmp_path, shard_size=3).run(data, bot=make_bot())
+        
+        bot = make_bot()
+        with patch("src.evaluation.generation_cache.CONFIG.max_new_tokens", 7):
+            EvaluationRunner(tmp_path, shard_size=3).run(data, bot=bot)
+        
+        assert bot.chat.call_count == 6
+    
+    def test_progress_counts_resumed_samples(self, tmp_path):
+        data = make_data(6)
+        runner = EvaluationRunner(tmp_path, shard_size=3)
+        runner.run(data, bot=make_bot())
+        shard_path(tmp_path, 0).unlink()
+        progress = MagicMock()
+        
+        runner.run(data, bot=make_bot(), progress=progress)
+        
+        assert progress.call_args.args[:2] == (6, 6)
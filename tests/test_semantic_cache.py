@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from unittest.mock import patch
+from src.evaluation.tracking import MetricsTracker
+from src.model.semantic_cache import HashingEncoder, SemanticCache, load_encoder
+
+
+@pytest.fixture
+def cache_tracker():
+    tracker = MetricsTracker()
+    with patch("src.model.semantic_cache.tracker", tracker):
+        yield tracker
+
+
+class TestHashingEncoder:
+    def test_unit_vectors(self):
+        vectors = HashingEncoder(dim=64).encode(["Where is my order?", ""])
+        assert vectors.shape == (2, 64)
+        assert np.linalg.norm(vectors[0]) == pytest.approx(1.0)
+    
+    def test_paraphrases_are_closer(self):
+        a, b, c = HashingEncoder().encode([
+            "where is my order",
+            "where is my order right now?",
+            "I need to update my billing address",
+        ])
+        assert a @ b > a @ c
+    
+    def test_unavailable_model_falls_back_to_hashing(self):
+        with patch("src.model.semantic_cache.TransformerEncoder", side_effect=OSError("offline")):
+            encoder = load_encoder("sentence-transformers/all-MiniLM-L6-v2")
+        assert isinstance(encoder, HashingEncoder)
+
+
+class TestSemanticCache:
+    def test_hit_above_threshold(self, cache_tracker):
+        cache = SemanticCache(threshold=0.8, max_entries=10)
+        cache.add("Where is my order?", "It is on its way.")
+        assert cache.lookup("where is my order") == "It is on its way."
+        assert cache.lookup("How do I change my password?") is None
+        stats = cache_tracker.cache_summary()["semantic"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert "avg_lookup_ms" in stats
+    
+    def test_lexical_near_duplicates_with_other_content_words_miss(self, cache_tracker):
+        cache = SemanticCache(threshold=0.8, max_entries=10)
+        cache.add("I need to update my shipping address", "Shipping answer.")
+        cache.add("I would like to cancel my order", "Cancel answer.")
+        assert cache.lookup("I need to update my billing address") is None
+        assert cache.lookup("I would not like to cancel my order") is None
+        assert cache.lookup("i need to update my shipping address!") == "Shipping answer."
+    
+    def test_evicts_least_recently_used(self, cache_tracker):
+        cache = SemanticCache(threshold=0.99, max_entries=2)
+        cache.add("cancel my order", "A")
+        cache.add("track my package", "B")
+        cache.lookup("cancel my order")
+        cache.add("reset my password", "C")
+        assert len(cache) == 2
+        assert cache.lookup("track my package") is None
+        assert cache.lookup("cancel my order") == "A"
+        assert cache_tracker.cache_stats["semantic"]["evictions"] == 1
+    
+    def test_snapshot_roundtrip(self, cache_tracker, tmp_path):
+        cache = SemanticCache(threshold=0.9, max_entries=10)
+        cache.add("cancel my order", "Sure, I can cancel it.")
+        path = tmp_path / "semantic.npz"
+        cache.save(path)
+        
+        restored = SemanticCache(threshold=0.9, max_entries=10)
+        assert restored.restore(path) == 1
+        assert restored.lookup("Cancel my order!") == "Sure, I can cancel it."
+    
+    def test_restore_rejects_other_dimension(self, cache_tracker, tmp_path):
+        cache = SemanticCache(threshold=0.9, max_entries=10, encoder=HashingEncoder(dim=32))
+        cache.add("cancel my order", "A")
+        path = tmp_path / "semantic.npz"
+        cache.save(path)
+        with pytest.raises(ValueError):
+            SemanticCache(threshold=0.9, max_entries=10).restore(path)
+    
+    def test_restore_rejects_other_namespace(self, cache_tracker, tmp_path):
+        cache = SemanticCache(threshold=0.9, max_entries=10, namespace="adapter-a")
+        cache.add("cancel my order", "A")
+        path = tmp_path / "semantic.npz"
+        cache.save(path)
+        with pytest.raises(ValueError):
+            SemanticCache(threshold=0.9, max_entries=10, namespace="adapter-b").restore(path)
+        assert SemanticCache(threshold=0.9, max_entries=10, namespace="adapter-a").restore(path) == 1
@@ -0,0 +1,63 @@
+import json
+from src.evaluation.sink import MetricsSink
+from src.evaluation.tracking import InferenceMetrics, MetricsTracker
+
+
+def read_records(directory):
+    records = []
+    for path in sorted(directory.glob("*.jsonl")):
+        records += [json.loads(line) for line in path.read_text().splitlines()]
+    return records
+
+
+class TestMetricsSink:
+    def test_writes_batches_off_thread(self, tmp_path):
+        sink = MetricsSink(tmp_path, flush_interval_s=0.01).start()
+        for i in range(5):
+            sink.submit({"i": i})
+        sink.stop()
+        
+        assert [r["i"] for r in read_records(tmp_path)] == list(range(5))
+        assert sink.written == 5
+        files = list(tmp_path.glob("inferences_*.jsonl"))
+        assert len(files) == 1
+    
+    def test_serializes_dataclasses(self, tmp_path):
+        sink = MetricsSink(tmp_path)
+        sink.start()
+        sink.submit(InferenceMetrics("2024-01-01", "Q", 5, 10.0, 3))
+        sink.stop()
+        assert read_records(tmp_path)[0]["question"] == "Q"
+    
+    def test_bounded_buffer_drops_oldest(self, tmp_path):
+        sink = MetricsSink(tmp_path, buffer_size=3, batch_size=100)
+        for i in range(5):
+            sink.submit({"i": i})
+        assert sink.dropped == 2
+        sink.stop()
+        assert [r["i"] for r in read_records(tmp_path)] == [2, 3, 4]
+    
+    def test_size_based_rotation(self, tmp_path):
+        sink = MetricsSink(tmp_path, max_bytes=50, batch_size=1)
+        for i in range(6):
+            sink.submit({"payload": "x" * 20, "i": i})
+            sink._flush()
+        sink.stop()
+        
+        files = sorted(tmp_path.glob("*.jsonl"))
+        assert len(files) > 1
+        assert sorted(r["i"] for r in read_records(tmp_path)) == list(range(6))
+
+
+class TestTrackerSink:
+    def test_log_inference_feeds_sink(self, tmp_path):
+        tracker = MetricsTracker()
+        sink = MetricsSink(tmp_path)
+        tracker.attach_sink(sink)
+        tracker.log_inference("Hello", "Hi there", 0.25)
+        sink.stop()
+        
+        records = read_records(tmp_path)
+        assert records[0]["question"] == "Hello"
+        assert records[0]["latency_ms"] == 250.0
+        assert tracker.get_summary()["sink"] == {"written": 1, "dropped": 0}
@@ -0,0 +1,72 @@
+import pytest
+from collections import Counter
+from unittest.mock import patch
+from datasets import Dataset
+from src.evaluation.metrics import load_test_data
+from src.evaluation.snapshot import (
+    create_snapshot,
+    load_snapshot,
+    sample_snapshot,
+    snapshot_exists,
+    stratified_indices,
+    validate_snapshot,
+)
+
+
+def fake_dataset():
+    intents = ["cancel_order"] * 60 + ["refund"] * 30 + ["track_order"] * 10
+    return {
+        "train": Dataset.from_dict({
+            "instruction": [f"question {i}" for i in range(len(intents))],
+            "response": [f"answer {i}" for i in range(len(intents))],
+            "intent": intents,
+            "category": ["ORDER"] * len(intents),
+        })
+    }
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = tmp_path / "bitext"
+    with patch("datasets.load_dataset", return_value=fake_dataset()):
+        create_snapshot(path)
+    return path
+
+
+class TestSnapshot:
+    def test_create_snapshot_writes_index(self, snapshot):
+        dataset, index = load_snapshot(snapshot)
+        
+        assert snapshot_exists(snapshot)
+        assert dataset.column_names == ["instruction", "response", "intent"]
+        assert len(index["refund"]) == 30
+        assert dataset[index["track_order"][0]]["intent"] == "track_order"
+    
+    def test_stratified_sample_keeps_intent_shares(self, snapshot):
+        rows = sample_snapshot(20, path=snapshot)
+        
+        assert Counter(r["intent"] for r in rows) == {"cancel_order": 12, "refund": 6, "track_order": 2}
+    
+    def test_sample_is_seeded(self, snapshot):
+        assert sample_snapshot(10, seed=1, path=snapshot) == sample_snapshot(10, seed=1, path=snapshot)
+        assert sample_snapshot(10, seed=1, path=snapshot) != sample_snapshot(10, seed=2, path=snapshot)
+    
+    def test_stratified_indices_rounding(self):
+        index = {"a": list(range(5)), "b": list(range(5, 10)), "c": list(range(10, 15))}
+        
+        assert len(stratified_indices(index, 4)) == 4
+        assert len(stratified_indices(index, 100)) == 15
+    
+    def test_validate_snapshot(self, snapshot):
+        assert validate_snapshot(snapshot) == {"rows": 100, "intents": 3}
+        with pytest.raises(ValueError):
+            validate_snapshot(snapshot, min_per_intent=20)
+    
+    def test_load_test_data_uses_snapshot_offline(self, snapshot):
+        with patch("src.evaluation.snapshot.CONFIG.dataset_snapshot_path", snapshot), \
+                patch("src.evaluation.metrics.load_dataset") as mock_load:
+            rows = load_test_data(n_samples=10)
+        
+        mock_load.assert_not_called()
+        assert len(rows) == 10
+        assert set(rows[0]) == {"instruction", "response", "intent"}
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from unittest.mock import patch
+from src.evaluation.tracking import MetricsTracker
+from src.model.speculative import NgramIndex, SpeculativeDecoder, acceptance_rate, draft_from_context
+
+
+class TestNgramIndex:
+    def test_drafts_first_continuation_within_one_answer(self):
+        index = NgramIndex.build([[1, 2, 3, 4, 5], [9, 1, 2, 7], [6, 7, 8]], n=2)
+        assert index.draft(np.array([0, 1, 2]), k=3) == [3, 4, 5]
+        assert index.draft(np.array([4, 5]), k=3) == []  # end of an answer
+        assert index.draft(np.array([5, 9]), k=3) == []  # spans two answers
+        assert index.draft(np.array([6, 7]), k=5) == [8]
+    
+    def test_save_and_load(self, tmp_path):
+        index = NgramIndex.build([[1, 2, 3, 4], [2, 3, 9]], n=2)
+        index.save(tmp_path / "index.npz")
+        restored = NgramIndex.load(tmp_path / "index.npz")
+        assert len(restored) == len(index)
+        assert restored.draft(np.array([2, 3]), k=2) == index.draft(np.array([2, 3]), k=2) == [4]
+
+
+def test_draft_from_context_uses_latest_match():
+    context = np.array([5, 6, 7, 8, 5, 6, 9, 1, 5, 6])
+    assert draft_from_context(context, n=3, k=2) == [9, 1]
+    assert draft_from_context(np.array([1, 2, 3]), n=3, k=2) == []
+
+
+@pytest.fixture(scope="module")
+def bot():
+    from src.benchmark.local_server import tiny_bot
+    return tiny_bot()
+
+
+class TestSpeculativeDecoder:
+    @pytest.mark.parametrize("penalty", [1.0, 1.2])
+    def test_matches_greedy_generate(self, bot, penalty):
+        import torch
+        
+        tracker = MetricsTracker()
+        questions = ["Where is my package?", "I want to cancel order 123 order 123 order 123"]
+        for question in questions:
+            inputs = bot._encode([question])
+            with torch.no_grad():
+                expected = bot.model.generate(
+                    **bot._encode([question]), max_new_tokens=40, do_sample=False,
+                    repetition_penalty=penalty, pad_token_id=bot.tokenizer.eos_token_id,
+                )
+            # Drafting from the reference output makes most drafts right, and the rest are corrected.
+            answer = expected[0, inputs["input_ids"].shape[1]:].tolist()
+            decoder = SpeculativeDecoder(NgramIndex.build([answer[:10], answer[20:]], n=2), draft_tokens=4, ngram=2)
+            with patch("src.model.speculative.tracker", tracker):
+                outputs = decoder.generate(
+                    bot.model, inputs, max_new_tokens=40, eos_token_id=bot.tokenizer.eos_token_id,
+                    repetition_penalty=penalty,
+                )
+            assert outputs.tolist() == expected.tolist()
+        
+        assert decoder.stats["generated"] / decoder.stats["passes"] > 1
+        assert tracker.model_metrics.speculative_acceptance_rate == pytest.approx(acceptance_rate(tracker.speculative_totals))
+    
+    def test_bot_uses_it_for_single_greedy_requests(self, bot):
+        with patch("src.model.inference.CONFIG.do_sample", False), patch("src.model.inference.CONFIG.max_new_tokens", 24):
+            expected = bot._generate(["How do I get a refund?"]).responses
+            bot.speculative = SpeculativeDecoder()
+            try:
+                assert bot._generate(["How do I get a refund?"]).responses == expected
+                assert bot.speculative.stats["passes"] > 0
+            finally:
+                bot.speculative = None
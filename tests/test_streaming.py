@@ -0,0 +1,33 @@
+import threading
+import torch
+from unittest.mock import MagicMock
+from src.model.streaming import StopOnEvent, TimedTextStreamer
+
+
+class TestTimedTextStreamer:
+    def test_records_generated_token_times(self):
+        tokenizer = MagicMock()
+        tokenizer.decode.return_value = "hello "
+        streamer = TimedTextStreamer(tokenizer)
+        
+        streamer.put(torch.tensor([[1, 2, 3]]))  # prompt
+        streamer.put(torch.tensor([4]))
+        streamer.put(torch.tensor([5]))
+        
+        assert len(streamer.token_times) == 2
+        assert streamer.time_to_first_token(streamer.token_times[0] - 0.5) == 0.5
+        assert streamer.inter_token_latency() >= 0.0
+    
+    def test_no_tokens(self):
+        streamer = TimedTextStreamer(MagicMock())
+        assert streamer.time_to_first_token(0.0) is None
+        assert streamer.inter_token_latency() is None
+
+
+class TestStopOnEvent:
+    def test_stops_when_event_set(self):
+        event = threading.Event()
+        criteria = StopOnEvent(event)
+        assert criteria(None, None) is False
+        event.set()
+        assert criteria(None, None) is True
@@ -1,5 +1,5 @@
 import pytest
-from src.evaluation.tracking import MetricsTracker, InferenceMetrics
+from src.evaluation.tracking import MetricsTracker, InferenceMetrics, LatencyHistogram
 
 
 class TestMetricsTracker:
@@ -49,3 +49,121 @@ class TestInferenceMetrics:
         )
         assert metric.question == "Test"
         assert metric.latency_ms == 100.0
+
+
+class TestStreamMetrics:
+    def test_log_stream(self):
+        tracker = MetricsTracker()
+        tracker.log_stream(0.1, 0.02)
+        tracker.log_stream(0.3, None)
+        assert tracker.model_metrics.streamed_inferences == 2
+        assert tracker.model_metrics.avg_ttft_ms == pytest.approx(200.0)
+        assert tracker.model_metrics.avg_inter_token_ms == pytest.approx(20.0)
+    
+    def test_log_stream_without_tokens(self):
+        tracker = MetricsTracker()
+        tracker.log_stream(None, None)
+        assert tracker.model_metrics.streamed_inferences == 0
+
+
+class TestCacheMetrics:
+    def test_cache_summary(self):
+        tracker = MetricsTracker()
+        tracker.log_cache_event("response", "hits")
+        tracker.log_cache_event("response", "misses", 3)
+        summary = tracker.get_summary()["caches"]["response"]
+        assert summary["hits"] == 1
+        assert summary["misses"] == 3
+        assert summary["hit_rate"] == 0.25
+
+
+class TestModelLoadBreakdown:
+    def test_log_model_load_breakdown(self):
+        tracker = MetricsTracker()
+        tracker.log_model_load("/path", 3.0, {"weights_s": 2.5, "tokenizer_s": 0.5})
+        assert tracker.get_summary()["model"]["load_breakdown"]["weights_s"] == 2.5
+
+
+class TestLatencyHistogram:
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 1001):
+            histogram.observe(float(value))
+        assert histogram.count == 1000
+        assert histogram.percentile(0.5) == pytest.approx(500, rel=0.15)
+        assert histogram.percentile(0.99) == pytest.approx(990, rel=0.15)
+        assert histogram.percentile(1.0) <= histogram.max == 1000
+    
+    def test_empty(self):
+        assert LatencyHistogram().percentile(0.5) == 0.0
+
+
+class TestBoundedHistory:
+    def test_history_is_bounded(self):
+        tracker = MetricsTracker(history_size=5)
+        for i in range(20):
+            tracker.log_inference(f"Q{i}", "answer", 0.1 * (i + 1))
+        
+        assert len(tracker.inference_history) == 5
+        assert tracker.inference_history[0].question == "Q15"
+        assert tracker.model_metrics.total_inferences == 20
+        assert tracker.model_metrics.avg_latency_ms == pytest.approx(1050.0)
+    
+    def test_summary_reports_recent_and_percentiles(self):
+        tracker = MetricsTracker()
+        for i in range(15):
+            tracker.log_inference(f"Q{i}", "abcd", 0.01)
+        summary = tracker.get_summary()
+        assert [m["question"] for m in summary["recent_inferences"]] == [f"Q{i}" for i in range(5, 15)]
+        assert summary["stats"]["avg_response_length"] == 4
+        assert summary["stats"]["latency_ms"]["p50"] == pytest.approx(10, rel=0.15)
+    
+    def test_thread_safe_counts(self):
+        import threading
+        
+        tracker = MetricsTracker(history_size=10)
+        threads = [
+            threading.Thread(target=lambda: [tracker.log_inference("Q", "R", 0.01) for _ in range(200)])
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert tracker.model_metrics.total_inferences == 1600
+        assert tracker.latency_histogram.count == 1600
+
+
+class TestPhaseMetrics:
+    def test_log_phases(self):
+        tracker = MetricsTracker()
+        tracker.log_phases({"prefill": 0.02, "decode": 0.1})
+        tracker.log_phases({"prefill": 0.04, "decode": 0.3})
+        avg = tracker.get_summary()["stats"]["avg_phase_ms"]
+        assert avg["prefill"] == pytest.approx(30.0)
+        assert avg["decode"] == pytest.approx(200.0)
+    
+    def test_tokens_per_second(self):
+        tracker = MetricsTracker()
+        tracker.log_inference("Q", "R", 0.5, tokens=20, prompt_tokens=40)
+        metric = tracker.inference_history[-1]
+        assert metric.tokens_per_s == pytest.approx(40.0)
+        assert metric.prompt_tokens == 40
+        assert tracker.get_summary()["stats"]["tokens_per_s"] == pytest.approx(40.0)
+    
+    def test_stop_savings_average_over_generations(self):
+        tracker = MetricsTracker()
+        tracker.log_stop_savings([100, 0])
+        tracker.log_stop_savings([50])
+        assert tracker.model_metrics.stop_sequence_stops == 2
+        assert tracker.model_metrics.avg_tokens_saved == pytest.approx(50.0)
+        assert tracker.get_summary()["stats"]["tokens_saved"] == 150
+    
+    def test_cache_hits_do_not_count_tokens(self):
+        tracker = MetricsTracker()
+        tracker.log_inference("Q", "R", 0.5, tokens=20)
+        tracker.log_inference("Q", "a cached answer of several words", 0.001, cached=True)
+        assert tracker.tokens_total == 20
+        assert tracker.inference_history[-1].tokens_generated == 0
+        assert tracker.model_metrics.cached_responses == 1
+        assert tracker.get_summary()["stats"]["tokens_per_s"] == pytest.approx(40.0)
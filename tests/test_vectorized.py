@@ -0,0 +1,80 @@
+import random
+import numpy as np
+import pytest
+from src.evaluation.metrics import (
+    evaluate_bleu,
+    evaluate_coherence,
+    evaluate_keyword_overlap,
+    evaluate_response_length,
+    evaluate_rouge_l,
+)
+from src.evaluation.vectorized import (
+    TokenizedPairs,
+    batch_bleu,
+    batch_coherence,
+    batch_keyword_overlap,
+    batch_response_length,
+    batch_rouge_l,
+    score_pairs,
+)
+
+
+def random_pairs(n=500, seed=0):
+    rng = random.Random(seed)
+    words = "I can help you with your order refund Cancel the package <b> where is it. Shipping ADDRESS".split()
+    
+    def text():
+        choice = rng.random()
+        if choice < 0.05:
+            return ""
+        if choice < 0.1:
+            return "aaaaaaaaaaaaaaa"
+        if choice < 0.15:
+            return "<<< >>> " + " ".join(rng.choices(words, k=5))
+        return " ".join(rng.choices(words, k=rng.choice([1, 2, 4, 10, 30])))
+    
+    return [text() for _ in range(n)], [text() for _ in range(n)]
+
+
+class TestVectorizedMetrics:
+    def test_matches_scalar_functions_exactly(self):
+        generated, expected = random_pairs()
+        scores = score_pairs(generated, expected)
+        
+        scalar = {
+            "coherence": [evaluate_coherence(g) for g in generated],
+            "length": [evaluate_response_length(g, e) for g, e in zip(generated, expected)],
+            "keyword": [evaluate_keyword_overlap(g, e) for g, e in zip(generated, expected)],
+            "rouge_l": [evaluate_rouge_l(g, e) for g, e in zip(generated, expected)],
+            "bleu": [evaluate_bleu(g, e) for g, e in zip(generated, expected)],
+        }
+        for name, values in scalar.items():
+            assert np.array_equal(scores[name], np.array(values)), name
+    
+    def test_individual_batch_functions(self):
+        generated = ["I can help you cancel your order", "<<<<<<<", ""]
+        expected = ["I will cancel your order", "Refund issued", "hello"]
+        
+        assert batch_coherence(generated).tolist() == [1.0, 0.0, 0.0]
+        assert batch_response_length(generated, expected).tolist() == [
+            evaluate_response_length(g, e) for g, e in zip(generated, expected)
+        ]
+        assert batch_keyword_overlap(generated, expected)[0] == evaluate_keyword_overlap(generated[0], expected[0])
+        assert batch_rouge_l(generated, expected)[2] == 0.0
+        assert batch_bleu(generated, expected)[1] == 0.0
+    
+    def test_ngram_keys_match_across_sides_only_within_document(self):
+        pairs = TokenizedPairs(["a b", "a b"], ["a b", "b a"])
+        gen_keys, _, exp_keys, _ = list(pairs.ngrams(2))[1]
+        
+        assert gen_keys[0] == exp_keys[0]
+        assert gen_keys[1] not in exp_keys
+    
+    def test_length_mismatch_rejected(self):
+        with pytest.raises(ValueError):
+            TokenizedPairs(["a"], [])
+    
+    def test_empty_input(self):
+        scores = score_pairs([], [])
+        
+        assert all(len(values) == 0 for values in scores.values())